@@ -0,0 +1,189 @@
+"""
+Runtime settings for the backend.
+Everything is read from the environment (or a local .env file) so it can be
+tuned per deployment without code changes. See .env.example for the knobs.
+"""
+import datetime
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+# backend/ directory; data files and on-disk caches live under backend/data/
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = Path(os.getenv("DATA_DIR", BASE_DIR / "data"))
+CACHE_DIR = Path(os.getenv("CACHE_DIR", DATA_DIR / "cache"))
+
+
+# --- UPSTREAM HTTP CLIENTS ---
+# Max open connections per upstream (Nominatim / Open-Meteo) and how many of
+# them are kept alive between requests.
+UPSTREAM_MAX_CONNECTIONS = _int("UPSTREAM_MAX_CONNECTIONS", 20)
+UPSTREAM_MAX_KEEPALIVE = _int("UPSTREAM_MAX_KEEPALIVE", 10)
+UPSTREAM_KEEPALIVE_EXPIRY = _float("UPSTREAM_KEEPALIVE_EXPIRY", 30.0)
+
+# Timeouts in seconds
+UPSTREAM_CONNECT_TIMEOUT = _float("UPSTREAM_CONNECT_TIMEOUT", 3.0)
+UPSTREAM_READ_TIMEOUT = _float("UPSTREAM_READ_TIMEOUT", 8.0)
+UPSTREAM_POOL_TIMEOUT = _float("UPSTREAM_POOL_TIMEOUT", 2.0)
+
+# HTTP/2 is used only if the optional `h2` package is installed
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "1") == "1"
+
+# Base URLs, overridable to point at a mirror or the local emulator
+# (python -m benchmarks.emulator); no trailing slash
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org").rstrip("/")
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com").rstrip("/")
+OPEN_METEO_ARCHIVE_URL = os.getenv("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com").rstrip("/")
+
+# --- WEATHER / SOIL CACHE ---
+# Coordinates are snapped to this grid (degrees) before hitting Open-Meteo
+WEATHER_CACHE_GRID_DEG = _float("WEATHER_CACHE_GRID_DEG", 0.05)
+FORECAST_CACHE_TTL = _float("FORECAST_CACHE_TTL", 3600)      # 7-day forecast
+ARCHIVE_CACHE_TTL = _float("ARCHIVE_CACHE_TTL", 86400)       # 30-day rain archive
+SOIL_CACHE_TTL = _float("SOIL_CACHE_TTL", 3600)              # hourly soil data
+WEATHER_CACHE_MAX_ENTRIES = _int("WEATHER_CACHE_MAX_ENTRIES", 20000)
+WEATHER_CACHE_MAX_BYTES = _int("WEATHER_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# --- LOCAL RAIN ARCHIVE ---
+# Daily precipitation per grid cell, one memory-mapped file per cell
+RAIN_ARCHIVE_DIR = Path(os.getenv("RAIN_ARCHIVE_DIR", CACHE_DIR / "rain"))
+RAIN_ARCHIVE_EPOCH = datetime.date.fromisoformat(os.getenv("RAIN_ARCHIVE_EPOCH", "2000-01-01"))
+RAIN_ARCHIVE_MAX_OPEN = _int("RAIN_ARCHIVE_MAX_OPEN", 1024)
+# Years of history fetched for a cell's simulation climatology, and how many
+# complete years each month needs before it replaces the built-in table
+RAIN_HISTORY_YEARS = _int("RAIN_HISTORY_YEARS", 10)
+RAIN_CLIMATOLOGY_MIN_YEARS = _int("RAIN_CLIMATOLOGY_MIN_YEARS", 5)
+# Longest a simulation waits for a cell's history download before using the
+# built-in table; after a failed download, seconds before it is tried again;
+# and how often an archived history is re-checked for a new year
+RAIN_HISTORY_WAIT = _float("RAIN_HISTORY_WAIT", 2.0)
+RAIN_HISTORY_RETRY = _float("RAIN_HISTORY_RETRY", 300)
+RAIN_HISTORY_RECHECK = _float("RAIN_HISTORY_RECHECK", 86400)
+
+# --- BACKGROUND PREFETCH ---
+# Keeps forecast/soil/rain cache entries of the busiest grid cells warm
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_INTERVAL = _float("PREFETCH_INTERVAL", 60)        # seconds between passes
+PREFETCH_LEAD_TIME = _float("PREFETCH_LEAD_TIME", 300)     # refresh this long before expiry
+PREFETCH_TOP_CELLS = _int("PREFETCH_TOP_CELLS", 200)
+PREFETCH_HALF_LIFE = _float("PREFETCH_HALF_LIFE", 6 * 3600)  # popularity decay
+PREFETCH_RATE_PER_S = _float("PREFETCH_RATE_PER_S", 2.0)   # refresh budget
+# Pause refreshing while live requests have this many upstream calls in flight
+PREFETCH_BUSY_INFLIGHT = _int("PREFETCH_BUSY_INFLIGHT", 4)
+
+# Optional: also keep saved user locations (Supabase `user_locations`) warm.
+# Needs the service-role key, since the table is behind row level security.
+SUPABASE_URL = os.getenv("SUPABASE_URL", "").rstrip("/")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")
+USER_LOCATIONS_REFRESH = _float("USER_LOCATIONS_REFRESH", 3600)  # re-read the table every N s
+
+# --- STATIC CATALOGUE ENDPOINTS ---
+# Browser cache lifetime (seconds) for /api/crops and /api/soils; after
+# that clients revalidate with If-None-Match and usually get a 304
+CATALOGUE_MAX_AGE = _int("CATALOGUE_MAX_AGE", 3600)
+# Crop/soil/market data file, and how often (seconds) to check it for
+# changes and reload (0 = only via POST /api/admin/reload-catalogue)
+CATALOGUE_FILE = Path(os.getenv("CATALOGUE_FILE", DATA_DIR / "catalogue.json"))
+CATALOGUE_WATCH_INTERVAL = _float("CATALOGUE_WATCH_INTERVAL", 10)
+# Token for /api/admin/* endpoints (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# --- UPSTREAM FAILURES ---
+# Circuit breaker: open after N consecutive failures, probe again after N s
+BREAKER_FAILURE_THRESHOLD = _int("BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT = _float("BREAKER_RESET_TIMEOUT", 30)
+# Expired weather/soil entries are served (marked stale) while a background
+# refresh runs for this many seconds past expiry, and for this long when the
+# upstream is failing
+STALE_WHILE_REVALIDATE = _float("STALE_WHILE_REVALIDATE", 900)
+STALE_IF_ERROR = _float("STALE_IF_ERROR", 86400)
+
+# --- TRACING ---
+# Per-stage timings in a Server-Timing response header
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
+# Fraction of requests whose full span list is written to TRACE_FILE, plus
+# every request slower than TRACE_SLOW_MS (0 disables either)
+TRACE_SAMPLE_RATE = _float("TRACE_SAMPLE_RATE", 0.0)
+TRACE_SLOW_MS = _float("TRACE_SLOW_MS", 0)
+TRACE_FILE = Path(os.getenv("TRACE_FILE", CACHE_DIR / "traces.jsonl"))
+# Rotate the trace file at this size, keeping N old files
+TRACE_MAX_BYTES = _int("TRACE_MAX_BYTES", 10 * 1024 * 1024)
+TRACE_BACKUPS = _int("TRACE_BACKUPS", 3)
+
+# --- /api/water-balance ---
+# Shared deadline (seconds) for the concurrent reverse-geocode/archive/forecast
+# fetches; branches that miss it fall back and are reported as degraded.
+WATER_BALANCE_DEADLINE = _float("WATER_BALANCE_DEADLINE", 6.0)
+
+# --- GEOCODING (Nominatim) ---
+GEOCODE_DB_PATH = Path(os.getenv("GEOCODE_DB_PATH", CACHE_DIR / "geocode.sqlite3"))
+GEOCODE_REVERSE_GRID_DEG = _float("GEOCODE_REVERSE_GRID_DEG", 0.01)
+GEOCODE_MAX_AGE_DAYS = _float("GEOCODE_MAX_AGE_DAYS", 180)
+# How long "Nominatim found nothing" is remembered (seconds)
+GEOCODE_NEGATIVE_TTL = _float("GEOCODE_NEGATIVE_TTL", 900)
+# Nominatim's public usage policy: max 1 request/second for the whole app
+NOMINATIM_RATE_PER_S = _float("NOMINATIM_RATE_PER_S", 1.0)
+NOMINATIM_BURST = _int("NOMINATIM_BURST", 1)
+# Longest a request will queue for a Nominatim slot before giving up
+NOMINATIM_MAX_WAIT = _float("NOMINATIM_MAX_WAIT", 5.0)
+
+# --- LOCAL LOCATION DIRECTORY ---
+# Optional CSV of villages/pincodes (e.g. the India Post pincode directory)
+# loaded on top of the built-in Maharashtra city list.
+LOCATIONS_FILE = os.getenv("LOCATIONS_FILE") or (
+    DATA_DIR / "locations.csv" if (DATA_DIR / "locations.csv").exists() else None
+)
+# GPS points this close (km) to a known place resolve locally, skipping
+# Nominatim reverse geocoding
+LOCAL_GEOCODE_RADIUS_KM = _float("LOCAL_GEOCODE_RADIUS_KM", 3.0)
+# Local suggestions needed before /api/suggestions skips Nominatim
+# (0 = auto: 1 with a LOCATIONS_FILE loaded, 3 with only the built-in list)
+SUGGESTIONS_LOCAL_MIN = _int("SUGGESTIONS_LOCAL_MIN", 0)
+# Queries shorter than this (normalised characters) never reach Nominatim;
+# they get local matches plus whatever the suggestion cache already holds
+SUGGESTIONS_REMOTE_MIN_CHARS = _int("SUGGESTIONS_REMOTE_MIN_CHARS", 4)
+
+# --- REMOTE AUTOCOMPLETE CACHE ---
+SUGGESTION_CACHE_TTL = _float("SUGGESTION_CACHE_TTL", 86400)
+SUGGESTION_CACHE_MAX_ENTRIES = _int("SUGGESTION_CACHE_MAX_ENTRIES", 20000)
+
+# --- MARKET PRICES ---
+# Optional daily price history (Agmarknet / data.gov.in CSV export). Without
+# it /api/market-prices only has the catalogue's sample quotes.
+MARKET_PRICES_FILE = os.getenv("MARKET_PRICES_FILE") or (
+    DATA_DIR / "market_prices.csv" if (DATA_DIR / "market_prices.csv").exists() else None
+)
+# A latest quote is "up"/"down" when it differs from the mean of the
+# previous N days by more than this many percent
+MARKET_TREND_DAYS = _int("MARKET_TREND_DAYS", 7)
+MARKET_TREND_THRESHOLD_PCT = _float("MARKET_TREND_THRESHOLD_PCT", 2.0)
+# Date range for history/summary/compare queries: default and maximum (days)
+MARKET_DEFAULT_RANGE_DAYS = _int("MARKET_DEFAULT_RANGE_DAYS", 30)
+MARKET_MAX_RANGE_DAYS = _int("MARKET_MAX_RANGE_DAYS", 731)
+
+# --- BATCH ENDPOINTS ---
+BATCH_MAX_ITEMS = _int("BATCH_MAX_ITEMS", 1000)
+# Max concurrent geocode lookups / Open-Meteo requests per batch
+BATCH_CONCURRENCY = _int("BATCH_CONCURRENCY", 8)
+# Longest a batch geocode lookup queues for its Nominatim slot. Batch
+# lookups wait in line one at a time (~1/s under the usage policy) instead of
+# failing fast like interactive requests (NOMINATIM_MAX_WAIT)
+BATCH_NOMINATIM_MAX_WAIT = _float("BATCH_NOMINATIM_MAX_WAIT", 30.0)
+# Coordinates per multi-location Open-Meteo request (keeps URLs short)
+OPEN_METEO_BATCH_SIZE = _int("OPEN_METEO_BATCH_SIZE", 50)
+
+# --- SIMULATION ---
+SIMULATION_TRAJECTORIES = _int("SIMULATION_TRAJECTORIES", 10000)
+SIMULATION_MAX_TRAJECTORIES = _int("SIMULATION_MAX_TRAJECTORIES", 100000)
@@ -0,0 +1,103 @@
+"""
+Vectorised version of the smart crop engine for scoring many plots at once.
+
+Extension officers upload thousands of plots; instead of running the scalar
+engine per plot, the catalogue is encoded as arrays and every plot x crop
+pair is scored in one NumPy pass. Scores, cut-offs and tie-breaking match
+`get_smart_recommendations` exactly.
+"""
+import numpy as np
+
+from app.logic.crop_index import CropIndex
+
+ROW_CHUNK = 20000  # caps the (rows x crops) temporaries for very large uploads
+
+# Water status codes, same thresholds as the scalar engine
+CRITICAL, MODERATE, SAFE = 0, 1, 2
+
+
+class CropMatrix:
+    """Array encoding of one CropIndex (one catalogue version)."""
+
+    def __init__(self, index: CropIndex):
+        self.index = index
+        self.names = np.array([c.name for c in index.crops], dtype=object)
+        water = np.array([c.water_mm for c in index.crops])
+        # Water score per status (rows) and crop (columns)
+        self.water_score = np.stack([
+            np.where(water < 400, 50, -50),  # Critical
+            np.where(water < 800, 30, 0),    # Moderate
+            np.full(len(water), 20),         # Safe
+        ]).astype(np.int16)
+
+    def season_mask(self, seasons) -> np.ndarray:
+        mask = np.zeros((len(seasons), len(self.names)), dtype=bool)
+        for row, season in enumerate(seasons):
+            mask[row, self.index.season_crops(season)[1]] = True
+        return mask
+
+    def soil_mask(self, soil_types) -> np.ndarray:
+        mask = np.zeros((len(soil_types), len(self.names)), dtype=bool)
+        for row, soil in enumerate(soil_types):
+            mask[row, list(self.index.soil_matches(soil))] = True
+        return mask
+
+    def top_k(self, soil_types, seasons, water_mm, k: int = 5):
+        """
+        Score all plots. Returns (crop ids, scores, counts): the first two are
+        (n_plots x k) arrays ordered best-first, and counts says how many of
+        each row's k slots are real recommendations.
+        """
+        k = min(k, len(self.names))
+        # Distinct soils/seasons are few; resolve them once and broadcast
+        soils, soil_inv = _encode(soil_types)
+        seasons_u, season_inv = _encode(seasons)
+        soil_mask = self.soil_mask(soils)
+        season_mask = self.season_mask(seasons_u)
+        n_crops = len(self.names)
+        # Sort key: higher score first, then lower crop id (catalogue order),
+        # the same tie-break list.sort gives the scalar engine
+        tie_break = np.arange(n_crops - 1, -1, -1)
+
+        water_mm = np.asarray(water_mm, dtype=float)
+        status = np.full(len(water_mm), SAFE, dtype=np.int8)
+        status[water_mm < 600] = MODERATE
+        status[water_mm < 300] = CRITICAL
+
+        ids_out, scores_out = [], []
+        for start in range(0, len(water_mm), ROW_CHUNK):
+            rows = slice(start, start + ROW_CHUNK)
+            score = self.water_score[status[rows]] + 40 * soil_mask[soil_inv[rows]]
+            valid = season_mask[season_inv[rows]] & (score >= 50)
+            score = np.where(valid, score, -1000)
+            key = (score.astype(np.int32) + 1000) * n_crops + tie_break
+            if k < n_crops:
+                top = np.argpartition(-key, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n_crops), key.shape)
+            order = np.take_along_axis(top, np.argsort(-np.take_along_axis(key, top, axis=1), axis=1), axis=1)
+            ids_out.append(order)
+            scores_out.append(np.take_along_axis(score, order, axis=1))
+
+        ids = np.concatenate(ids_out) if ids_out else np.zeros((0, k), dtype=int)
+        scores = np.concatenate(scores_out) if scores_out else np.zeros((0, k), dtype=int)
+        counts = (scores >= 50).sum(axis=1)
+        return ids, scores, counts
+
+
+def _encode(values):
+    """Dictionary-encode a column: (distinct values, int code per row)."""
+    codes = {}
+    inv = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.intp, count=len(values))
+    return list(codes), inv
+
+
+_matrix = None
+
+
+def crop_matrix(index: CropIndex) -> CropMatrix:
+    """The CropMatrix for `index`, rebuilt whenever the index is replaced."""
+    global _matrix
+    if _matrix is None or _matrix.index is not index:
+        _matrix = CropMatrix(index)
+    return _matrix
@@ -0,0 +1,66 @@
+"""
+Circuit breaker for upstream services.
+
+After `failure_threshold` consecutive failures the circuit opens and calls
+fail immediately with CircuitOpen instead of waiting for a timeout. After
+`reset_timeout` seconds one probe call is let through (half-open): success
+closes the circuit, failure opens it again for another `reset_timeout`.
+"""
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go out now."""
+        if self.state == CLOSED:
+            return
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True  # this caller is the probe
+            return
+        self.short_circuited += 1
+        raise CircuitOpen(f"{self.name} circuit open")
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self):
+        """The call ended without a verdict (e.g. cancelled); free the probe slot."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+        }
@@ -0,0 +1,133 @@
+"""
+In-process TTL cache with LRU eviction, used for upstream weather/soil data.
+
+Farmers in the same few km² get the same Open-Meteo answer (the model grid is
+coarser than GPS noise), so keys are built from coordinates snapped to a grid.
+"""
+import sys
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+
+def grid_cell(lat: float, lng: float, grid_deg: float):
+    """Snap a coordinate to the centre of its grid cell, e.g. 0.05° (~5 km)."""
+    return (
+        round(round(lat / grid_deg) * grid_deg, 4),
+        round(round(lng / grid_deg) * grid_deg, 4),
+    )
+
+
+def approx_size(value) -> int:
+    """Rough deep size in bytes of JSON-like data (dicts, lists, scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += approx_size(k) + approx_size(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += approx_size(v)
+    return size
+
+
+# Names of data sources answered from stale cache during the current request
+_stale_sources = ContextVar("stale_sources", default=None)
+
+
+def track_stale() -> set:
+    """
+    Start collecting stale markers for the current request. Returns the set
+    that mark_stale() fills; tasks spawned afterwards share it.
+    """
+    sources = set()
+    _stale_sources.set(sources)
+    return sources
+
+
+def mark_stale(source: str):
+    sources = _stale_sources.get()
+    if sources is not None:
+        sources.add(source)
+
+
+class TTLCache:
+    """
+    LRU cache where every entry carries its own expiry.
+    Bounded by both entry count and approximate memory use.
+    """
+
+    def __init__(self, name: str, max_entries: int = 5000, max_bytes: int = 32 * 1024 * 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the cached value, or None if missing/expired."""
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key):
+        """Like get(), but without touching counters or LRU order."""
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def get_stale(self, key):
+        """
+        Value even if expired, as (value, seconds past expiry; <= 0 if still
+        fresh), or (None, None). Expired entries stay until LRU eviction, so
+        they can be served as a last known good value.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None, None
+        return entry[0], time.monotonic() - entry[1]
+
+    def expires_in(self, key):
+        """Seconds until `key` expires (negative once expired), or None if absent."""
+        entry = self._data.get(key)
+        return None if entry is None else entry[1] - time.monotonic()
+
+    def set(self, key, value, ttl: float):
+        size = approx_size(value)
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        self._data[key] = (value, time.monotonic() + ttl, size)
+        self._bytes += size
+        self._evict()
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+
+    def _evict(self):
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "approx_bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
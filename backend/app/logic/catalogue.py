@@ -0,0 +1,246 @@
+"""
+Crop / soil / market catalogue, loaded from a versioned JSON data file.
+
+Records are frozen slotted dataclasses: seasons and soil tags are IntFlag
+bitmasks, repeated strings (types, climates, ...) are interned, and crop
+names resolve to ids through one table. A `Catalogue` is immutable and
+carries everything derived from it (CropIndex, pre-serialised responses).
+`CatalogueStore.reload()` builds a complete new one and swaps a single
+reference, so a request that took `store.current` at its start keeps a
+consistent view while a reload happens.
+"""
+import asyncio
+import json
+import os
+import sys
+from dataclasses import dataclass
+
+from app.logic.crop_index import CropIndex, Season, Soil
+from app.logic.static_response import PrecomputedJSON
+
+SCHEMA = 1
+
+# Used for crops without seed/input costs in the data file (INR)
+DEFAULT_SEED_PER_KG = 100
+DEFAULT_INPUT_PER_ACRE = 15000
+
+
+class CatalogueError(ValueError):
+    """The data file is missing, malformed or fails validation."""
+
+
+@dataclass(frozen=True, slots=True)
+class Crop:
+    id: int
+    name: str
+    water_mm: int
+    seasons: Season
+    soils: Soil
+    type: str
+    sunlight: str
+    temperature: str
+    climate: str
+    seed_per_kg: int
+    input_per_acre: int
+
+    @property
+    def season(self) -> str:
+        return "/".join(self.seasons.labels())
+
+    def to_dict(self) -> dict:
+        """The public /api/crops shape."""
+        return {
+            "name": self.name,
+            "water_mm": self.water_mm,
+            "season": self.season,
+            "type": self.type,
+            "soil": self.soils.labels(),
+            "sunlight": self.sunlight,
+            "temperature": self.temperature,
+            "climate": self.climate,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class SoilType:
+    name: str
+    type: str
+    retention: str
+    desc: str
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "type": self.type, "retention": self.retention, "desc": self.desc}
+
+
+@dataclass(frozen=True, slots=True)
+class MarketQuote:
+    market: str
+    state: str
+    min_price: int
+    max_price: int
+    modal_price: int
+    trend: str
+    date: str
+
+    def to_dict(self) -> dict:
+        return {
+            "market": self.market, "state": self.state, "min_price": self.min_price,
+            "max_price": self.max_price, "modal_price": self.modal_price, "trend": self.trend, "date": self.date,
+        }
+
+
+class Catalogue:
+    """One loaded version of the data file and everything derived from it."""
+    __slots__ = ("version", "mtime", "crops", "ids", "soils", "market_prices",
+                 "index", "crops_response", "soils_response")
+
+    def __init__(self, version, mtime, crops, soils, market_prices, max_age):
+        self.version = version
+        self.mtime = mtime
+        self.crops = crops
+        self.ids = {c.name: c.id for c in crops}
+        self.soils = soils
+        self.market_prices = market_prices
+        self.index = CropIndex(crops)
+        self.crops_response = PrecomputedJSON({"success": True, "data": [c.to_dict() for c in crops]}, max_age)
+        self.soils_response = PrecomputedJSON({"success": True, "data": [s.to_dict() for s in soils]}, max_age)
+
+    def crop(self, name: str):
+        """Crop record by exact name, or None."""
+        i = self.ids.get(name)
+        return None if i is None else self.crops[i]
+
+
+def _str(record: dict, key: str, default=None) -> str:
+    value = record.get(key, default)
+    if not isinstance(value, str):
+        raise CatalogueError(f"{record.get('name', record)!r}: {key} must be a string")
+    return sys.intern(value)
+
+
+def _num(record: dict, key: str, default=None) -> int:
+    value = record.get(key, default)
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+        raise CatalogueError(f"{record.get('name', record)!r}: {key} must be a non-negative number")
+    return value
+
+
+def _crop(i: int, c: dict) -> Crop:
+    try:
+        seasons = Season.parse(_str(c, "season"))
+        soils = Soil.parse(c.get("soil", []))
+    except ValueError as e:
+        raise CatalogueError(f"{c.get('name')!r}: {e}") from e
+    if not seasons:
+        raise CatalogueError(f"{c.get('name')!r}: no season")
+    return Crop(
+        id=i,
+        name=_str(c, "name"),
+        water_mm=_num(c, "water_mm"),
+        seasons=seasons,
+        soils=soils,
+        type=_str(c, "type"),
+        sunlight=_str(c, "sunlight", "Full Sun"),
+        temperature=_str(c, "temperature", "20-30°C"),
+        climate=_str(c, "climate", "Varied"),
+        seed_per_kg=_num(c, "seed_per_kg", DEFAULT_SEED_PER_KG),
+        input_per_acre=_num(c, "input_per_acre", DEFAULT_INPUT_PER_ACRE),
+    )
+
+
+def load_catalogue(path, max_age: int = 3600) -> Catalogue:
+    """Parse and validate the data file. Raises CatalogueError."""
+    try:
+        mtime = os.stat(path).st_mtime
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CatalogueError(f"cannot read {path}: {e}") from e
+    if not isinstance(raw, dict) or raw.get("schema") != SCHEMA:
+        raise CatalogueError(f"{path}: expected an object with schema {SCHEMA}")
+    try:
+        crops = tuple(_crop(i, c) for i, c in enumerate(raw["crops"]))
+        soils = tuple(SoilType(_str(s, "name"), _str(s, "type"), _str(s, "retention"), _str(s, "desc"))
+                      for s in raw["soils"])
+        market_prices = {
+            sys.intern(commodity): tuple(
+                MarketQuote(_str(q, "market"), _str(q, "state"), _num(q, "min_price"), _num(q, "max_price"),
+                            _num(q, "modal_price"), _str(q, "trend"), _str(q, "date"))
+                for q in quotes
+            )
+            for commodity, quotes in raw.get("market_prices", {}).items()
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        raise CatalogueError(f"{path}: malformed record ({e!r})") from e
+    names = [c.name for c in crops]
+    if len(set(names)) != len(names):
+        raise CatalogueError(f"{path}: duplicate crop names")
+    if not crops or not soils:
+        raise CatalogueError(f"{path}: needs at least one crop and one soil")
+    return Catalogue(str(raw.get("version", "")), mtime, crops, soils, market_prices, max_age)
+
+
+class CatalogueStore:
+    """
+    Holds the current Catalogue. Readers take `store.current` once per
+    request; reload() replaces it whole. With a watch interval, a background
+    task reloads when the file's mtime changes. A file that fails validation
+    is reported and the previous catalogue stays in service.
+    """
+
+    def __init__(self, path, max_age: int = 3600):
+        self.path = path
+        self.max_age = max_age
+        self.current = load_catalogue(path, max_age)
+        self.reloads = 0
+        self.failed_reloads = 0
+        self._task = None
+
+    def reload(self) -> Catalogue:
+        try:
+            catalogue = load_catalogue(self.path, self.max_age)
+        except CatalogueError:
+            self.failed_reloads += 1
+            raise
+        self.current = catalogue
+        self.reloads += 1
+        return catalogue
+
+    def start_watching(self, interval: float):
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._watch(interval))
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _watch(self, interval: float):
+        seen = self.current.mtime
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                continue
+            if mtime != seen and mtime != self.current.mtime:
+                seen = mtime  # a broken file is reported once, not every tick
+                try:
+                    catalogue = await asyncio.to_thread(self.reload)
+                    print(f"Catalogue reloaded: version {catalogue.version}")
+                except CatalogueError as e:
+                    print(f"Catalogue reload Error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "version": self.current.version,
+            "crops": len(self.current.crops),
+            "soils": len(self.current.soils),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "watching": self._task is not None,
+        }
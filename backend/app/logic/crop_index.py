@@ -0,0 +1,126 @@
+"""
+Precomputed lookup structures over the crop catalogue.
+
+The recommendation engines used to scan every crop per request, re-deriving
+season membership with substring checks and soil compatibility with nested
+loops. CropIndex does that work once per catalogue load, so a request is a
+couple of dict/set lookups plus a bisect into water-sorted crop lists.
+"""
+from bisect import bisect_left
+from enum import IntFlag
+
+_MEMO_LIMIT = 256  # bound per-input memo tables (inputs are user-supplied strings)
+
+
+class _Labelled(IntFlag):
+    @classmethod
+    def parse(cls, names, strict: bool = True):
+        """Flags from names ("Kharif/Rabi" or ["Black", "Medium"]), case-insensitive."""
+        if isinstance(names, str):
+            names = names.split("/")
+        value = cls(0)
+        for name in names:
+            member = cls.__members__.get(name.strip().upper())
+            if member is None:
+                if strict:
+                    raise ValueError(f"unknown {cls.__name__.lower()} {name!r}")
+                continue
+            value |= member
+        return value
+
+    def labels(self) -> list:
+        return [m.name.title() for m in type(self) if m in self]
+
+
+class Season(_Labelled):
+    KHARIF = 1
+    RABI = 2
+    ZAID = 4
+    ANNUAL = 8  # grown all year; matches any season
+
+
+class Soil(_Labelled):
+    # Declaration order is the order soil lists are written back out
+    MEDIUM = 1
+    HEAVY = 2
+    BLACK = 4
+    CLAY = 8
+    LIGHT = 16
+    RED = 32
+    SANDY = 64
+
+
+# Soil classes as the engines map them from free-text soil names
+HEAVY_SOILS = Soil.CLAY | Soil.BLACK | Soil.HEAVY
+LIGHT_SOILS = Soil.SANDY | Soil.LIGHT | Soil.RED
+
+
+def soil_class(soil_type: str) -> str:
+    """'Black Soil (Kali)' -> 'heavy', 'Red Soil' -> 'light', else 'medium'."""
+    st = soil_type.lower()
+    if "black" in st or "clay" in st or "heavy" in st:
+        return "heavy"
+    if "red" in st or "light" in st or "sandy" in st:
+        return "light"
+    return "medium"
+
+
+class CropIndex:
+    """
+    Index over a sequence of catalogue Crop records.
+    Crop ids are positions in that sequence, so sorting by id keeps catalogue order.
+    """
+
+    def __init__(self, crops):
+        self.crops = tuple(crops)
+        self._season_memo = {}
+        self._soil_memo = {}
+
+    def _with_soils(self, mask: Soil) -> set:
+        return {i for i, crop in enumerate(self.crops) if crop.soils & mask}
+
+    def season_crops(self, season: str):
+        """
+        Crops grown in `season` (plus Annual ones), as two parallel lists
+        sorted by water need: (water_mm values, crop ids).
+        `season` is matched as a case-sensitive substring of the crop's
+        season label ("Rabi" matches "Kharif/Rabi", "" matches every crop),
+        exactly as the engines always have, since it is passed through from
+        user input unvalidated.
+        """
+        hit = self._season_memo.get(season)
+        if hit is None:
+            ids = [i for i, crop in enumerate(self.crops)
+                   if crop.seasons & Season.ANNUAL or season in crop.season]
+            ids.sort(key=lambda i: (self.crops[i].water_mm, i))
+            hit = ([self.crops[i].water_mm for i in ids], ids)
+            if len(self._season_memo) >= _MEMO_LIMIT:
+                self._season_memo.clear()
+            self._season_memo[season] = hit
+        return hit
+
+    def season_crops_below(self, season: str, max_water_mm=None):
+        """Crop ids for `season` needing strictly less than `max_water_mm`."""
+        waters, ids = self.season_crops(season)
+        if max_water_mm is None:
+            return ids
+        return ids[:bisect_left(waters, max_water_mm)]
+
+    def soil_matches(self, soil_type: str) -> frozenset:
+        """
+        Crop ids whose soil tags suit `soil_type`: either by soil class
+        (Black/Clay/Heavy vs Sandy/Light/Red) or because one of the tag
+        names appears in the user's soil text.
+        """
+        st = soil_type.lower()
+        hit = self._soil_memo.get(st)
+        if hit is None:
+            mask = {"heavy": HEAVY_SOILS, "light": LIGHT_SOILS}.get(soil_class(st), Soil(0))
+            for tag in Soil:
+                if tag.name.lower() in st:
+                    mask |= tag
+            hit = frozenset(self._with_soils(mask))
+            if len(self._soil_memo) >= _MEMO_LIMIT:
+                self._soil_memo.clear()
+            self._soil_memo[st] = hit
+        return hit
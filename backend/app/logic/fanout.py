@@ -0,0 +1,43 @@
+"""
+Run independent upstream calls concurrently under one shared deadline.
+"""
+import asyncio
+
+# Stragglers that outlived their request; kept referenced until they finish
+_background = set()
+
+
+async def gather_with_deadline(branches: dict, fallbacks: dict, timeout: float):
+    """
+    Run named coroutines concurrently and wait at most `timeout` seconds.
+
+    Returns (results, degraded): results maps every branch name to its value,
+    or to its fallback if it raised or missed the deadline; degraded lists
+    those branch names. Late branches are not cancelled - they keep running in
+    the background so whatever they fetch still lands in the caches.
+    """
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in branches.items()}
+    if not tasks:
+        return {}, []
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+
+    for task in pending:
+        _background.add(task)
+        task.add_done_callback(_finish_background)
+
+    results, degraded = {}, []
+    for name, task in tasks.items():
+        if task in done and task.exception() is None:
+            results[name] = task.result()
+        else:
+            if task in done:
+                print(f"Fan-out Error ({name}): {task.exception()}")
+            results[name] = fallbacks.get(name)
+            degraded.append(name)
+    return results, degraded
+
+
+def _finish_background(task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background fetch Error: {task.exception()}")
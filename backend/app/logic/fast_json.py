@@ -0,0 +1,82 @@
+"""
+Fast JSON responses.
+
+FastAPI normally passes every returned dict through `jsonable_encoder` and
+then stdlib `json`. For our large nested payloads (water balance, batch
+results) that walk dominates the response cost. `FastJSONResponse` encodes
+with orjson when it is installed, and `FastJSONRoute` hands plain return
+values straight to it, skipping `jsonable_encoder`.
+
+Output matches Starlette's JSONResponse: compact separators, UTF-8 without
+\\u escapes, ISO dates, shortest round-trip floats (orjson writes exponents
+as 1e16 rather than 1e+16). Anything orjson can't encode natively (pydantic
+models, sets, ...) falls back to `jsonable_encoder` per object. With
+orjson, NaN/inf become null instead of raising.
+"""
+import functools
+import inspect
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json gives identical bytes, just slower
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _default(obj):
+    # numpy scalars/arrays are handled by OPT_SERIALIZE_NUMPY; everything else
+    # gets FastAPI's usual treatment
+    return jsonable_encoder(obj)
+
+
+def dumps(content) -> bytes:
+    """Encode like JSONResponse.render, but fast."""
+    if orjson is None:
+        return json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """
+    APIRoute that wraps plain (dict/list) return values in FastJSONResponse
+    itself, so FastAPI's generic `jsonable_encoder` pass is skipped. Routes
+    with a response_model keep FastAPI's validation path.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        response_model = kwargs.get("response_model")
+        # Unset response_model arrives as a Default(None) placeholder
+        if getattr(response_model, "value", response_model) is None and \
+                inspect.signature(endpoint).return_annotation is inspect.Signature.empty:
+            endpoint = _wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _wrap(endpoint):
+    def respond(result):
+        if isinstance(result, Response):
+            return result
+        return FastJSONResponse(result)
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            return respond(await endpoint(*args, **kwargs))
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            return respond(endpoint(*args, **kwargs))
+    return wrapper
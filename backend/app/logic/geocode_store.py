@@ -0,0 +1,141 @@
+"""
+Persistent geocoding cache (SQLite) so Nominatim lookups survive restarts.
+
+Forward lookups are keyed by a normalised query string ("  Pune " and "pune"
+share an entry, "411 001" becomes "411001"); reverse lookups by coordinates
+snapped to a grid, since everyone within a few hundred metres gets the same
+village back.
+"""
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.logic.cache import grid_cell
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS forward_geocode (
+    query TEXT PRIMARY KEY,
+    lat REAL,
+    lng REAL,
+    display_name TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reverse_geocode (
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    region TEXT,
+    pincode TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (lat, lng)
+);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace; '411 001' -> '411001'."""
+    q = re.sub(r"[^\w\s-]", " ", query.lower())
+    q = " ".join(q.split())
+    if re.fullmatch(r"[\d ]+", q) and len(q.replace(" ", "")) == 6:
+        q = q.replace(" ", "")
+    return q
+
+
+class GeocodeStore:
+    """
+    SQLite-backed forward/reverse geocode cache.
+    Misses (queries Nominatim couldn't resolve) are remembered for a much
+    shorter `negative_ttl`, so we don't keep asking for the same typo but a
+    transient empty answer doesn't hide a real place for long.
+
+    Methods block on SQLite (a write commits to disk), so async code calls
+    them through asyncio.to_thread; a lock serialises use of the connection.
+    """
+
+    def __init__(self, path, grid_deg: float = 0.01, max_age: float = 180 * 86400, negative_ttl: float = 900):
+        self.path = Path(path)
+        self.grid_deg = grid_deg
+        self.max_age = max_age
+        self.negative_ttl = negative_ttl
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _fresh(self, updated_at: float, found: bool) -> bool:
+        ttl = self.max_age if found else self.negative_ttl
+        return time.time() - updated_at < ttl
+
+    # --- FORWARD (query -> coordinates) ---
+
+    def get_forward(self, query: str):
+        """
+        Returns (hit, result): result is the cached dict, or None for a
+        remembered miss. hit is False if we have nothing usable.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT lat, lng, display_name, updated_at FROM forward_geocode WHERE query = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if row is None or not self._fresh(row[3], row[0] is not None):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        if row[0] is None:
+            return True, None
+        return True, {"lat": row[0], "lng": row[1], "display_name": row[2]}
+
+    def put_forward(self, query: str, result):
+        lat, lng, name = (result["lat"], result["lng"], result["display_name"]) if result else (None, None, None)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO forward_geocode VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), lat, lng, name, time.time()),
+            )
+
+    # --- REVERSE (coordinates -> region, pincode) ---
+
+    def get_reverse(self, lat: float, lng: float):
+        """Returns (region, pincode) or None if the grid cell isn't cached."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT region, pincode, updated_at FROM reverse_geocode WHERE lat = ? AND lng = ?",
+                grid_cell(lat, lng, self.grid_deg),
+            ).fetchone()
+        if row is None or not self._fresh(row[2], row[0] is not None):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], row[1]
+
+    def put_reverse(self, lat: float, lng: float, region, pincode):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reverse_geocode VALUES (?, ?, ?, ?, ?)",
+                (*grid_cell(lat, lng, self.grid_deg), region, pincode, time.time()),
+            )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
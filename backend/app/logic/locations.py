@@ -0,0 +1,66 @@
+"""
+Loader for the local village/pincode directory.
+
+Accepts a CSV such as the India Post "All India Pincode Directory" export or
+a simple name,pincode,lat,lng file. Header names are matched loosely so both
+formats work without conversion. Rows come back in the same shape as
+MAHARASHTRA_LOCATIONS: {"city", "pincode", "lat", "lng"} (+ district/state).
+"""
+import csv
+import re
+from pathlib import Path
+
+_COLUMNS = {
+    "city": ("city", "name", "officename", "office_name", "village", "place"),
+    "pincode": ("pincode", "pin", "postcode"),
+    "lat": ("lat", "latitude"),
+    "lng": ("lng", "lon", "long", "longitude"),
+    "district": ("district", "districtname"),
+    "state": ("state", "statename"),
+}
+
+# Post office suffixes: "Shivajinagar S.O" -> "Shivajinagar"
+_OFFICE_SUFFIX = re.compile(r"\s+[BSHG]\.?\s?O\.?$", re.IGNORECASE)
+
+
+def _coord(value):
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if v == v else None  # drop NaN
+
+
+def load_locations(path) -> list:
+    """Read a location CSV; returns [] if `path` is unset or missing."""
+    if not path:
+        return []
+    path = Path(path)
+    if not path.exists():
+        print(f"Locations file not found: {path}")
+        return []
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        header = {h.strip().lower().replace(" ", ""): h for h in reader.fieldnames or []}
+        cols = {}
+        for field, aliases in _COLUMNS.items():
+            cols[field] = next((header[a] for a in aliases if a in header), None)
+        if not cols["city"] or not cols["pincode"]:
+            print(f"Locations file {path} needs name and pincode columns")
+            return []
+
+        rows = []
+        for row in reader:
+            name = _OFFICE_SUFFIX.sub("", (row[cols["city"]] or "").strip())
+            pincode = (row[cols["pincode"]] or "").strip()
+            if not name or not pincode:
+                continue
+            lat = _coord(row[cols["lat"]]) if cols["lat"] else None
+            lng = _coord(row[cols["lng"]]) if cols["lng"] else None
+            loc = {"city": name, "pincode": pincode, "lat": lat, "lng": lng}
+            for extra in ("district", "state"):
+                if cols[extra] and row[cols[extra]]:
+                    loc[extra] = row[cols[extra]].strip().title()
+            rows.append(loc)
+    return rows
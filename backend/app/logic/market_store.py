@@ -0,0 +1,366 @@
+"""
+Columnar store of daily market (APMC) prices.
+
+Rows live in parallel numpy arrays sorted by series (commodity x market) and
+then by day, with one int64 key per row: series id in the high 32 bits, day
+ordinal in the low 32. A date range for any set of series is one vectorised
+searchsorted on that key, so rows for a commodity are contiguous and every
+query (latest quote, history, moving averages, per-market aggregates, daily
+cross-market bands) is slicing plus ufunc reductions, never a Python loop
+over rows. A prefix sum of modal prices makes moving averages O(1) per row.
+
+Loads the Agmarknet / data.gov.in "current daily price" CSV exports; header
+names are matched loosely, as in locations.py.
+"""
+import csv
+import datetime
+import re
+from pathlib import Path
+
+import numpy as np
+
+_COLUMNS = {
+    "commodity": ("commodity", "commodity_name"),
+    "market": ("market", "market_name", "apmc"),
+    "state": ("state", "state_name"),
+    "date": ("arrival_date", "price_date", "reported_date", "date"),
+    "min_price": ("min_price", "min"),
+    "max_price": ("max_price", "max"),
+    "modal_price": ("modal_price", "modal"),
+}
+_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d %b %Y", "%d-%b-%Y")
+
+# "Paddy(Dhan)(Common)" / "Rice (Paddy)" -> "Rice"
+_ALIASES = {"paddy": "Rice", "sorghum": "Jowar", "pearl": "Bajra"}
+
+_SHIFT = 32
+_DAY_MASK = (1 << _SHIFT) - 1
+_UNIX_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def commodity_key(name: str) -> str:
+    """Canonical commodity name: first word, with a few Agmarknet aliases."""
+    first = re.split(r"[\s(]", name.strip(), maxsplit=1)[0]
+    for alias, key in _ALIASES.items():
+        if alias in name.lower():
+            return key
+    return first.title()
+
+
+def _header(name: str) -> str:
+    """'Min_x0020_Price' / 'Min Price (Rs./Quintal)' -> 'min_price'"""
+    name = re.sub(r"\(.*?\)", "", name.lower().replace("_x0020_", "_"))
+    return re.sub(r"[^a-z]+", "_", name).strip("_")
+
+
+def _parse_date(value: str):
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _iso(days: np.ndarray) -> list:
+    """Day ordinals -> ISO date strings, vectorised."""
+    return np.datetime_as_string((days - _UNIX_ORDINAL).astype("datetime64[D]")).tolist()
+
+
+def _prices(values: np.ndarray) -> list:
+    return np.round(values.astype(np.float64), 2).tolist()
+
+
+def _range_rows(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(lo[i], hi[i]) for all i, without a Python loop."""
+    lengths = hi - lo
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    seg_start = np.cumsum(lengths) - lengths
+    return np.arange(total, dtype=np.int64) - np.repeat(seg_start - lo, lengths)
+
+
+class MarketPriceStore:
+    """
+    Daily min/max/modal prices (Rs/quintal) per commodity and market.
+    Build with from_columns() or load_csv(); immutable afterwards.
+    """
+
+    def __init__(self, commodities, markets, states, series_commodity, series_market, key, low, high, modal):
+        self.commodities = commodities          # sorted commodity keys
+        self.markets = markets                  # sorted market names
+        self.states = states                    # state per market
+        self.series_commodity = series_commodity  # per series, sorted
+        self.series_market = series_market
+        self.key = key                          # int64 (series << 32 | day ordinal), sorted
+        self.low = low
+        self.high = high
+        self.modal = modal
+        self._modal_sum = np.concatenate(([0.0], np.cumsum(modal, dtype=np.float64)))
+        self._commodity_ids = {c: i for i, c in enumerate(commodities)}
+        self._market_ids = {m.lower(): i for i, m in enumerate(markets)}
+
+    @classmethod
+    def from_columns(cls, commodity, market, state, day, low, high, modal) -> "MarketPriceStore":
+        """
+        Build from one entry per row: commodity keys, market names, states,
+        day ordinals and prices. A later row for the same series and day
+        replaces an earlier one.
+        """
+        commodities, c_code = np.unique(np.asarray(commodity, dtype=str), return_inverse=True)
+        markets, m_first, m_code = np.unique(np.asarray(market, dtype=str), return_index=True, return_inverse=True)
+        states = [str(state[i]) for i in m_first]
+        pairs = c_code.astype(np.int64) * len(markets) + m_code
+        pair_ids, series = np.unique(pairs, return_inverse=True)
+        key = (series.astype(np.int64) << _SHIFT) | np.asarray(day, dtype=np.int64)
+
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        keep = np.append(key[1:] != key[:-1], True)  # last of each duplicate run
+        rows = order[keep]
+        return cls(
+            [str(c) for c in commodities],
+            [str(m) for m in markets],
+            states,
+            (pair_ids // len(markets)).astype(np.int32),
+            (pair_ids % len(markets)).astype(np.int32),
+            key[keep],
+            np.asarray(low, dtype=np.float32)[rows],
+            np.asarray(high, dtype=np.float32)[rows],
+            np.asarray(modal, dtype=np.float32)[rows],
+        )
+
+    @classmethod
+    def load_csv(cls, path):
+        """Read a price CSV; returns None if `path` is unset, missing or unusable."""
+        if not path:
+            return None
+        path = Path(path)
+        if not path.exists():
+            print(f"Market prices file not found: {path}")
+            return None
+
+        columns = {name: [] for name in _COLUMNS}
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = {_header(h): i for i, h in enumerate(next(reader, []))}
+            cols = {field: next((header[a] for a in aliases if a in header), None)
+                    for field, aliases in _COLUMNS.items()}
+            missing = [field for field, col in cols.items() if col is None and field != "state"]
+            if missing:
+                print(f"Market prices file {path} lacks columns: {', '.join(missing)}")
+                return None
+
+            # Commodity names and dates repeat on every row; parse each once
+            keys, dates = {}, {}
+            c_col, m_col, s_col, d_col = cols["commodity"], cols["market"], cols["state"], cols["date"]
+            price_cols = (cols["min_price"], cols["max_price"], cols["modal_price"])
+            width = max(c for c in cols.values() if c is not None) + 1
+            for row in reader:
+                if len(row) < width:
+                    continue
+                day = dates.get(row[d_col])
+                if day is None:
+                    parsed = _parse_date(row[d_col])
+                    day = dates[row[d_col]] = parsed.toordinal() if parsed else -1
+                try:
+                    low, high, modal = (float(row[i]) for i in price_cols)
+                except ValueError:
+                    continue
+                commodity = keys.get(row[c_col])
+                if commodity is None:
+                    commodity = keys[row[c_col]] = commodity_key(row[c_col]) if row[c_col].strip() else ""
+                market = row[m_col].strip()
+                if day < 0 or not commodity or not market:
+                    continue
+                columns["commodity"].append(commodity)
+                columns["market"].append(market)
+                columns["state"].append(row[s_col].strip() if s_col is not None else "")
+                columns["date"].append(day)
+                columns["min_price"].append(low)
+                columns["max_price"].append(high)
+                columns["modal_price"].append(modal)
+
+        if not columns["date"]:
+            print(f"Market prices file {path} has no usable rows")
+            return None
+        return cls.from_columns(*columns.values())
+
+    # --- lookups ---
+
+    def __len__(self):
+        return len(self.key)
+
+    def __contains__(self, commodity: str) -> bool:
+        return commodity in self._commodity_ids
+
+    def series_for(self, commodity: str, markets=None) -> np.ndarray:
+        """Series ids of a commodity, optionally only the named markets."""
+        c = self._commodity_ids.get(commodity)
+        if c is None:
+            return np.zeros(0, dtype=np.int64)
+        lo, hi = np.searchsorted(self.series_commodity, [c, c + 1])
+        sids = np.arange(lo, hi, dtype=np.int64)
+        if markets:
+            wanted = [self._market_ids[m.lower()] for m in markets if m.lower() in self._market_ids]
+            sids = sids[np.isin(self.series_market[sids], wanted)]
+        return sids
+
+    def last_day(self, sids: np.ndarray):
+        """Most recent date across the given series, or None."""
+        if not len(sids):
+            return None
+        ends = np.searchsorted(self.key, (sids + 1) << _SHIFT) - 1
+        return datetime.date.fromordinal(int((self.key[ends] & _DAY_MASK).max()))
+
+    def _bounds(self, sids: np.ndarray, start: datetime.date, end: datetime.date):
+        lo = np.searchsorted(self.key, (sids << _SHIFT) | start.toordinal())
+        hi = np.searchsorted(self.key, (sids << _SHIFT) | end.toordinal(), side="right")
+        return lo, hi
+
+    def _mean_before(self, rows: np.ndarray, days: int) -> np.ndarray:
+        """Mean modal price over the `days` calendar days ending at each row (inclusive), same series."""
+        first = np.searchsorted(self.key, self.key[rows] - (days - 1))
+        return (self._modal_sum[rows + 1] - self._modal_sum[first]) / (rows + 1 - first)
+
+    def _market_fields(self, sids: np.ndarray) -> list:
+        return [(self.markets[m], self.states[m]) for m in self.series_market[sids]]
+
+    # --- queries ---
+
+    def latest(self, sids: np.ndarray, trend_days: int = 7, threshold_pct: float = 2.0) -> list:
+        """
+        Most recent quote per market, newest first. The trend compares it with
+        the mean modal price of the preceding `trend_days` days.
+        """
+        if not len(sids):
+            return []
+        rows = np.searchsorted(self.key, (sids + 1) << _SHIFT) - 1
+        days = self.key[rows] & _DAY_MASK
+        first = np.searchsorted(self.key, self.key[rows] - trend_days)
+        count = rows - first
+        with np.errstate(invalid="ignore", divide="ignore"):
+            baseline = (self._modal_sum[rows] - self._modal_sum[first]) / count
+            change = (self.modal[rows] - baseline) / baseline * 100
+        fields = self._market_fields(sids)
+        out = []
+        for i in np.lexsort((self.series_market[sids], -days)):
+            market, state = fields[i]
+            trend = "up" if change[i] > threshold_pct else "down" if change[i] < -threshold_pct else "stable"
+            out.append({
+                "market": market,
+                "state": state,
+                "min_price": int(round(float(self.low[rows[i]]))),
+                "max_price": int(round(float(self.high[rows[i]]))),
+                "modal_price": int(round(float(self.modal[rows[i]]))),
+                "trend": trend,
+                "date": datetime.date.fromordinal(int(days[i])).strftime("%d-%b"),
+                "as_of": datetime.date.fromordinal(int(days[i])).isoformat(),
+            })
+        return out
+
+    def history(self, sids: np.ndarray, start: datetime.date, end: datetime.date, window: int = 0) -> list:
+        """Daily rows per market in [start, end]; with `window`, a trailing moving average of modal price."""
+        lo, hi = self._bounds(sids, start, end)
+        rows = _range_rows(lo, hi)
+        ma = self._mean_before(rows, window) if window > 1 else None
+        out, pos = [], 0
+        for (market, state), n in zip(self._market_fields(sids), (hi - lo).tolist()):
+            if not n:
+                continue
+            seg = rows[pos:pos + n]
+            entry = {
+                "market": market,
+                "state": state,
+                "dates": _iso(self.key[seg] & _DAY_MASK),
+                "min_price": _prices(self.low[seg]),
+                "max_price": _prices(self.high[seg]),
+                "modal_price": _prices(self.modal[seg]),
+            }
+            if ma is not None:
+                entry[f"modal_ma{window}"] = np.round(ma[pos:pos + n], 1).tolist()
+            out.append(entry)
+            pos += n
+        return out
+
+    def summary(self, sids: np.ndarray, start: datetime.date, end: datetime.date) -> list:
+        """
+        Per-market aggregates over [start, end]: price extremes, mean and
+        first/last modal price, and the least-squares modal trend (Rs/day).
+        """
+        lo, hi = self._bounds(sids, start, end)
+        present = hi > lo
+        sids, lo, hi = sids[present], lo[present], hi[present]
+        if not len(sids):
+            return []
+        rows = _range_rows(lo, hi)
+        seg = np.cumsum(hi - lo) - (hi - lo)
+        n = (hi - lo).astype(np.float64)
+        y = self.modal[rows].astype(np.float64)
+        x = ((self.key[rows] & _DAY_MASK) - start.toordinal()).astype(np.float64)
+        sx, sy = np.add.reduceat(x, seg), np.add.reduceat(y, seg)
+        sxx, sxy = np.add.reduceat(x * x, seg), np.add.reduceat(x * y, seg)
+        denom = n * sxx - sx * sx
+        slope = np.divide(n * sxy - sx * sy, denom, out=np.zeros_like(denom), where=denom > 0)
+        low = np.minimum.reduceat(self.low[rows], seg)
+        high = np.maximum.reduceat(self.high[rows], seg)
+        first, last = self.modal[lo], self.modal[hi - 1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = np.round((last.astype(np.float64) - first) / first * 100, 2)
+        columns = zip(
+            self._market_fields(sids), n.astype(int).tolist(),
+            _iso(self.key[lo] & _DAY_MASK), _iso(self.key[hi - 1] & _DAY_MASK),
+            _prices(low), _prices(high), np.round(sy / n, 1).tolist(), _prices(first), _prices(last),
+            change.tolist(), np.round(slope, 2).tolist(),
+        )
+        return [
+            {
+                "market": market, "state": state, "days": days, "first_date": first_date, "last_date": last_date,
+                "min_price": lo_, "max_price": hi_, "modal_mean": mean, "modal_first": first_, "modal_last": last_,
+                "change_pct": pct if pct == pct else None, "trend_per_day": trend,
+            }
+            for (market, state), days, first_date, last_date, lo_, hi_, mean, first_, last_, pct, trend in columns
+        ]
+
+    def compare(self, sids: np.ndarray, start: datetime.date, end: datetime.date) -> dict:
+        """
+        Cross-market view over [start, end]: markets ranked by mean modal
+        price with their premium over the average market, and the daily
+        low/mean/high of modal prices across markets.
+        """
+        markets = self.summary(sids, start, end)
+        if not markets:
+            return {"markets": [], "average_modal": None, "daily": {"dates": [], "low": [], "mean": [], "high": [], "markets": []}}
+        average = sum(m["modal_mean"] for m in markets) / len(markets)
+        ranked = sorted(markets, key=lambda m: -m["modal_mean"])
+        for rank, m in enumerate(ranked, 1):
+            m["rank"] = rank
+            m["premium_pct"] = round((m["modal_mean"] - average) / average * 100, 2) if average else None
+
+        lo, hi = self._bounds(sids, start, end)
+        rows = _range_rows(lo, hi)
+        days = self.key[rows] & _DAY_MASK
+        order = np.argsort(days, kind="stable")
+        days, prices = days[order], self.modal[rows][order]
+        unique_days, seg, counts = np.unique(days, return_index=True, return_counts=True)
+        return {
+            "markets": ranked,
+            "average_modal": round(average, 1),
+            "daily": {
+                "dates": _iso(unique_days),
+                "low": _prices(np.minimum.reduceat(prices, seg)),
+                "mean": np.round(np.add.reduceat(prices.astype(np.float64), seg) / counts, 1).tolist(),
+                "high": _prices(np.maximum.reduceat(prices, seg)),
+                "markets": counts.tolist(),
+            },
+        }
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self.key),
+            "commodities": len(self.commodities),
+            "markets": len(self.markets),
+            "series": len(self.series_commodity),
+            "bytes": int(sum(a.nbytes for a in (self.key, self.low, self.high, self.modal, self._modal_sum))),
+        }
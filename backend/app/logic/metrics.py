@@ -0,0 +1,155 @@
+"""
+Minimal Prometheus metrics: counters, histograms and scrape-time collectors,
+rendered in the text exposition format for GET /metrics.
+
+Recording is a dict lookup plus a few integer/float additions, with no
+locks: the app runs on one event loop, and a rare lost increment from a
+threadpool endpoint is an acceptable price for staying on in production.
+Gauges that already exist as stats dicts (caches, breakers, ...) are not
+duplicated; collectors read them when /metrics is scraped.
+"""
+import time
+from bisect import bisect_left
+
+NAMESPACE = "vwa"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for values, v in self._values.items():
+            yield f"{self.name}{_labels(self.labels, values)} {_number(v)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = f"{NAMESPACE}_{name}"
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _number(float(bound))
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), values + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """
+        Register `fn()` returning [(name, type, help, {label tuple: value}, label names)],
+        evaluated at scrape time. Usable as a decorator.
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            for name, kind, help, samples, label_names in fn():
+                full = f"{NAMESPACE}_{name}"
+                lines.append(f"# HELP {full} {help}")
+                lines.append(f"# TYPE {full} {kind}")
+                for values, v in samples.items():
+                    lines.append(f"{full}{_labels(label_names, values)} {_number(v)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Incoming HTTP requests, by route template (not raw path) to bound cardinality
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("route", "method"))
+
+# Calls to external services
+upstream_latency = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream call latency.", ("upstream", "op"))
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Failed upstream calls by reason.", ("upstream", "op", "reason"))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_requests.inc(path, method, status[0])
+            http_latency.observe(time.perf_counter() - start, path, method)
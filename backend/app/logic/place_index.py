@@ -0,0 +1,109 @@
+"""
+Autocomplete index over the local village/pincode directory.
+
+Two structures, built once at startup:
+- a sorted key array (name, every word of the name, pincode) searched with
+  bisect, for prefix matches - this is what nearly every keystroke needs;
+- a bigram + trigram inverted index, for the rarer "typed the middle of the
+  name" case (2+ characters, as the old substring scan matched), so infix
+  matches don't need a full scan either.
+"""
+import re
+from array import array
+from bisect import bisect_left
+
+# Ranking tiers, best first
+EXACT, NAME_PREFIX, PINCODE_PREFIX, WORD_PREFIX, INFIX = range(5)
+
+_PREFIX_SCAN_LIMIT = 200  # candidates examined per prefix lookup
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+class PlaceIndex:
+    """
+    Ranked search over location dicts ({"city", "pincode", "lat", "lng"}).
+    Earlier locations win ties, so the curated city list should come first.
+    """
+
+    def __init__(self, locations):
+        self.places = list(locations)
+        self._names = [normalize(p["city"]) for p in self.places]
+
+        # Prefix index: (key, tier, place id) sorted by key
+        entries = []
+        for i, (name, place) in enumerate(zip(self._names, self.places)):
+            entries.append((name, NAME_PREFIX, i))
+            entries.append((place["pincode"], PINCODE_PREFIX, i))
+            words = name.split(" ")
+            for w in range(1, len(words)):
+                entries.append((" ".join(words[w:]), WORD_PREFIX, i))
+        entries.sort()
+        self._keys = [e[0] for e in entries]
+        self._tiers = array("b", [e[1] for e in entries])
+        self._ids = array("i", [e[2] for e in entries])
+
+        # Bigram and trigram index for infix matches: gram -> place ids
+        grams = {}
+        for i, (name, place) in enumerate(zip(self._names, self.places)):
+            text = f"{name} {place['pincode']}"
+            for gram in {text[j:j + n] for n in (2, 3) for j in range(len(text) - n + 1)}:
+                grams.setdefault(gram, array("i")).append(i)
+        self._grams = grams
+
+    def __len__(self):
+        return len(self.places)
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Best matching places for `query`, ranked by match quality."""
+        q = normalize(query)
+        if not q:
+            return []
+
+        best = {}  # place id -> tier
+        start = bisect_left(self._keys, q)
+        for k in range(start, min(start + _PREFIX_SCAN_LIMIT, len(self._keys))):
+            key = self._keys[k]
+            if not key.startswith(q):
+                break
+            i = self._ids[k]
+            tier = EXACT if key == q and self._tiers[k] != WORD_PREFIX else self._tiers[k]
+            if tier < best.get(i, INFIX + 1):
+                best[i] = tier
+
+        if len(best) < limit and len(q) >= 2:
+            self._infix(q, best, limit)
+
+        ranked = sorted(best, key=lambda i: self._rank(i, best[i]))
+        return [self.places[i] for i in ranked[:limit]]
+
+    def exact(self, query: str):
+        """The place whose name or pincode is exactly `query` and has coordinates, else None."""
+        q = normalize(query)
+        for k in range(bisect_left(self._keys, q), len(self._keys)):
+            if self._keys[k] != q:
+                break
+            place = self.places[self._ids[k]]
+            if self._tiers[k] != WORD_PREFIX and place.get("lat") is not None and place.get("lng") is not None:
+                return place
+        return None
+
+    def _rank(self, i: int, tier: int):
+        # Pincode matches read best in pincode order; names shortest first
+        pincode = self.places[i]["pincode"] if tier == PINCODE_PREFIX else ""
+        return (tier, pincode, len(self._names[i]), i)
+
+    def _infix(self, q: str, best: dict, limit: int):
+        n = min(len(q), 3)
+        postings = [self._grams.get(q[j:j + n]) for j in range(len(q) - n + 1)]
+        if not all(postings):
+            return
+        for i in min(postings, key=len):
+            if i in best:
+                continue
+            if q in self._names[i] or q in self.places[i]["pincode"]:
+                best[i] = INFIX
+                if len(best) >= _PREFIX_SCAN_LIMIT:
+                    break
@@ -0,0 +1,139 @@
+"""
+Incremental parsing of uploaded plot lists (CSV or NDJSON).
+
+Rows are produced one at a time from the request body's byte chunks, so an
+upload of any size is screened with constant memory and the first result can
+go out before the last row has arrived.
+"""
+import csv
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for a body iterator that is itself reading the request
+    body. Starlette's disconnect listener would compete with it for receive()
+    messages and swallow upload chunks; request.stream() already raises
+    ClientDisconnect if the client goes away, so the listener is skipped.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+# A quoted CSV field may span lines; an unterminated quote would otherwise
+# swallow the rest of the upload into one record
+MAX_RECORD_CHARS = 64 * 1024
+
+
+async def iter_lines(chunks):
+    """
+    Split an async stream of byte chunks into (text, valid) lines. Bytes that
+    aren't UTF-8 are replaced and the line flagged invalid, so the caller can
+    reject that row alone instead of the whole upload.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+def _decode(line: bytes):
+    try:
+        return line.decode("utf-8-sig").rstrip("\r"), True
+    except UnicodeDecodeError:
+        return line.decode("utf-8-sig", errors="replace").rstrip("\r"), False
+
+
+def _parse_record(parts):
+    """Values of the CSV record in `parts`, or None if a quoted field is still open."""
+    try:
+        return next(csv.reader(parts, strict=True))
+    except csv.Error as e:
+        if "unexpected end of data" in str(e):
+            return None
+        return next(csv.reader(parts))  # lenient, as for any other stray quote
+
+
+async def iter_csv_records(lines):
+    """
+    Group (text, valid) lines into CSV records, joining lines while a quoted
+    field is open. Yields a list of values, or an error message string for a
+    record that can't be read.
+    """
+    parts, size, valid = [], 0, True
+    async for line, ok in lines:
+        if not parts and ok and not line.strip():
+            continue
+        parts.append(line + "\n")
+        size += len(line)
+        valid = valid and ok
+        values = _parse_record(parts)
+        if values is None and size <= MAX_RECORD_CHARS:
+            continue  # quoted field carries on into the next line
+        if not valid:
+            yield "Row is not valid UTF-8"
+        elif values is None:
+            yield f"Row longer than {MAX_RECORD_CHARS} characters (unterminated quote?)"
+        else:
+            yield values
+        parts, size, valid = [], 0, True
+    if parts:
+        yield "Row is not valid UTF-8" if not valid else "Unterminated quoted field at end of upload"
+
+
+async def iter_rows(chunks, content_type: str = ""):
+    """
+    Yield one dict per non-blank row. NDJSON if the content type says so (or
+    the first line is a JSON object), otherwise CSV with a header line; CSV
+    fields may be quoted and span lines.
+    A row that can't be parsed is yielded as {"_error": message}.
+    """
+    lines = iter_lines(chunks)
+    is_json = "json" in (content_type or "")
+    if not is_json:
+        async for line, ok in lines:
+            if line.strip() or not ok:
+                is_json = ok and line.lstrip().startswith("{")
+                lines = _prepend((line, ok), lines)
+                break
+    if is_json:
+        async for line, ok in lines:
+            if not ok:
+                yield {"_error": "Row is not valid UTF-8"}
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield {"_error": f"Invalid JSON: {e}"}
+                continue
+            yield row if isinstance(row, dict) else {"_error": "Expected a JSON object"}
+        return
+
+    header = None
+    async for record in iter_csv_records(lines):
+        if header is None:
+            if isinstance(record, str):
+                yield {"_error": f"Bad header: {record}"}
+                return
+            header = [h.strip().lower().replace(" ", "_") for h in record]
+        elif isinstance(record, str):
+            yield {"_error": record}
+        else:
+            yield {k: (v.strip() or None) for k, v in zip(header, record)}
+
+
+async def _prepend(first, rest):
+    yield first
+    async for item in rest:
+        yield item
@@ -0,0 +1,127 @@
+"""
+Background refresh of upstream data for popular grid cells.
+
+Live requests record which weather grid cells they touch; a background task
+periodically refreshes the cache entries of the hottest cells (plus any
+pinned ones, e.g. saved user locations) shortly before they expire, so the
+first farmer of the morning in a busy village still gets a warm cache.
+Refreshes run one at a time behind their own token bucket and pause while
+live traffic has upstream calls in flight.
+"""
+import asyncio
+import heapq
+import math
+import time
+
+from app.logic.ratelimit import TokenBucket
+
+
+class HotCells:
+    """Request counts per grid cell, decaying with a half-life so yesterday's
+    rush fades out."""
+
+    def __init__(self, half_life: float = 6 * 3600, max_cells: int = 5000):
+        self.decay = math.log(2) / half_life
+        self.max_cells = max_cells
+        self._scores = {}  # cell -> (score, last update)
+
+    def __len__(self):
+        return len(self._scores)
+
+    def touch(self, cell):
+        now = time.monotonic()
+        score, last = self._scores.get(cell, (0.0, now))
+        self._scores[cell] = (score * math.exp(-self.decay * (now - last)) + 1.0, now)
+        if len(self._scores) > 2 * self.max_cells:
+            self._prune(now)
+
+    def _current(self, now):
+        return {cell: s * math.exp(-self.decay * (now - t)) for cell, (s, t) in self._scores.items()}
+
+    def _prune(self, now):
+        keep = heapq.nlargest(self.max_cells, self._current(now).items(), key=lambda kv: kv[1])
+        self._scores = {cell: (score, now) for cell, score in keep}
+
+    def top(self, n: int) -> list:
+        current = self._current(time.monotonic())
+        return heapq.nlargest(n, current, key=current.get)
+
+
+class PrefetchScheduler:
+    """
+    `jobs` is a list of (name, key_fn, refresh) where key_fn(cell) gives the
+    cache key to watch and `await refresh(cell)` re-fetches it into the cache.
+    `pinned` is an optional async callable returning extra cells to keep warm.
+    `busy()` returning True pauses the scheduler in favour of live traffic.
+    """
+
+    def __init__(self, cache, hot: HotCells, jobs, *, interval: float, lead_time: float,
+                 top_n: int, rate_per_s: float, pinned=None, busy=None):
+        self.cache = cache
+        self.hot = hot
+        self.jobs = jobs
+        self.interval = interval
+        self.lead_time = lead_time
+        self.top_n = top_n
+        self.limiter = TokenBucket(rate_per_s)
+        self.pinned = pinned
+        self.busy = busy or (lambda: False)
+        self._task = None
+        self.refreshed = 0
+        self.failed = 0
+        self.deferred = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Prefetch Error: {e}")
+
+    async def _cells(self) -> list:
+        cells = self.hot.top(self.top_n)
+        if self.pinned is not None:
+            seen = set(cells)
+            cells += [c for c in await self.pinned() if c not in seen]
+        return cells
+
+    async def tick(self):
+        """One pass: refresh every watched entry that is missing or about to expire."""
+        for cell in await self._cells():
+            for name, key_fn, refresh in self.jobs:
+                remaining = self.cache.expires_in(key_fn(cell))
+                if remaining is not None and remaining > self.lead_time:
+                    continue
+                while self.busy():
+                    self.deferred += 1
+                    await asyncio.sleep(1.0)
+                await self.limiter.acquire(max_wait=math.inf)
+                try:
+                    await refresh(cell)
+                    self.refreshed += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Prefetch {name} {cell} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "tracked_cells": len(self.hot),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "deferred_for_live_traffic": self.deferred,
+        }
@@ -0,0 +1,125 @@
+"""
+Local archive of daily precipitation per weather grid cell.
+
+Past days never change, so each cell keeps one flat float32 file indexed by
+day number since a fixed epoch (NaN = not fetched yet). Files are read
+through np.memmap, so a 30-day window is a zero-copy slice of the page cache
+and only days still missing locally need to go to Open-Meteo. The same files
+hold multi-year history for climatology.
+
+Days are only ever filled in, never overwritten, so concurrent writers (e.g.
+several gunicorn workers) can at worst write the same value twice.
+"""
+import datetime
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+_DTYPE = np.float32
+_ITEM = np.dtype(_DTYPE).itemsize
+
+
+class RainArchive:
+    def __init__(self, root, epoch: datetime.date, max_open: int = 1024):
+        self.root = Path(root)
+        self.epoch = epoch
+        self.max_open = max_open  # each memmap holds a file descriptor
+        self._maps = OrderedDict()  # cell -> read-only memmap of the cell's file
+        self.reads = 0
+        self.writes = 0
+
+    def _path(self, cell) -> Path:
+        return self.root / f"{cell[0]:+.4f}_{cell[1]:+.4f}.f32"
+
+    def _day(self, day: datetime.date) -> int:
+        return (day - self.epoch).days
+
+    def _map(self, cell, min_len: int):
+        """Memmap of the cell's file, remapped if it has grown past our view."""
+        m = self._maps.get(cell)
+        if m is not None and len(m) >= min_len:
+            self._maps.move_to_end(cell)
+            return m
+        try:
+            if self._path(cell).stat().st_size < _ITEM:
+                return m
+        except FileNotFoundError:
+            return m
+        m = self._maps[cell] = np.memmap(self._path(cell), dtype=_DTYPE, mode="r")
+        self._maps.move_to_end(cell)
+        if len(self._maps) > self.max_open:
+            self._maps.popitem(last=False)
+        return m
+
+    def read(self, cell, start: datetime.date, end: datetime.date) -> np.ndarray:
+        """Daily rain for start..end inclusive; NaN where not archived."""
+        self.reads += 1
+        i0, i1 = self._day(start), self._day(end) + 1
+        m = self._map(cell, i1)
+        if m is not None and 0 <= i0 and i1 <= len(m):
+            return m[i0:i1]  # zero-copy view
+        out = np.full(i1 - i0, np.nan, dtype=_DTYPE)
+        if m is not None:
+            lo, hi = max(i0, 0), min(i1, len(m))
+            if lo < hi:
+                out[lo - i0:hi - i0] = m[lo:hi]
+        return out
+
+    def first_missing(self, cell, start: datetime.date, end: datetime.date):
+        """Earliest day in start..end not yet archived, or None."""
+        gaps = np.flatnonzero(np.isnan(self.read(cell, start, end)))
+        return start + datetime.timedelta(days=int(gaps[0])) if gaps.size else None
+
+    def write(self, cell, start: datetime.date, values):
+        """
+        Store daily values from `start`. Days already archived keep their value;
+        None/NaN entries stay missing so they are fetched again later.
+        """
+        values = np.array([np.nan if v is None else v for v in values], dtype=_DTYPE)
+        i0 = self._day(start)
+        if i0 < 0:
+            values, i0 = values[-i0:], 0
+        if not values.size:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(cell)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+b") as f:
+            size = os.fstat(fd).st_size // _ITEM
+            # Keep existing values where present
+            overlap = max(0, min(size, i0 + len(values)) - i0)
+            if overlap:
+                f.seek(i0 * _ITEM)
+                existing = np.frombuffer(f.read(overlap * _ITEM), dtype=_DTYPE)
+                values[:overlap] = np.where(np.isnan(existing), values[:overlap], existing)
+            if i0 > size:
+                # Gap between the end of the file and the new days
+                f.seek(size * _ITEM)
+                f.write(np.full(i0 - size, np.nan, dtype=_DTYPE).tobytes())
+            f.seek(i0 * _ITEM)
+            f.write(values.tobytes())
+        self._maps.pop(cell, None)
+        self.writes += 1
+
+    def monthly_totals(self, cell, first_year: int, last_year: int) -> np.ndarray:
+        """(years x 12) monthly rain totals; NaN for months with missing days."""
+        first = datetime.date(first_year, 1, 1)
+        daily = self.read(cell, first, datetime.date(last_year, 12, 31)).astype(np.float64)
+        months = np.arange(f"{first_year}-01", f"{last_year + 1}-01", dtype="datetime64[M]")
+        starts = (months.astype("datetime64[D]") - np.datetime64(first)).astype(np.intp)
+        return np.add.reduceat(daily, starts).reshape(-1, 12)
+
+    def climatology(self, cell, first_year: int, last_year: int, levels=(20, 50, 80), min_years: int = 5):
+        """
+        (12 x len(levels)) monthly rainfall percentiles over complete years,
+        or None if any month has fewer than `min_years` complete years.
+        """
+        totals = self.monthly_totals(cell, first_year, last_year)
+        if (np.sum(~np.isnan(totals), axis=0) < min_years).any():
+            return None
+        return np.nanpercentile(totals, levels, axis=0).T
+
+    def stats(self) -> dict:
+        return {"mapped_cells": len(self._maps), "reads": self.reads, "writes": self.writes}
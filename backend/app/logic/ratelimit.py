@@ -0,0 +1,47 @@
+"""
+Process-wide rate limiting for upstreams with a hard request budget
+(Nominatim's usage policy allows at most 1 request per second).
+"""
+import asyncio
+import time
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller would have to queue longer than its max wait."""
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Implemented as a virtual schedule (GCRA): each caller reserves the next
+    free slot and sleeps until it, so bursts are queued FIFO and smoothed out
+    instead of being rejected. Callers whose slot is more than `max_wait`
+    seconds away get RateLimitExceeded instead of waiting.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.interval = 1.0 / rate
+        self.capacity = capacity
+        self._next_free = 0.0  # theoretical time the bucket is next empty
+        self.waits = 0
+        self.rejections = 0
+
+    async def acquire(self, max_wait: float = 5.0):
+        now = time.monotonic()
+        tat = max(self._next_free, now)
+        wait = tat - now - (self.capacity - 1) * self.interval
+        if wait > max_wait:
+            self.rejections += 1
+            raise RateLimitExceeded(f"would wait {wait:.1f}s (max {max_wait:.1f}s)")
+        self._next_free = tat + self.interval
+        if wait > 0:
+            self.waits += 1
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_s": round(1.0 / self.interval, 3),
+            "queued": self.waits,
+            "rejected": self.rejections,
+        }
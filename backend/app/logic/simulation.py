@@ -0,0 +1,97 @@
+"""
+Monte Carlo water-balance simulation.
+
+Samples thousands of monthly rainfall trajectories, applies crop usage scaled
+by a neighbour-extraction factor, and tracks the balance month by month. All
+trajectories move together as one NumPy array, so 10k x 12 months costs a
+few milliseconds. Arrays are laid out (months x trajectories) so each month
+is one contiguous row.
+"""
+import numpy as np
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Historical monthly rainfall (mm) as [20th, 50th, 80th] percentiles, Jan..Dec
+RAINFALL_QUANTILES = np.array([
+    [0, 0, 5], [0, 0, 5], [0, 5, 10],       # Jan-Mar
+    [0, 10, 20], [10, 25, 40],              # Apr-May
+    [80, 150, 220],                         # Jun (Monsoon Start)
+    [150, 250, 350], [120, 200, 300],       # Jul-Aug (Peak)
+    [50, 120, 180],                         # Sep (Retreating)
+    [10, 40, 80], [0, 10, 30], [0, 0, 10],  # Oct-Dec
+], dtype=float)
+QUANTILE_LEVELS = (0.2, 0.5, 0.8)
+
+# Neighbour extraction: efficient (0.9) to heavy pumping nearby (1.2)
+NEIGHBOUR_FACTOR_RANGE = (0.9, 1.2)
+
+
+def _inverse_cdf_knots(quantiles: np.ndarray, levels=QUANTILE_LEVELS):
+    """
+    Piecewise-linear inverse CDF through the known percentiles, extended to
+    0 and 1 by continuing the outer slopes (clamped at 0 mm).
+    Returns (x knots, y knots per month).
+    """
+    lo, mid, hi = quantiles[:, 0], quantiles[:, 1], quantiles[:, 2]
+    q0 = np.maximum(0.0, lo - (mid - lo) * levels[0] / (levels[1] - levels[0]))
+    q1 = hi + (hi - mid) * (1 - levels[2]) / (levels[2] - levels[1])
+    x = np.array([0.0, *levels, 1.0])
+    y = np.column_stack([q0, lo, mid, hi, q1])
+    return x, y
+
+
+_KNOTS_X, _KNOTS_Y = _inverse_cdf_knots(RAINFALL_QUANTILES)
+
+
+def sample_rainfall(rng, month_idx: np.ndarray, n: int, knots=None) -> np.ndarray:
+    """(len(month_idx) x n) rainfall draws for the given calendar months."""
+    knots_x, knots_y = knots or (_KNOTS_X, _KNOTS_Y)
+    u = rng.random((len(month_idx), n))
+    # One C-level interp per month; months are few, trajectories many
+    return np.stack([np.interp(u[m], knots_x, knots_y[i]) for m, i in enumerate(month_idx)])
+
+
+def _percentiles(sorted_rows: np.ndarray, levels) -> np.ndarray:
+    """Linear-interpolated percentiles of rows that are already sorted."""
+    pos = np.asarray(levels, dtype=float) / 100 * (sorted_rows.shape[1] - 1)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, sorted_rows.shape[1] - 1)
+    w = pos - lo
+    return sorted_rows[:, lo] * (1 - w) + sorted_rows[:, hi] * w  # months x levels
+
+
+def simulate(start_balance: float, monthly_usage: float, month_start: int, months: int = 6,
+             trajectories: int = 10000, percentiles=(10, 50, 90), seed=None,
+             rain_quantiles=None) -> dict:
+    """
+    Run the simulation. Returns per-month percentiles of the balance, the
+    per-month probability of being dry, and the probability of running dry
+    at any point in the horizon. `rain_quantiles` (12 x 3, same layout as
+    RAINFALL_QUANTILES) replaces the default table, e.g. with local climatology.
+    """
+    rng = np.random.default_rng(seed)
+    month_idx = (month_start - 1 + np.arange(months)) % 12
+
+    knots = _inverse_cdf_knots(np.asarray(rain_quantiles, dtype=float)) if rain_quantiles is not None else None
+    rain = sample_rainfall(rng, month_idx, trajectories, knots)
+    # Neighbour pumping is a property of the village over the season
+    factor = rng.uniform(*NEIGHBOUR_FACTOR_RANGE, size=trajectories)
+    delta = rain - monthly_usage * factor
+
+    # Balance can't go below an empty aquifer; rain refills from zero
+    balance = np.empty_like(delta)
+    level = np.full(trajectories, float(start_balance))
+    for m in range(months):
+        level = np.maximum(0.0, level + delta[m])
+        balance[m] = level
+
+    dry = balance <= 0
+    levels = sorted(set(percentiles) | {20, 50, 80})
+    balance.sort(axis=1)
+    values = _percentiles(balance, levels)
+    return {
+        "months": [MONTHS[i] for i in month_idx],
+        "percentiles": {p: values[:, k] for k, p in enumerate(levels)},
+        "prob_dry": dry.mean(axis=1),
+        "prob_dry_any": float(dry.any(axis=0).mean()),
+    }
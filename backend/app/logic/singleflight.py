@@ -0,0 +1,65 @@
+"""
+Single-flight request coalescing.
+
+When many callers ask for the same thing at once (an SMS campaign sends a
+whole village to the same pincode), only the first one hits the upstream;
+the rest await the same in-flight future.
+"""
+import asyncio
+from collections import defaultdict
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async calls by key.
+    Keys are tuples whose first element names the call type ("forecast",
+    "geocode", ...) so coalescing can be reported per upstream helper.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = defaultdict(int)
+        self.leaders = defaultdict(int)
+
+    def __len__(self):
+        """Number of calls currently in flight."""
+        return len(self._inflight)
+
+    async def do(self, key, fn):
+        """Run `fn()` for `key`, or join the call already in flight."""
+        self.calls[key[0]] += 1
+        fut = self._inflight.get(key) or self._start(key, fn)
+        # shield: a cancelled caller must not cancel the fetch others share
+        return await asyncio.shield(fut)
+
+    def spawn(self, key, fn):
+        """Start `fn()` for `key` in the background unless it is already in flight."""
+        if key not in self._inflight:
+            self.calls[key[0]] += 1
+            self._start(key, fn)
+
+    def _start(self, key, fn):
+        self.leaders[key[0]] += 1
+        fut = asyncio.ensure_future(fn())
+        self._inflight[key] = fut
+        fut.add_done_callback(lambda f: self._forget(key, f))
+        return fut
+
+    def _forget(self, key, fut):
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if not fut.cancelled():
+            fut.exception()  # mark retrieved; callers already received it
+
+    def stats(self) -> dict:
+        out = {}
+        for kind, calls in self.calls.items():
+            leaders = self.leaders[kind]
+            out[kind] = {
+                "calls": calls,
+                "upstream_calls": leaders,
+                "coalesced": calls - leaders,
+                "coalescing_ratio": round((calls - leaders) / calls, 3) if calls else 0.0,
+            }
+        out["in_flight"] = len(self._inflight)
+        return out
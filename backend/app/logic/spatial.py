@@ -0,0 +1,53 @@
+"""
+Grid-bucket spatial index over known places, for resolving GPS points to a
+village/pincode locally instead of asking Nominatim.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    Buckets locations into `cell_deg` x `cell_deg` cells. A radius query only
+    looks at the handful of cells the search circle can touch, so lookups stay
+    in the microseconds even with the full national pincode directory loaded.
+    """
+
+    def __init__(self, locations, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self.size = 0
+        for loc in locations:
+            if loc.get("lat") is None or loc.get("lng") is None:
+                continue
+            self._cells.setdefault(self._cell(loc["lat"], loc["lng"]), []).append(loc)
+            self.size += 1
+
+    def _cell(self, lat: float, lng: float):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def nearest(self, lat: float, lng: float, max_km: float):
+        """Closest location within `max_km`, as (location, distance_km), or None."""
+        d_lat = max_km / KM_PER_DEG_LAT
+        d_lng = max_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        r0, c0 = self._cell(lat - d_lat, lng - d_lng)
+        r1, c1 = self._cell(lat + d_lat, lng + d_lng)
+
+        best, best_km = None, max_km
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                for loc in self._cells.get((r, c), ()):
+                    km = haversine_km(lat, lng, loc["lat"], loc["lng"])
+                    if km <= best_km:
+                        best, best_km = loc, km
+        return (best, best_km) if best is not None else None
@@ -0,0 +1,64 @@
+"""
+Pre-serialised JSON responses for data that only changes with a catalogue
+version (crop and soil lists).
+
+The body is encoded (and gzipped) once per version and served with a strong
+ETag, so a repeat request costs a header comparison, and a client that
+already has the current version gets an empty 304.
+"""
+import gzip
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed (or covered by "*")
+    with a non-zero q-value. "gzip;q=0" explicitly refuses it.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        coding, *params = (p.strip() for p in item.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding] = q
+    q = weights.get("gzip", weights.get("x-gzip", weights.get("*", 0.0)))
+    return q > 0
+
+
+class PrecomputedJSON:
+    def __init__(self, payload, max_age: int = 3600):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        # Each encoding is its own representation, so its own strong ETag
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.headers = {
+            "Cache-Control": f"public, max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+
+    def _not_modified(self, if_none_match: str) -> bool:
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags or self.gzip_etag in tags
+
+    def respond(self, request: Request) -> Response:
+        use_gzip = accepts_gzip(request.headers.get("accept-encoding", ""))
+        headers = {**self.headers, "ETag": self.gzip_etag if use_gzip else self.etag}
+        if self._not_modified(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
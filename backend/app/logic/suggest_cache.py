@@ -0,0 +1,69 @@
+"""
+Prefix-aware cache for remote (Nominatim) autocomplete results.
+
+This cache does not by itself cut the number of Nominatim calls while a
+user types: "Sata", "Satar", "Satara" are still separate upstream queries
+unless already cached. Keystroke volume is handled elsewhere (the frontend
+debounces, and short queries never go upstream, see
+SUGGESTIONS_REMOTE_MIN_CHARS); this only avoids repeating identical queries.
+
+Nominatim matches whole words, so a longer query's results are in general
+not a subset of a shorter prefix's. The one reuse attempted is a query whose
+words all appear, whole, in the name of a result cached for a prefix that
+was not truncated (Nominatim returned fewer than the limit). That subset is
+a best-effort answer, not necessarily everything Nominatim would return for
+the longer query.
+"""
+from app.logic.cache import TTLCache
+from app.logic.place_index import normalize
+
+
+def _matches(query_tokens, suggestion) -> bool:
+    """Every query token is a whole word of the suggestion's name."""
+    words = set(normalize(suggestion["name"]).split(" "))
+    return all(t in words for t in query_tokens)
+
+
+class PrefixSuggestionCache:
+    """
+    Keys are normalised query strings; values are suggestion lists.
+    A query is derived from a cached prefix only when it names one of that
+    prefix's results word for word; otherwise (including when nothing
+    matches) the caller goes upstream.
+    """
+
+    def __init__(self, limit: int, ttl: float, max_entries: int = 20000, min_prefix: int = 2):
+        self.limit = limit
+        self.ttl = ttl
+        self.min_prefix = min_prefix
+        self.cache = TTLCache("suggestions", max_entries=max_entries, max_bytes=32 * 1024 * 1024)
+        self.derived = 0
+
+    def get(self, query: str):
+        """Cached or derived suggestions for a normalised query, else None."""
+        hit = self.cache.get(query)
+        if hit is not None:
+            return hit
+
+        tokens = query.split(" ")
+        for n in range(len(query) - 1, self.min_prefix - 1, -1):
+            parent = self.cache.peek(query[:n])
+            if parent is None:
+                continue
+            if len(parent) >= self.limit:
+                return None  # truncated: longer query may surface other places
+            subset = [s for s in parent if _matches(tokens, s)]
+            if not subset:
+                return None
+            self.derived += 1
+            self.cache.set(query, subset, self.ttl)
+            return subset
+        return None
+
+    def put(self, query: str, suggestions: list):
+        self.cache.set(query, suggestions, self.ttl)
+
+    def stats(self) -> dict:
+        out = self.cache.stats()
+        out["derived_from_prefix"] = self.derived
+        return out
@@ -0,0 +1,177 @@
+"""
+Per-request spans: where did the time go?
+
+`TracingMiddleware` gives each HTTP request a Trace in a context variable;
+`span(name)` blocks and `@traced(name)` coroutines append (name, offset,
+duration) to it. Tasks spawned during the request (fan-out branches,
+single-flight leaders) inherit the context, so their spans land in the same
+trace. Outside a request (background prefetch, scripts) spans do nothing.
+
+Span totals per name go out in a Server-Timing header; a sampled fraction of
+requests, and any slower than a threshold, are written in full to a rotating
+JSON-lines file. Unsampled requests cost two perf_counter() calls and a list
+append per span. A trace keeps at most MAX_SPANS individual spans (later
+ones only add to the per-name totals), and streaming routes, whose headers
+go out before any work is done, are not traced at all.
+"""
+import functools
+import json
+import logging
+import logging.handlers
+import random
+import time
+import uuid
+from contextvars import ContextVar
+
+_current = ContextVar("trace", default=None)
+
+MAX_SPANS = 200
+
+
+class Trace:
+    __slots__ = ("start", "wall_start", "spans", "totals", "dropped")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.wall_start = time.time()
+        self.spans = []  # (name, start offset s, duration s, error type or None)
+        self.totals = {}  # name -> total duration s, over every span
+        self.dropped = 0
+
+    def add(self, name: str, start: float, duration: float, error):
+        self.totals[name] = self.totals.get(name, 0.0) + duration
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((name, start, duration, error))
+        else:
+            self.dropped += 1
+
+    def server_timing(self) -> str:
+        """Header value: total time per span name, in ms, plus the whole request."""
+        totals = {**self.totals, "total": time.perf_counter() - self.start}
+        return ", ".join(f"{name};dur={d * 1000:.1f}" for name, d in totals.items())
+
+    def record(self, **fields) -> dict:
+        return {
+            "trace_id": uuid.uuid4().hex,
+            "start": round(self.wall_start, 3),
+            **fields,
+            **({"dropped_spans": self.dropped} if self.dropped else {}),
+            "spans": [
+                {"name": name, "start_ms": round(start * 1000, 2), "duration_ms": round(duration * 1000, 2),
+                 **({"error": error} if error else {})}
+                for name, start, duration, error in self.spans
+            ],
+        }
+
+
+class span:
+    """`with span("stage"):` times a block into the current request's trace."""
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.trace is not None:
+            end = time.perf_counter()
+            self.trace.add(
+                self.name, self.start - self.trace.start, end - self.start,
+                exc_type.__name__ if exc_type else None,
+            )
+
+
+def traced(name: str):
+    """Decorator: time every call of an async function as span `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await fn(*args, **kwargs)
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TraceWriter:
+    """Append trace records to a size-rotated JSON-lines file, opened on first use."""
+
+    def __init__(self, path, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._logger = None
+        self.written = 0
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger(f"traces.{self.path}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        return logger
+
+    def write(self, record: dict):
+        if self._logger is None:
+            self._logger = self._open()
+        self._logger.info(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self.written += 1
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: one Trace per HTTP request, Server-Timing header, sampled
+    export. Paths in `untraced` (streaming responses) are passed straight
+    through.
+    """
+
+    def __init__(self, app, writer: TraceWriter, sample_rate: float = 0.0, slow_ms: float = 0.0,
+                 server_timing: bool = True, untraced=()):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.server_timing = server_timing
+        self.untraced = frozenset(untraced)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.untraced:
+            return await self.app(scope, receive, send)
+        trace = Trace()
+        token = _current.set(trace)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            duration_ms = (time.perf_counter() - trace.start) * 1000
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+            if sampled or (self.slow_ms and duration_ms >= self.slow_ms):
+                try:
+                    self.writer.write(trace.record(
+                        method=scope["method"],
+                        route=getattr(scope.get("route"), "path", scope["path"]),
+                        status=status[0],
+                        duration_ms=round(duration_ms, 2),
+                    ))
+                except Exception as e:
+                    print(f"Trace write Error: {e}")
@@ -0,0 +1,134 @@
+"""
+Shared HTTP clients for the external services we depend on.
+
+One pooled `httpx.AsyncClient` per upstream, created and closed by the app
+lifespan, so repeated calls reuse warm TCP/TLS connections instead of doing
+a fresh handshake every time. Calls made through `get()` also go through the
+upstream's circuit breaker and are timed into the /metrics histograms and
+the request's trace.
+"""
+import time
+
+import httpx
+
+from app import config
+from app.logic import metrics
+from app.logic.breaker import CircuitBreaker, CircuitOpen
+from app.logic.tracing import span
+
+NOMINATIM = "nominatim"
+OPEN_METEO = "open_meteo"
+SUPABASE = "supabase"
+
+# User-Agent is required by Nominatim
+_DEFAULT_HEADERS = {
+    NOMINATIM: {"User-Agent": "WaterAccountantApp/1.0"},
+    OPEN_METEO: {},
+    SUPABASE: {
+        "apikey": config.SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {config.SUPABASE_SERVICE_KEY}",
+    } if config.SUPABASE_SERVICE_KEY else {},
+}
+
+_clients = {}
+
+breakers = {
+    name: CircuitBreaker(name, config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_TIMEOUT)
+    for name in _DEFAULT_HEADERS
+}
+
+
+def _http2_available() -> bool:
+    if not config.UPSTREAM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=config.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=config.UPSTREAM_MAX_KEEPALIVE,
+        keepalive_expiry=config.UPSTREAM_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        config.UPSTREAM_READ_TIMEOUT,
+        connect=config.UPSTREAM_CONNECT_TIMEOUT,
+        pool=config.UPSTREAM_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(
+        headers=_DEFAULT_HEADERS[name],
+        limits=limits,
+        timeout=timeout,
+        http2=_http2_available(),
+    )
+
+
+async def startup():
+    """Open one pooled client per upstream. Called from the app lifespan."""
+    for name in _DEFAULT_HEADERS:
+        if name not in _clients:
+            _clients[name] = _build_client(name)
+
+
+async def shutdown():
+    """Close all pooled clients and their connections."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def client(name: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for an upstream.
+    Created lazily if the lifespan hasn't run (e.g. helper scripts).
+    """
+    c = _clients.get(name)
+    if c is None:
+        c = _clients[name] = _build_client(name)
+    return c
+
+
+async def get(name: str, url: str, op: str = "other", **kwargs) -> httpx.Response:
+    """
+    GET through the upstream's shared client and circuit breaker.
+    Raises CircuitOpen without touching the network while the circuit is
+    open; transport errors, 5xx and 429 responses count as failures.
+    `op` labels the call in metrics (e.g. "reverse", "forecast").
+    """
+    breaker = breakers[name]
+    try:
+        breaker.before_call()
+    except CircuitOpen:
+        metrics.upstream_errors.inc(name, op, "circuit_open")
+        raise
+    start = time.perf_counter()
+    try:
+        with span(f"{name}.{op}"):
+            resp = await client(name).get(url, **kwargs)
+            if resp.status_code >= 500 or resp.status_code == 429:
+                resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        breaker.record_failure()
+        metrics.upstream_errors.inc(name, op, f"http_{e.response.status_code}")
+        raise
+    except httpx.HTTPError as e:
+        breaker.record_failure()
+        reason = "timeout" if isinstance(e, httpx.TimeoutException) else "transport"
+        metrics.upstream_errors.inc(name, op, reason)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    finally:
+        metrics.upstream_latency.observe(time.perf_counter() - start, name, op)
+    breaker.record_success()
+    return resp
+
+
+def stats() -> dict:
+    return {name: b.stats() for name, b in breakers.items()}
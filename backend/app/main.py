@@ -1,11 +1,56 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
-import httpx
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
 import datetime
+import hmac
+import time
+
+import httpx
+import numpy as np
+
+from app import config
+from app.logic import upstream
+from app.logic.batch_recommend import crop_matrix
+from app.logic.breaker import CircuitOpen
+from app.logic.cache import TTLCache, grid_cell, mark_stale, track_stale
+from app.logic.catalogue import CatalogueError, CatalogueStore
+from app.logic.fanout import gather_with_deadline
+from app.logic.fast_json import FastJSONResponse, FastJSONRoute, dumps as json_dumps
+from app.logic.geocode_store import GeocodeStore, normalize_query
+from app.logic.locations import load_locations
+from app.logic.market_store import MarketPriceStore, commodity_key
+from app.logic.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from app.logic.place_index import PlaceIndex, normalize as normalize_place
+from app.logic.plot_stream import BodyStreamingResponse, iter_rows
+from app.logic.prefetch import HotCells, PrefetchScheduler
+from app.logic.rain_archive import RainArchive
+from app.logic.ratelimit import RateLimitExceeded, TokenBucket
+from app.logic.simulation import simulate as run_simulation
+from app.logic.singleflight import SingleFlight
+from app.logic.soil_bucket import rain_matrix, retention_from_text, run_bucket
+from app.logic.spatial import SpatialIndex
+from app.logic.suggest_cache import PrefixSuggestionCache
+from app.logic.tracing import TraceWriter, TracingMiddleware, span, traced
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared, pooled HTTP clients for Nominatim / Open-Meteo
+    await upstream.startup()
+    if config.PREFETCH_ENABLED:
+        prefetcher.start()
+    catalogue.start_watching(config.CATALOGUE_WATCH_INTERVAL)
+    yield
+    await catalogue.stop()
+    await prefetcher.stop()
+    await upstream.shutdown()
+    geocode_store.close()
 
-app = FastAPI(title="Village Water Accountant")
+app = FastAPI(title="Village Water Accountant", lifespan=lifespan, default_response_class=FastJSONResponse)
+# Plain dict results go straight to orjson, skipping jsonable_encoder
+app.router.route_class = FastJSONRoute
 
 # Configure CORS
 origins = [
@@ -25,6 +70,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-stage timings (Server-Timing header) and sampled JSONL traces
+app.add_middleware(
+    TracingMiddleware,
+    writer=TraceWriter(config.TRACE_FILE, config.TRACE_MAX_BYTES, config.TRACE_BACKUPS),
+    sample_rate=config.TRACE_SAMPLE_RATE,
+    slow_ms=config.TRACE_SLOW_MS,
+    server_timing=config.SERVER_TIMING_ENABLED,
+    # Headers go out before the rows are screened, and a large upload would
+    # pile up three spans per row
+    untraced={"/api/check-crop/stream"},
+)
+# Outermost, so latency covers CORS and error handling too
+app.add_middleware(MetricsMiddleware)
 
 class WaterBalanceRequest(BaseModel):
     pincode: Optional[str] = None
@@ -46,213 +104,604 @@ def read_root():
 
 # --- REAL API HELPERS ---
 
-async def get_coordinates(query: str):
-    """Fetch Lat/Lng from Nominatim (OpenStreetMap)."""
-    async with httpx.AsyncClient() as client:
-        # User-Agent is required by Nominatim
-        headers = {'User-Agent': 'WaterAccountantApp/1.0'}
-        # Limit to India/Maharashtra if possible, but general query works well
-        try:
-            resp = await client.get(
-                f"https://nominatim.openstreetmap.org/search",
-                params={"q": query, "format": "json", "limit": 1, "countrycodes": "in"},
-                headers=headers
-            )
-            data = resp.json()
-            if data:
-                return {
-                    "lat": float(data[0]['lat']),
-                    "lng": float(data[0]['lon']),
-                    "display_name": data[0]['display_name']
-                }
-        except Exception as e:
-            print(f"Nominatim Error: {e}")
-    return None
+# Open-Meteo responses, keyed by (dataset, grid cell, variables)
+weather_cache = TTLCache(
+    "weather",
+    max_entries=config.WEATHER_CACHE_MAX_ENTRIES,
+    max_bytes=config.WEATHER_CACHE_MAX_BYTES,
+)
 
-async def reverse_geocode(lat: float, lng: float):
+# Daily rain per grid cell on disk; past days are never re-downloaded
+rain_archive = RainArchive(config.RAIN_ARCHIVE_DIR, config.RAIN_ARCHIVE_EPOCH, config.RAIN_ARCHIVE_MAX_OPEN)
+
+# Nominatim: persistent geocode cache + process-wide 1 req/s budget
+geocode_store = GeocodeStore(
+    config.GEOCODE_DB_PATH,
+    grid_deg=config.GEOCODE_REVERSE_GRID_DEG,
+    max_age=config.GEOCODE_MAX_AGE_DAYS * 86400,
+    negative_ttl=config.GEOCODE_NEGATIVE_TTL,
+)
+nominatim_limiter = TokenBucket(config.NOMINATIM_RATE_PER_S, config.NOMINATIM_BURST)
+# Batch lookups queue for Nominatim one at a time, so at most one of their
+# reservations is ever ahead of an interactive request
+nominatim_batch_gate = asyncio.Semaphore(1)
+
+# Identical concurrent lookups share one upstream call
+upstream_flights = SingleFlight()
+
+# Grid cells live requests ask about, for the background prefetcher
+hot_cells = HotCells(config.PREFETCH_HALF_LIFE)
+
+# Remote autocomplete results, reusable across keystrokes of the same word
+SUGGESTION_LIMIT = 5
+suggestion_cache = PrefixSuggestionCache(
+    SUGGESTION_LIMIT,
+    ttl=config.SUGGESTION_CACHE_TTL,
+    max_entries=config.SUGGESTION_CACHE_MAX_ENTRIES,
+)
+
+ARCHIVE_DAILY_VARS = "precipitation_sum"
+FORECAST_DAILY_VARS = "weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max"
+SOIL_HOURLY_VARS = "soil_temperature_6cm,soil_moisture_3_to_9cm"
+
+async def nominatim_slot(batch: bool = False):
+    """
+    Wait for a Nominatim request slot. Interactive callers give up after
+    NOMINATIM_MAX_WAIT (RateLimitExceeded); batch callers wait in line.
+    """
+    with span("nominatim.queue"):
+        if not batch:
+            await nominatim_limiter.acquire(config.NOMINATIM_MAX_WAIT)
+            return
+        async with nominatim_batch_gate:
+            await nominatim_limiter.acquire(config.BATCH_NOMINATIM_MAX_WAIT)
+
+@traced("geocode")
+async def get_coordinates(query: str, batch: bool = False):
+    """
+    Fetch Lat/Lng from Nominatim (OpenStreetMap); None if nothing matches.
+    Raises RateLimitExceeded if Nominatim is too busy to queue for, and
+    CircuitOpen / httpx.HTTPError if it is failing.
+    """
+    hit, cached = await asyncio.to_thread(geocode_store.get_forward, query)
+    if hit:
+        return cached
+    key = ("geocode", normalize_query(query))
+    return await upstream_flights.do(key, lambda: _fetch_coordinates(query, batch))
+
+async def _fetch_coordinates(query: str, batch: bool = False):
+    await nominatim_slot(batch)
+    # Limit to India/Maharashtra if possible, but general query works well
+    try:
+        resp = await upstream.get(
+            upstream.NOMINATIM,
+            f"{config.NOMINATIM_URL}/search",
+            op="forward",
+            params={"q": query, "format": "json", "limit": 1, "countrycodes": "in"}
+        )
+        data = resp.json()
+        result = None
+        if data:
+            result = {
+                "lat": float(data[0]['lat']),
+                "lng": float(data[0]['lon']),
+                "display_name": data[0]['display_name']
+            }
+    except (CircuitOpen, httpx.HTTPError) as e:
+        print(f"Nominatim Error: {e}")
+        raise
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        print(f"Nominatim Error: {e}")
+        raise httpx.DecodingError(f"malformed Nominatim response: {e}", request=resp.request) from e
+    # Only a real answer (place or no match) is cached; outages are not
+    await asyncio.to_thread(geocode_store.put_forward, query, result)
+    return result
+
+@traced("reverse_geocode")
+async def reverse_geocode(lat: float, lng: float, batch: bool = False):
     """Fetch Address from Nominatim (Reverse Geocoding)."""
-    async with httpx.AsyncClient() as client:
-        headers = {'User-Agent': 'WaterAccountantApp/1.0'}
-        try:
-            resp = await client.get(
-                f"https://nominatim.openstreetmap.org/reverse",
-                params={"lat": lat, "lon": lng, "format": "json"},
-                headers=headers
-            )
-            data = resp.json()
-            if data:
-                address = data.get('address', {})
-                region = address.get('city') or address.get('town') or address.get('village') or address.get('county') or data.get('display_name').split(",")[0]
-                pincode = address.get('postcode')
-                return region, pincode
-        except Exception as e:
-            print(f"Reverse Geo Error: {e}")
+    # Next to a known village/city? Answer locally, no network
+    near = LOCATION_INDEX.nearest(lat, lng, config.LOCAL_GEOCODE_RADIUS_KM)
+    if near:
+        return near[0]["city"], near[0]["pincode"]
+
+    cached = await asyncio.to_thread(geocode_store.get_reverse, lat, lng)
+    if cached is not None:
+        return cached
+    key = ("reverse",) + grid_cell(lat, lng, config.GEOCODE_REVERSE_GRID_DEG)
+    return await upstream_flights.do(key, lambda: _fetch_reverse_geocode(lat, lng, batch))
+
+async def _fetch_reverse_geocode(lat: float, lng: float, batch: bool = False):
+    try:
+        await nominatim_slot(batch)
+        resp = await upstream.get(
+            upstream.NOMINATIM,
+            f"{config.NOMINATIM_URL}/reverse",
+            op="reverse",
+            params={"lat": lat, "lon": lng, "format": "json"}
+        )
+        data = resp.json()
+        if data:
+            address = data.get('address', {})
+            region = address.get('city') or address.get('town') or address.get('village') or address.get('county') or data.get('display_name').split(",")[0]
+            pincode = address.get('postcode')
+            await asyncio.to_thread(geocode_store.put_reverse, lat, lng, region, pincode)
+            return region, pincode
+    except Exception as e:
+        print(f"Reverse Geo Error: {e}")
     return None, None
 
+def _archive_window():
+    # excessive historical data for 'sum' over last 30 days
+    end_date = datetime.date.today()
+    return end_date - datetime.timedelta(days=30), end_date
+
+def _archive_key(lat: float, lng: float, end_date):
+    return ("archive", lat, lng, ARCHIVE_DAILY_VARS, end_date)
+
+def _archive_response(cell, data):
+    """Store an Open-Meteo archive response in the local rain archive."""
+    daily = data.get('daily') or {}
+    if daily.get('time') and 'precipitation_sum' in daily:
+        start = datetime.date.fromisoformat(daily['time'][0])
+        rain_archive.write(cell, start, daily['precipitation_sum'])
+        return True
+    return False
+
+def _daily_rain(cell, start_date, end_date):
+    """Daily rain (mm, oldest first) from the local archive; days not available count as dry."""
+    return np.nan_to_num(rain_archive.read(cell, start_date, end_date)).tolist()
+
+async def cached_upstream(source: str, key, fetch):
+    """
+    Cache-first read of upstream data. `fetch()` refreshes the cache and
+    returns None on failure. Expired entries are served (marked stale) while a
+    background refresh runs, for up to STALE_WHILE_REVALIDATE past expiry,
+    or as a fallback when the fetch fails, for up to STALE_IF_ERROR. Returns
+    None if there is nothing usable.
+    """
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return cached
+    stale, age = weather_cache.get_stale(key)
+    if stale is not None and age <= config.STALE_WHILE_REVALIDATE:
+        upstream_flights.spawn(key, fetch)
+        mark_stale(source)
+        return stale
+    value = await upstream_flights.do(key, fetch)
+    if value is None and stale is not None and age <= config.STALE_IF_ERROR:
+        mark_stale(source)
+        return stale
+    return value
+
+@traced("rain_30d")
 async def get_weather_real(lat: float, lng: float):
-    """Fetch Precipitation from Open-Meteo."""
-    async with httpx.AsyncClient() as client:
+    """
+    Last 30 days of daily precipitation: local archive, topped up from
+    Open-Meteo. If Open-Meteo is unavailable, archived days are used (marked
+    stale, missing days count as dry); None if nothing is archived either.
+    """
+    start_date, end_date = _archive_window()
+    lat, lng = grid_cell(lat, lng, config.WEATHER_CACHE_GRID_DEG)
+    hot_cells.touch((lat, lng))
+    key = _archive_key(lat, lng, end_date)
+    daily_rain = await cached_upstream(
+        "rain_30d", key, lambda: _fetch_weather_real(lat, lng, start_date, end_date, key))
+    if daily_rain is None and not np.isnan(rain_archive.read((lat, lng), start_date, end_date)).all():
+        mark_stale("rain_30d")
+        daily_rain = _daily_rain((lat, lng), start_date, end_date)
+    return daily_rain
+
+async def _fetch_weather_real(lat: float, lng: float, start_date, end_date, key):
+    cell = (lat, lng)
+    missing_from = rain_archive.first_missing(cell, start_date, end_date)
+    if missing_from is not None:
+        # Only the days not archived yet (normally the last few)
         try:
-            # excessive historical data for 'sum' over last 30 days
-            end_date = datetime.date.today()
-            start_date = end_date - datetime.timedelta(days=30)
-            
-            resp = await client.get(
-                "https://archive-api.open-meteo.com/v1/archive",
+            resp = await upstream.get(
+                upstream.OPEN_METEO,
+                f"{config.OPEN_METEO_ARCHIVE_URL}/v1/archive",
+                op="archive",
                 params={
                     "latitude": lat,
                     "longitude": lng,
-                    "start_date": start_date,
+                    "start_date": missing_from,
                     "end_date": end_date,
-                    "daily": "precipitation_sum",
+                    "daily": ARCHIVE_DAILY_VARS,
                     "timezone": "auto"
                 }
             )
-            data = resp.json()
-            if 'daily' in data and 'precipitation_sum' in data['daily']:
-                # Sum of last 30 days rain
-                total_rain = sum(filter(None, data['daily']['precipitation_sum']))
-                return total_rain
+            if not _archive_response(cell, resp.json()):
+                return None
         except Exception as e:
             print(f"Open-Meteo Error: {e}")
-    return 0.0
+            return None
+    daily_rain = _daily_rain(cell, start_date, end_date)
+    weather_cache.set(key, daily_rain, config.ARCHIVE_CACHE_TTL)
+    return daily_rain
 
-async def get_weather_forecast(lat: float, lng: float):
-    """Fetch 7-day weather forecast from Open-Meteo (FREE, no API key)."""
-    async with httpx.AsyncClient() as client:
+def _history_years():
+    last_year = datetime.date.today().year - 1
+    return last_year - config.RAIN_HISTORY_YEARS + 1, last_year
+
+def _history_key(lat: float, lng: float):
+    """Marker in weather_cache: the cell's history is archived (or the download just failed)."""
+    return ("history", lat, lng, _history_years()[0])
+
+@traced("rain_climatology")
+async def get_rain_climatology(lat: float, lng: float):
+    """
+    Monthly 20th/50th/80th percentile rainfall (12 x 3) for a grid cell from
+    the local archive. A cell's history is downloaded on first use (and kept
+    current for popular cells by the prefetcher); a request waits at most
+    RAIN_HISTORY_WAIT for it, and gets None (the built-in table) if it isn't
+    ready, the download failed recently, or there still isn't enough of it.
+    """
+    cell = grid_cell(lat, lng, config.WEATHER_CACHE_GRID_DEG)
+    hot_cells.touch(cell)
+    first_year, last_year = _history_years()
+    clim = rain_archive.climatology(cell, first_year, last_year, min_years=config.RAIN_CLIMATOLOGY_MIN_YEARS)
+    if clim is None and weather_cache.get(_history_key(*cell)) is None:
         try:
-            resp = await client.get(
-                "https://api.open-meteo.com/v1/forecast",
-                params={
-                    "latitude": lat,
-                    "longitude": lng,
-                    "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max",
-                    "timezone": "auto",
-                    "forecast_days": 7
-                }
-            )
-            data = resp.json()
-            
-            if 'daily' in data:
-                daily = data['daily']
-                forecast = []
-                
-                # Weather code to description mapping
-                weather_codes = {
-                    0: ("☀️", "Clear Sky"),
-                    1: ("🌤️", "Mainly Clear"),
-                    2: ("⛅", "Partly Cloudy"),
-                    3: ("☁️", "Overcast"),
-                    45: ("🌫️", "Foggy"),
-                    48: ("🌫️", "Fog"),
-                    51: ("🌧️", "Light Drizzle"),
-                    53: ("🌧️", "Drizzle"),
-                    55: ("🌧️", "Heavy Drizzle"),
-                    61: ("🌧️", "Light Rain"),
-                    63: ("🌧️", "Rain"),
-                    65: ("🌧️", "Heavy Rain"),
-                    71: ("🌨️", "Light Snow"),
-                    73: ("🌨️", "Snow"),
-                    75: ("🌨️", "Heavy Snow"),
-                    80: ("🌦️", "Rain Showers"),
-                    81: ("🌦️", "Rain Showers"),
-                    82: ("⛈️", "Heavy Showers"),
-                    95: ("⛈️", "Thunderstorm"),
-                    96: ("⛈️", "Thunderstorm + Hail"),
-                    99: ("⛈️", "Severe Storm")
-                }
-                
-                for i in range(len(daily['time'])):
-                    code = daily['weather_code'][i] if daily['weather_code'] else 0
-                    icon, desc = weather_codes.get(code, ("❓", "Unknown"))
-                    
-                    forecast.append({
-                        "date": daily['time'][i],
-                        "day": datetime.datetime.strptime(daily['time'][i], "%Y-%m-%d").strftime("%a"),
-                        "icon": icon,
-                        "condition": desc,
-                        "temp_max": daily['temperature_2m_max'][i] if daily['temperature_2m_max'] else None,
-                        "temp_min": daily['temperature_2m_min'][i] if daily['temperature_2m_min'] else None,
-                        "rain_mm": daily['precipitation_sum'][i] if daily['precipitation_sum'] else 0,
-                        "wind_kmh": daily['wind_speed_10m_max'][i] if daily['wind_speed_10m_max'] else 0
-                    })
-                
-                return forecast
-        except Exception as e:
-            print(f"Forecast Error: {e}")
-    return []
+            await asyncio.wait_for(_refresh_history(cell), config.RAIN_HISTORY_WAIT)
+        except asyncio.TimeoutError:
+            return None  # the download carries on in the background
+        clim = rain_archive.climatology(cell, first_year, last_year, min_years=config.RAIN_CLIMATOLOGY_MIN_YEARS)
+    return clim
+
+async def _refresh_history(cell):
+    """Archive the cell's RAIN_HISTORY_YEARS of daily rain, fetching only what is missing."""
+    if weather_cache.peek(_history_key(*cell)) is False:
+        return  # failed recently; wait out RAIN_HISTORY_RETRY
+    first_year, last_year = _history_years()
+    start, end = datetime.date(first_year, 1, 1), datetime.date(last_year, 12, 31)
+    missing_from = rain_archive.first_missing(cell, start, end)
+    if missing_from is None:
+        weather_cache.set(_history_key(*cell), True, config.RAIN_HISTORY_RECHECK)
+        return
+    # do() shields the download, so a caller giving up doesn't cancel it
+    await upstream_flights.do(_history_key(*cell), lambda: _fetch_rain_history(cell, missing_from, end))
+
+async def _fetch_rain_history(cell, start_date, end_date):
+    ok = False
+    try:
+        resp = await upstream.get(
+            upstream.OPEN_METEO,
+            f"{config.OPEN_METEO_ARCHIVE_URL}/v1/archive",
+            op="history",
+            params={
+                "latitude": cell[0],
+                "longitude": cell[1],
+                "start_date": start_date,
+                "end_date": end_date,
+                "daily": ARCHIVE_DAILY_VARS,
+                "timezone": "auto"
+            }
+        )
+        ok = _archive_response(cell, resp.json())
+    except Exception as e:
+        print(f"Open-Meteo History Error: {e}")
+    # After a failure, requests use the built-in table for a while instead of retrying
+    weather_cache.set(_history_key(*cell), ok, config.RAIN_HISTORY_RECHECK if ok else config.RAIN_HISTORY_RETRY)
+
+def _forecast_key(lat: float, lng: float):
+    return ("forecast", lat, lng, FORECAST_DAILY_VARS)
 
+# Weather code to description mapping
+WEATHER_CODES = {
+    0: ("☀️", "Clear Sky"),
+    1: ("🌤️", "Mainly Clear"),
+    2: ("⛅", "Partly Cloudy"),
+    3: ("☁️", "Overcast"),
+    45: ("🌫️", "Foggy"),
+    48: ("🌫️", "Fog"),
+    51: ("🌧️", "Light Drizzle"),
+    53: ("🌧️", "Drizzle"),
+    55: ("🌧️", "Heavy Drizzle"),
+    61: ("🌧️", "Light Rain"),
+    63: ("🌧️", "Rain"),
+    65: ("🌧️", "Heavy Rain"),
+    71: ("🌨️", "Light Snow"),
+    73: ("🌨️", "Snow"),
+    75: ("🌨️", "Heavy Snow"),
+    80: ("🌦️", "Rain Showers"),
+    81: ("🌦️", "Rain Showers"),
+    82: ("⛈️", "Heavy Showers"),
+    95: ("⛈️", "Thunderstorm"),
+    96: ("⛈️", "Thunderstorm + Hail"),
+    99: ("⛈️", "Severe Storm")
+}
+
+def _parse_forecast(data):
+    """Day-by-day list from an Open-Meteo forecast response, or None."""
+    if 'daily' not in data:
+        return None
+    daily = data['daily']
+    forecast = []
+    
+    for i in range(len(daily['time'])):
+        code = daily['weather_code'][i] if daily['weather_code'] else 0
+        icon, desc = WEATHER_CODES.get(code, ("❓", "Unknown"))
+
+        forecast.append({
+            "date": daily['time'][i],
+            "day": datetime.datetime.strptime(daily['time'][i], "%Y-%m-%d").strftime("%a"),
+            "icon": icon,
+            "condition": desc,
+            "temp_max": daily['temperature_2m_max'][i] if daily['temperature_2m_max'] else None,
+            "temp_min": daily['temperature_2m_min'][i] if daily['temperature_2m_min'] else None,
+            "rain_mm": daily['precipitation_sum'][i] if daily['precipitation_sum'] else 0,
+            "wind_kmh": daily['wind_speed_10m_max'][i] if daily['wind_speed_10m_max'] else 0
+        })
+    return forecast
+
+@traced("forecast")
+async def get_weather_forecast(lat: float, lng: float):
+    """Fetch 7-day weather forecast from Open-Meteo (FREE, no API key); [] if unavailable."""
+    lat, lng = grid_cell(lat, lng, config.WEATHER_CACHE_GRID_DEG)
+    hot_cells.touch((lat, lng))
+    key = _forecast_key(lat, lng)
+    forecast = await cached_upstream("forecast", key, lambda: _fetch_weather_forecast(lat, lng, key))
+    return forecast or []
+
+async def _fetch_weather_forecast(lat: float, lng: float, key):
+    try:
+        resp = await upstream.get(
+            upstream.OPEN_METEO,
+            f"{config.OPEN_METEO_URL}/v1/forecast",
+            op="forecast",
+            params={
+                "latitude": lat,
+                "longitude": lng,
+                "daily": FORECAST_DAILY_VARS,
+                "timezone": "auto",
+                "forecast_days": 7
+            }
+        )
+        forecast = _parse_forecast(resp.json())
+        if forecast is not None:
+            weather_cache.set(key, forecast, config.FORECAST_CACHE_TTL)
+            return forecast
+    except Exception as e:
+        print(f"Forecast Error: {e}")
+    return None
+
+async def fetch_weather_many(cells, sem):
+    """
+    30-day rain and 7-day forecast for many grid cells at once.
+    Cached cells are served from the cache and archived rain days from the
+    local archive; the rest go to Open-Meteo as multi-location requests
+    (comma-separated coordinates), chunked to keep URLs short. Returns
+    ({cell: daily rain}, {cell: forecast}, {cell: [stale sources]}); when a
+    fetch fails, archived rain days and expired forecasts (up to
+    STALE_IF_ERROR old) are used and reported as stale, otherwise the cell
+    is simply missing.
+    """
+    start_date, end_date = _archive_window()
+    rain, forecasts = {}, {}
+    rain_missing, forecast_missing = {}, []
+    for cell in cells:
+        r = weather_cache.get(_archive_key(*cell, end_date))
+        if r is not None:
+            rain[cell] = r
+        else:
+            missing_from = rain_archive.first_missing(cell, start_date, end_date)
+            if missing_from is None:
+                rain[cell] = _daily_rain(cell, start_date, end_date)
+            else:
+                # Cells needing the same days can share a request
+                rain_missing.setdefault(missing_from, []).append(cell)
+        f = weather_cache.get(_forecast_key(*cell))
+        if f is None: forecast_missing.append(cell)
+        else: forecasts[cell] = f
+
+    size = config.OPEN_METEO_BATCH_SIZE
+    forecast_params = {"daily": FORECAST_DAILY_VARS, "timezone": "auto", "forecast_days": 7}
+
+    async def fetch_chunk(op, url, params, chunk, store):
+        async with sem:
+            try:
+                resp = await upstream.get(upstream.OPEN_METEO, url, op=op, params={
+                    **params,
+                    "latitude": ",".join(str(c[0]) for c in chunk),
+                    "longitude": ",".join(str(c[1]) for c in chunk),
+                })
+                data = resp.json()
+                # One location -> object, several -> list in request order
+                for cell, loc_data in zip(chunk, data if isinstance(data, list) else [data]):
+                    store(cell, loc_data)
+            except Exception as e:
+                print(f"Open-Meteo Batch Error: {e}")
+
+    def store_rain(cell, data):
+        if _archive_response(cell, data):
+            rain[cell] = _daily_rain(cell, start_date, end_date)
+            weather_cache.set(_archive_key(*cell, end_date), rain[cell], config.ARCHIVE_CACHE_TTL)
+
+    def store_forecast(cell, data):
+        value = _parse_forecast(data)
+        if value is not None:
+            weather_cache.set(_forecast_key(*cell), value, config.FORECAST_CACHE_TTL)
+            forecasts[cell] = value
+
+    await asyncio.gather(
+        *[fetch_chunk("archive", f"{config.OPEN_METEO_ARCHIVE_URL}/v1/archive",
+                      {"start_date": missing_from, "end_date": end_date, "daily": ARCHIVE_DAILY_VARS, "timezone": "auto"},
+                      group[i:i + size], store_rain)
+          for missing_from, group in rain_missing.items() for i in range(0, len(group), size)],
+        *[fetch_chunk("forecast", f"{config.OPEN_METEO_URL}/v1/forecast", forecast_params, forecast_missing[i:i + size], store_forecast)
+          for i in range(0, len(forecast_missing), size)],
+    )
+
+    stale = {}
+    for cell in cells:
+        if cell not in rain and not np.isnan(rain_archive.read(cell, start_date, end_date)).all():
+            rain[cell] = _daily_rain(cell, start_date, end_date)
+            stale.setdefault(cell, []).append("rain_30d")
+        if cell not in forecasts:
+            value, age = weather_cache.get_stale(_forecast_key(*cell))
+            if value is not None and age <= config.STALE_IF_ERROR:
+                forecasts[cell] = value
+                stale.setdefault(cell, []).append("forecast")
+    return rain, forecasts, stale
+
+@traced("soil_data")
 async def get_soil_data(lat: float, lng: float):
     """Fetch Soil Moisture and Temperature from Open-Meteo."""
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(
-                "https://api.open-meteo.com/v1/forecast",
-                params={
-                    "latitude": lat,
-                    "longitude": lng,
-                    "hourly": "soil_temperature_6cm,soil_moisture_3_to_9cm",
-                    "timezone": "auto" # Critical for alignment
-                }
-            )
-            data = resp.json()
-            if 'hourly' in data:
-                # Take average of first 6 hours (approx current window)
-                temps = [t for t in data['hourly']['soil_temperature_6cm'][:6] if t is not None]
-                moists = [m for m in data['hourly']['soil_moisture_3_to_9cm'][:6] if m is not None]
-                
-                avg_temp = sum(temps) / len(temps) if temps else 25.0
-                avg_moisture = sum(moists) / len(moists) if moists else 0.3
-
-                return {
-                    "temp_c": round(avg_temp, 1),
-                    "moisture_percent": round(avg_moisture * 100, 1) # m³/m³ to %
-                }
-        except Exception as e:
-            print(f"Soil Data Error: {e}")
+    lat, lng = grid_cell(lat, lng, config.WEATHER_CACHE_GRID_DEG)
+    hot_cells.touch((lat, lng))
+    key = _soil_key(lat, lng)
+    cached = await cached_upstream("soil", key, lambda: _fetch_soil_data(lat, lng, key))
+    return dict(cached) if cached else None # callers annotate the result
+
+async def _fetch_soil_data(lat: float, lng: float, key):
+    try:
+        resp = await upstream.get(
+            upstream.OPEN_METEO,
+            f"{config.OPEN_METEO_URL}/v1/forecast",
+            op="soil",
+            params={
+                "latitude": lat,
+                "longitude": lng,
+                "hourly": SOIL_HOURLY_VARS,
+                "timezone": "auto" # Critical for alignment
+            }
+        )
+        data = resp.json()
+        if 'hourly' in data:
+            # Take average of first 6 hours (approx current window)
+            temps = [t for t in data['hourly']['soil_temperature_6cm'][:6] if t is not None]
+            moists = [m for m in data['hourly']['soil_moisture_3_to_9cm'][:6] if m is not None]
+            
+            avg_temp = sum(temps) / len(temps) if temps else 25.0
+            avg_moisture = sum(moists) / len(moists) if moists else 0.3
+
+            soil = {
+                "temp_c": round(avg_temp, 1),
+                "moisture_percent": round(avg_moisture * 100, 1) # m³/m³ to %
+            }
+            weather_cache.set(key, soil, config.SOIL_CACHE_TTL)
+            return soil
+    except Exception as e:
+        print(f"Soil Data Error: {e}")
     return None
 
+# --- BACKGROUND PREFETCH ---
+def _soil_key(lat: float, lng: float):
+    return ("soil", lat, lng, SOIL_HOURLY_VARS)
+
+async def _refresh_forecast(cell):
+    key = _forecast_key(*cell)
+    await upstream_flights.do(key, lambda: _fetch_weather_forecast(*cell, key))
+
+async def _refresh_soil(cell):
+    key = _soil_key(*cell)
+    await upstream_flights.do(key, lambda: _fetch_soil_data(*cell, key))
+
+async def _refresh_archive(cell):
+    start_date, end_date = _archive_window()
+    key = _archive_key(*cell, end_date)
+    await upstream_flights.do(key, lambda: _fetch_weather_real(*cell, start_date, end_date, key))
+
+_user_locations = {"cells": [], "loaded_at": None}
 
+async def saved_user_cells():
+    """Grid cells of saved user locations (Supabase), re-read every USER_LOCATIONS_REFRESH s."""
+    if not (config.SUPABASE_URL and config.SUPABASE_SERVICE_KEY):
+        return []
+    now = time.monotonic()
+    loaded_at = _user_locations["loaded_at"]
+    if loaded_at is not None and now - loaded_at < config.USER_LOCATIONS_REFRESH:
+        return _user_locations["cells"]
+    _user_locations["loaded_at"] = now
+    try:
+        resp = await upstream.get(
+            upstream.SUPABASE,
+            f"{config.SUPABASE_URL}/rest/v1/user_locations",
+            op="user_locations",
+            params={"select": "latitude,longitude"}
+        )
+        resp.raise_for_status()
+        _user_locations["cells"] = list(dict.fromkeys(
+            grid_cell(row["latitude"], row["longitude"], config.WEATHER_CACHE_GRID_DEG) for row in resp.json()
+        ))
+    except Exception as e:
+        print(f"User Locations Error: {e}")
+    return _user_locations["cells"]
+
+prefetcher = PrefetchScheduler(
+    weather_cache,
+    hot_cells,
+    [
+        ("forecast", lambda cell: _forecast_key(*cell), _refresh_forecast),
+        ("soil", lambda cell: _soil_key(*cell), _refresh_soil),
+        ("archive", lambda cell: _archive_key(*cell, _archive_window()[1]), _refresh_archive),
+        ("history", lambda cell: _history_key(*cell), _refresh_history),
+    ],
+    interval=config.PREFETCH_INTERVAL,
+    lead_time=config.PREFETCH_LEAD_TIME,
+    top_n=config.PREFETCH_TOP_CELLS,
+    rate_per_s=config.PREFETCH_RATE_PER_S,
+    pinned=saved_user_cells,
+    busy=lambda: len(upstream_flights) >= config.PREFETCH_BUSY_INFLIGHT,
+)
+
+
+@traced("suggest_remote")
 async def get_suggestions_real(query: str):
-    """Fetch Autocomplete Suggestions from Nominatim."""
-    async with httpx.AsyncClient() as client:
-        headers = {'User-Agent': 'WaterAccountantApp/1.0'}
-        try:
-            resp = await client.get(
-                f"https://nominatim.openstreetmap.org/search",
-                params={
-                    "q": query,
-                    "format": "json",
-                    "limit": 5,
-                    "countrycodes": "in",
-                    "addressdetails": 1
-                },
-                headers=headers
-            )
-            results = resp.json()
-            suggestions = []
-            for item in results:
-                # Try to find a pincode in address details
-                pincode = item.get('address', {}).get('postcode', '')
-                
-                # Format label
-                label = item['display_name'].split(",")[0]
-                if pincode:
-                    label += f" - {pincode}"
-                else:
-                    label += f" ({item['type']})"
+    """
+    Fetch Autocomplete Suggestions from Nominatim.
+    Queries shorter than SUGGESTIONS_REMOTE_MIN_CHARS are answered from the
+    suggestion cache only (exact or derived from a prefix), never upstream.
+    """
+    q = normalize_place(query)
+    cached = suggestion_cache.get(q)
+    if cached is not None:
+        return cached
+    if len(q) < config.SUGGESTIONS_REMOTE_MIN_CHARS:
+        return []
+    return await upstream_flights.do(("suggest", q), lambda: _fetch_suggestions(query, q))
 
-                suggestions.append({
-                    "label": label,
-                    "value": pincode if pincode else item['display_name'],
-                    "name": item['display_name'].split(",")[0],
-                    "lat": float(item['lat']),
-                    "lng": float(item['lon'])
-                })
-            return suggestions
-        except Exception as e:
-            print(f"Suggestion Error: {e}")
-            return []
+async def _fetch_suggestions(query: str, q: str):
+    try:
+        await nominatim_slot()
+        resp = await upstream.get(
+            upstream.NOMINATIM,
+            f"{config.NOMINATIM_URL}/search",
+            op="search",
+            params={
+                "q": query,
+                "format": "json",
+                "limit": SUGGESTION_LIMIT,
+                "countrycodes": "in",
+                "addressdetails": 1
+            }
+        )
+        results = resp.json()
+        suggestions = []
+        for item in results:
+            # Try to find a pincode in address details
+            pincode = item.get('address', {}).get('postcode', '')
+            
+            # Format label
+            label = item['display_name'].split(",")[0]
+            if pincode:
+                label += f" - {pincode}"
+            else:
+                label += f" ({item['type']})"
+
+            suggestions.append({
+                "label": label,
+                "value": pincode if pincode else item['display_name'],
+                "name": item['display_name'].split(",")[0],
+                "lat": float(item['lat']),
+                "lng": float(item['lon'])
+            })
+        suggestion_cache.put(q, suggestions)
+        return suggestions
+    except Exception as e:
+        print(f"Suggestion Error: {e}")
+        return []
 
 # --- MAHARASHTRA LOCATION DATABASE ---
 MAHARASHTRA_LOCATIONS = [
@@ -288,6 +737,15 @@ MAHARASHTRA_LOCATIONS = [
     {"city": "Beed", "pincode": "431122", "lat": 18.9894, "lng": 75.7585},
 ]
 
+# Built-in cities plus the optional full village/pincode directory
+KNOWN_LOCATIONS = MAHARASHTRA_LOCATIONS + load_locations(config.LOCATIONS_FILE)
+LOCATION_INDEX = SpatialIndex(KNOWN_LOCATIONS)
+PLACE_INDEX = PlaceIndex(KNOWN_LOCATIONS)
+
+# Local hits needed before /api/suggestions skips Nominatim. With the full
+# directory loaded, any local hit is good enough.
+SUGGESTIONS_LOCAL_MIN = config.SUGGESTIONS_LOCAL_MIN or (1 if len(KNOWN_LOCATIONS) > len(MAHARASHTRA_LOCATIONS) else 3)
+
 # --- ENDPOINTS ---
 
 # --- RECOMMENDATION REQUEST MODEL ---
@@ -302,250 +760,154 @@ async def recommend_crops(request: RecommendationRequest):
     Returns lists of Recommended, Moderate, and Risky crops
     based on Soil, Season, and Water Compatibility
     """
-    soil_type = request.soil_type.lower()
     season = request.season
     water_avail = request.water_availability
     
+    # Only crops with a soil match (+40) AND a good water fit (+40) reach
+    # the cut-off of 70, so look those up directly instead of scoring all.
+    if water_avail == "Critical":
+        max_water, water_reason = 400, "Drought Resistant"
+    elif water_avail == "Moderate":
+        max_water, water_reason = 800, "Good Water Fit"
+    elif water_avail == "Safe":
+        max_water, water_reason = None, "Water Available"
+    else:
+        return {"recommendations": []}
+
+    index = catalogue.current.index
+    soil_ok = index.soil_matches(request.soil_type)
+    ids = sorted(i for i in index.season_crops_below(season, max_water) if i in soil_ok)
+
     recommended = []
-    
-    # Map complex soil names to simple keywords
-    soil_key = "medium"
-    if "black" in soil_type or "heavy" in soil_type or "clay" in soil_type:
-        soil_key = "heavy"
-    elif "red" in soil_type or "light" in soil_type or "sandy" in soil_type:
-        soil_key = "light"
-    elif "medium" in soil_type:
-        soil_key = "medium"
-        
-    for crop in CROP_DATABASE:
-        score = 0
-        reasons = []
-        
-        # 1. Season Check (Critical)
-        if crop["season"] != "Annual" and season not in crop["season"]:
-            continue # Skip wrong season crops for recommendations
-            
-        # 2. Soil Match
-        # We check if our simplified soil_key maps to crop's soil list
-        # We need to be liberal here. 
-        # If crop needs "Black", and we have "Black Soil", it's a match.
-        soil_match = False
-        for s in crop["soil"]:
-            if s.lower() in soil_type or (soil_key == "heavy" and s in ["Clay", "Black", "Heavy"]) or (soil_key == "light" and s in ["Sandy", "Light", "Red"]):
-                soil_match = True
-                break
-        
-        if soil_match:
-            score += 40
-            reasons.append("Great Soil Match")
-        else:
-            reasons.append("Soil not ideal but manageable")
-            
-        # 3. Water Match
-        w = crop["water_mm"]
-        water_score = 0
-        if water_avail == "Critical" and w < 400:
-            water_score = 40
-            reasons.append("Drought Resistant")
-        elif water_avail == "Moderate" and w < 800:
-            water_score = 40
-            reasons.append("Good Water Fit")
-        elif water_avail == "Safe":
-            water_score = 40
-            reasons.append("Water Available")
-        elif water_avail == "Critical" and w > 600:
-            water_score = -50
-            reasons.append("Requires too much water")
-            
-        score += water_score
-        
-        # 4. Recommendation Logic
-        if score >= 70:
-            recommended.append({
-                "name": crop["name"],
-                "score": score,
-                "reasons": reasons,
-                "details": crop # Send full details including environment
-            })
-            
-    # Sort by score
-    recommended.sort(key=lambda x: x["score"], reverse=True)
+    for i in ids[:6]:
+        crop = index.crops[i]
+        recommended.append({
+            "name": crop.name,
+            "score": 80,
+            "reasons": ["Great Soil Match", water_reason],
+            "details": crop.to_dict() # Send full details including environment
+        })
     
     return {"recommendations": recommended[:6]} # Top 6
 
-# --- RECOMMENDATION REQUEST MODEL ---
-class RecommendationRequest(BaseModel):
-    soil_type: str
-    season: str
-    water_availability: str  # "High", "Medium", "Low" based on water balance
+# --- BATCH RECOMMENDATION REQUEST MODEL (columnar: one entry per plot) ---
+class BatchRecommendationRequest(BaseModel):
+    soil_type: List[str]
+    season: List[str]
+    water_mm: List[float] # Water balance per plot in mm
+    top_k: int = 5
 
-@app.post("/api/recommend-crops")
-async def recommend_crops(request: RecommendationRequest):
+@app.post("/api/recommend-crops/batch")
+def recommend_crops_batch(request: BatchRecommendationRequest):
     """
-    Returns lists of Recommended, Moderate, and Risky crops
-    based on Soil, Season, and Water Compatibility
+    Smart recommendations for many plots in one call.
+    Same scoring as get_smart_recommendations, vectorised over all plots.
+    Returns columnar lists: crops[i] / scores[i] are plot i's ranked picks.
     """
-    soil_type = request.soil_type.lower()
-    season = request.season
-    water_avail = request.water_availability
-    
-    recommended = []
-    
-    # Map complex soil names to simple keywords
-    soil_key = "medium"
-    if "black" in soil_type or "heavy" in soil_type or "clay" in soil_type:
-        soil_key = "heavy"
-    elif "red" in soil_type or "light" in soil_type or "sandy" in soil_type:
-        soil_key = "light"
-    elif "medium" in soil_type:
-        soil_key = "medium"
-        
-    for crop in CROP_DATABASE:
-        score = 0
-        reasons = []
-        
-        # 1. Season Check (Critical)
-        if crop["season"] != "Annual" and season not in crop["season"]:
-            continue # Skip wrong season crops for recommendations
-            
-        # 2. Soil Match
-        # We check if our simplified soil_key maps to crop's soil list
-        # We need to be liberal here. 
-        # If crop needs "Black", and we have "Black Soil", it's a match.
-        soil_match = False
-        for s in crop["soil"]:
-            if s.lower() in soil_type or (soil_key == "heavy" and s in ["Clay", "Black", "Heavy"]) or (soil_key == "light" and s in ["Sandy", "Light", "Red"]):
-                soil_match = True
-                break
-        
-        if soil_match:
-            score += 40
-            reasons.append("Great Soil Match")
-        else:
-            reasons.append("Soil not ideal but manageable")
-            
-        # 3. Water Match
-        w = crop["water_mm"]
-        water_score = 0
-        if water_avail == "Critical" and w < 400:
-            water_score = 40
-            reasons.append("Drought Resistant")
-        elif water_avail == "Moderate" and w < 800:
-            water_score = 40
-            reasons.append("Good Water Fit")
-        elif water_avail == "Safe":
-            water_score = 40
-            reasons.append("Water Available")
-        elif water_avail == "Critical" and w > 600:
-            water_score = -50
-            reasons.append("Requires too much water")
-            
-        score += water_score
-        
-        # 4. Recommendation Logic
-        if score >= 70:
-            recommended.append({
-                "name": crop["name"],
-                "score": score,
-                "reasons": reasons,
-                "details": crop # Send full details including environment
-            })
-            
-    # Sort by score
-    recommended.sort(key=lambda x: x["score"], reverse=True)
-    
-    return {"recommendations": recommended[:6]} # Top 6
+    n = len(request.water_mm)
+    if len(request.soil_type) != n or len(request.season) != n:
+        raise HTTPException(status_code=422, detail="soil_type, season and water_mm must have the same length")
+    if not 1 <= request.top_k <= 20:
+        raise HTTPException(status_code=422, detail="top_k must be between 1 and 20")
+
+    matrix = crop_matrix(catalogue.current.index)
+    ids, scores, counts = matrix.top_k(request.soil_type, request.season, request.water_mm, request.top_k)
+    names = matrix.names[ids].tolist()
+    scores = scores.tolist()
+    counts = counts.tolist()
+    return {
+        "success": True,
+        "count": n,
+        "crops": [row[:c] for row, c in zip(names, counts)],
+        "scores": [row[:c] for row, c in zip(scores, counts)],
+    }
 
 # --- SIMULATION REQUEST MODEL ---
 class SimulationRequest(BaseModel):
     crop_name: str
     water_balance: int # Current water balance in mm
-    month_start: int # 1-12
+    month_start: int = Field(ge=1, le=12) # 1-12
+    months: int = Field(6, ge=1, le=12)
+    trajectories: int = Field(config.SIMULATION_TRAJECTORIES, ge=100, le=config.SIMULATION_MAX_TRAJECTORIES)
+    percentiles: List[float] = [10, 50, 90]
+    seed: Optional[int] = None
+    # With a location, rainfall comes from its archived history when available
+    lat: Optional[float] = None
+    lng: Optional[float] = None
 
 @app.post("/api/simulate-water")
 async def simulate_water(request: SimulationRequest):
     """
-    Simulate water depletion using 'Cone of Uncertainty' logic.
-    Uses 20th (Worst), 50th (Likely), and 80th (Best) percentile rainfall data.
+    Simulate water depletion with Monte Carlo rainfall trajectories.
+    Returns the requested percentiles and the chance of running dry per month;
+    best/likely/worst (80th/50th/20th percentile) are kept for the old UI.
     """
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    start_idx = request.month_start - 1
-    
+    if any(not 0 <= p <= 100 for p in request.percentiles):
+        raise HTTPException(status_code=422, detail="Percentiles must be between 0 and 100")
+
     # Get crop water need
-    crop_info = next((c for c in CROP_DATABASE if c["name"] == request.crop_name), None)
-    total_need = crop_info["water_mm"] if crop_info else 500
+    crop_info = catalogue.current.crop(request.crop_name)
+    total_need = crop_info.water_mm if crop_info else 500
     monthly_usage = total_need / 5 # Assume 5 month active season
-    
-    # Mock Historical Rainfall Data (mm) - [Worst(20th), Median(50th), Best(80th)]
-    rainfall_stats = {
-        0: [0, 0, 5],    1: [0, 0, 5],    2: [0, 5, 10],    # Jan-Mar
-        3: [0, 10, 20],  4: [10, 25, 40],                   # Apr-May
-        5: [80, 150, 220],                                  # Jun (Monsoon Start)
-        6: [150, 250, 350], 7: [120, 200, 300],             # Jul-Aug (Peak)
-        8: [50, 120, 180],                                  # Sep (Retreating)
-        9: [10, 40, 80], 10: [0, 10, 30], 11: [0, 0, 10]    # Oct-Dec
-    }
-    
+
+    rain_quantiles = None
+    if request.lat is not None and request.lng is not None:
+        rain_quantiles = await get_rain_climatology(request.lat, request.lng)
+
+    result = run_simulation(
+        request.water_balance, monthly_usage, request.month_start, request.months,
+        request.trajectories, request.percentiles, request.seed, rain_quantiles,
+    )
+    pct = result["percentiles"]
     simulation = []
-    # Initialize balances
-    b_best = request.water_balance
-    b_likely = request.water_balance
-    b_worst = request.water_balance
-    
-    for i in range(6):
-        idx = (start_idx + i) % 12
-        m_name = months[idx]
-        
-        # Get historical rain stats for this month
-        stats = rainfall_stats.get(idx, [0, 0, 0])
-        inc_worst, inc_likely, inc_best = stats
-        
-        # Calculate Scenarios
-        # Worst: Low Rain + High Usage (Neighbor Extraction factor)
-        b_worst += inc_worst - (monthly_usage * 1.2)
-        
-        # Likely: Median Rain + Normal Usage
-        b_likely += inc_likely - monthly_usage
-        
-        # Best: High Rain + Efficient Usage (0.9 factor)
-        b_best += inc_best - (monthly_usage * 0.9)
-        
-        # Clamp to 0 (cannot have negative water)
+    for m, m_name in enumerate(result["months"]):
         simulation.append({
             "month": m_name,
-            "best": max(0, int(b_best)),
-            "likely": max(0, int(b_likely)),
-            "worst": max(0, int(b_worst))
+            "best": int(pct[80][m]),
+            "likely": int(pct[50][m]),
+            "worst": int(pct[20][m]),
+            "percentiles": {f"P{p:g}": int(pct[p][m]) for p in request.percentiles},
+            "prob_dry": round(float(result["prob_dry"][m]), 3)
         })
-        
-    return {"simulation": simulation}
+
+    return {
+        "simulation": simulation,
+        "prob_dry": round(result["prob_dry_any"], 3),
+        "trajectories": request.trajectories,
+        "rainfall_source": "local_history" if rain_quantiles is not None else "regional_table"
+    }
 
 @app.get("/api/suggestions")
 async def get_suggestions(query: str):
     """
     Return autocomplete suggestions.
-    Priority: Maharashtra local DB > Nominatim API
+    Priority: local village/pincode directory > Nominatim API (only for
+    queries of SUGGESTIONS_REMOTE_MIN_CHARS or more; the frontend also
+    debounces keystrokes)
     """
     suggestions = []
-    query_lower = query.lower()
     
-    # 1. Check Maharashtra Database First (Instant, No API Calls)
+    # 1. Check local directory first (Instant, No API Calls)
     if len(query) >= 2:
-        for loc in MAHARASHTRA_LOCATIONS:
-            # Match by city name or pincode
-            if (query_lower in loc["city"].lower() or 
-                query in loc["pincode"]):
+        with span("local_search"):
+            seen = set()
+            for loc in PLACE_INDEX.search(query, limit=10):
+                label = f"{loc['city']} - {loc['pincode']}"
+                if label in seen:
+                    continue # several post offices can share a name + pincode
+                seen.add(label)
                 suggestions.append({
-                    "label": f"{loc['city']} - {loc['pincode']}",
+                    "label": label,
                     "value": loc["pincode"],
                     "name": loc["city"],
                     "lat": loc["lat"],
                     "lng": loc["lng"]
                 })
+            suggestions = suggestions[:5]
         
         # If we have local matches, prioritize them
-        if len(suggestions) >= 3:
-            return suggestions[:5]  # Return top 5 local matches
+        if len(suggestions) >= SUGGESTIONS_LOCAL_MIN:
+            return suggestions  # Return top 5 local matches
     
     # 2. Fall back to Nominatim for non-Maharashtra or no matches
     try:
@@ -563,6 +925,7 @@ async def get_forecast(lat: float, lng: float):
     Get 7-day weather forecast for a location.
     Uses Open-Meteo API (FREE, no API key required).
     """
+    stale = track_stale()
     forecast = await get_weather_forecast(lat, lng)
     
     # Generate farming advice based on forecast
@@ -582,6 +945,7 @@ async def get_forecast(lat: float, lng: float):
     return {
         "success": True,
         "forecast": forecast,
+        "stale": bool(stale),
         "summary": {
             "rain_days": rain_days,
             "total_rain_mm": round(total_rain, 1),
@@ -591,10 +955,77 @@ async def get_forecast(lat: float, lng: float):
 
 
 
+@app.get("/api/stats")
+def get_stats():
+    """Cache counters for monitoring."""
+    return {
+        "caches": {
+            weather_cache.name: weather_cache.stats(),
+            "geocode": geocode_store.stats(),
+            "rain_archive": rain_archive.stats(),
+            suggestion_cache.cache.name: suggestion_cache.stats(),
+        },
+        "nominatim_limiter": nominatim_limiter.stats(),
+        "singleflight": upstream_flights.stats(),
+        "prefetch": prefetcher.stats(),
+        "circuit_breakers": upstream.stats(),
+        "catalogue": catalogue.stats(),
+        "market_prices": market_prices.stats() if market_prices else None,
+    }
+
+@metrics_registry.collector
+def cache_metrics():
+    """Scrape-time view of the counters the caches and helpers already keep."""
+    ttl_caches = [weather_cache.stats(), suggestion_cache.stats()]
+    names = [weather_cache.name, suggestion_cache.cache.name]
+    geocode = geocode_store.stats()
+    archive = rain_archive.stats()
+    flights = upstream_flights.stats()
+    in_flight = flights.pop("in_flight")
+    prefetch = prefetcher.stats()
+    breakers = upstream.stats()
+    return [
+        ("cache_hits_total", "counter", "Cache lookups answered from the cache.",
+         {**{(n,): c["hits"] for n, c in zip(names, ttl_caches)}, ("geocode",): geocode["hits"]}, ("cache",)),
+        ("cache_misses_total", "counter", "Cache lookups that missed.",
+         {**{(n,): c["misses"] for n, c in zip(names, ttl_caches)}, ("geocode",): geocode["misses"]}, ("cache",)),
+        ("cache_evictions_total", "counter", "Entries evicted to stay within size limits.",
+         {(n,): c["evictions"] for n, c in zip(names, ttl_caches)}, ("cache",)),
+        ("cache_entries", "gauge", "Entries currently held.",
+         {**{(n,): c["entries"] for n, c in zip(names, ttl_caches)}, ("rain_archive",): archive["mapped_cells"]},
+         ("cache",)),
+        ("cache_bytes", "gauge", "Approximate size of cached values.",
+         {(n,): c["approx_bytes"] for n, c in zip(names, ttl_caches)}, ("cache",)),
+        ("rain_archive_reads_total", "counter", "Reads from the local rain archive.",
+         {(): archive["reads"]}, ()),
+        ("rain_archive_writes_total", "counter", "Writes to the local rain archive.",
+         {(): archive["writes"]}, ()),
+        ("singleflight_calls_total", "counter", "Lookups routed through single-flight.",
+         {(kind,): f["calls"] for kind, f in flights.items()}, ("kind",)),
+        ("singleflight_coalesced_total", "counter", "Lookups that joined a call already in flight.",
+         {(kind,): f["coalesced"] for kind, f in flights.items()}, ("kind",)),
+        ("singleflight_in_flight", "gauge", "Upstream calls currently in flight.", {(): in_flight}, ()),
+        ("nominatim_limiter_rejected_total", "counter", "Nominatim calls rejected by the rate limiter.",
+         {(): nominatim_limiter.stats()["rejected"]}, ()),
+        ("prefetch_refreshed_total", "counter", "Cache entries refreshed in the background.",
+         {(): prefetch["refreshed"]}, ()),
+        ("prefetch_failed_total", "counter", "Background refreshes that failed.", {(): prefetch["failed"]}, ()),
+        ("circuit_open", "gauge", "1 while an upstream's circuit is open or half-open.",
+         {(name,): int(b["state"] != "closed") for name, b in breakers.items()}, ("upstream",)),
+        ("circuit_short_circuited_total", "counter", "Calls refused by an open circuit.",
+         {(name,): b["short_circuited"] for name, b in breakers.items()}, ("upstream",)),
+    ]
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of request, upstream and cache metrics."""
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/api/soil-conditions")
 async def get_soil_conditions_endpoint(lat: float, lng: float):
     """Get real-time soil moisture and temperature."""
     # Retrieve real-time soil data
+    stale = track_stale()
     data = await get_soil_data(lat, lng)
     
     if not data:
@@ -613,47 +1044,75 @@ async def get_soil_conditions_endpoint(lat: float, lng: float):
     
     return {
         "success": True,
+        "stale": bool(stale),
         "data": data
     }
 
-# --- MOCK MARKET DATA (Simulating data.gov.in) ---
-MARKET_DATA_MOCK = {
-    "Rice": [
-        {"market": "Pune APMC", "state": "MH", "min_price": 2800, "max_price": 3500, "modal_price": 3100, "trend": "up", "date": "06-Feb"},
-        {"market": "Nashik APMC", "state": "MH", "min_price": 2700, "max_price": 3300, "modal_price": 3000, "trend": "stable", "date": "06-Feb"},
-    ],
-    "Wheat": [
-        {"market": "Mumbai Vashi", "state": "MH", "min_price": 3200, "max_price": 4000, "modal_price": 3600, "trend": "up", "date": "06-Feb"},
-        {"market": "Pune APMC", "state": "MH", "min_price": 3000, "max_price": 3800, "modal_price": 3400, "trend": "stable", "date": "06-Feb"},
-    ],
-    "Jowar": [
-         {"market": "Solapur APMC", "state": "MH", "min_price": 3500, "max_price": 4200, "modal_price": 3800, "trend": "up", "date": "06-Feb"},
-    ],
-    "Bajra": [
-         {"market": "Ahmednagar APMC", "state": "MH", "min_price": 2200, "max_price": 2600, "modal_price": 2400, "trend": "down", "date": "06-Feb"},
-    ]
-}
+MARKET_VIEWS = ("latest", "history", "summary", "compare")
 
 @app.get("/api/market-prices")
-def get_market_prices(commodity: str):
-    """Fetch live market prices (Mocked for Demo)."""
+def get_market_prices(commodity: str, view: str = "latest", market: Optional[str] = None,
+                      start: Optional[datetime.date] = None, end: Optional[datetime.date] = None,
+                      window: int = 0):
+    """
+    Market prices for a commodity.
+
+    view=latest (default) is the newest quote per market. history (daily
+    rows, plus a `window`-day moving average of the modal price), summary
+    (per-market aggregates and trend) and compare (markets ranked against
+    each other, daily cross-market band) cover [start, end], by default the
+    last MARKET_DEFAULT_RANGE_DAYS days of data. `market` is an optional
+    comma-separated list of markets.
+    """
+    if view not in MARKET_VIEWS:
+        raise HTTPException(status_code=422, detail=f"view must be one of {', '.join(MARKET_VIEWS)}")
+    if not 0 <= window <= config.MARKET_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=422, detail=f"window must be between 0 and {config.MARKET_MAX_RANGE_DAYS}")
     # Normalize: "Rice (Paddy)" -> "Rice"
-    comm = commodity.split(" ")[0]
-    if "Sorghum" in commodity: comm = "Jowar"
-    if "Pearl" in commodity: comm = "Bajra"
-    
-    data = MARKET_DATA_MOCK.get(comm, [])
-    
-    # Generic Fallback
-    if not data:
-        import random
-        base = random.randint(3000, 7000)
-        data = [
-            {"market": "District Mandi", "state": "MH", "min_price": base - 300, "max_price": base + 300, "modal_price": base, "trend": "stable", "date": "06-Feb"},
-             {"market": "State Market", "state": "MH", "min_price": base - 200, "max_price": base + 500, "modal_price": base + 200, "trend": "up", "date": "06-Feb"}
-        ]
-    
-    return {"success": True, "data": data, "commodity": comm}
+    comm = commodity_key(commodity)
+    markets = [m.strip() for m in market.split(",") if m.strip()] if market else None
+    has_history = market_prices is not None and comm in market_prices
+    sids = market_prices.series_for(comm, markets) if has_history else ()
+
+    if view == "latest":
+        if has_history:
+            with span("market_query"):
+                data = market_prices.latest(sids, config.MARKET_TREND_DAYS, config.MARKET_TREND_THRESHOLD_PCT)
+        else:
+            # No price history loaded for it: the catalogue's sample quotes
+            wanted = {m.lower() for m in markets} if markets else None
+            data = [q.to_dict() for q in catalogue.current.market_prices.get(comm, ())
+                    if wanted is None or q.market.lower() in wanted]
+        return {"success": True, "data": data, "commodity": comm, "view": view}
+
+    end = end or (market_prices.last_day(sids) if len(sids) else None) or datetime.date.today()
+    start = start or end - datetime.timedelta(days=config.MARKET_DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    if (end - start).days >= config.MARKET_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=422, detail=f"At most {config.MARKET_MAX_RANGE_DAYS} days per query")
+
+    if not len(sids):
+        data = []
+        if view == "compare":
+            data = {"markets": [], "average_modal": None,
+                    "daily": {"dates": [], "low": [], "mean": [], "high": [], "markets": []}}
+    else:
+        with span("market_query"):
+            if view == "history":
+                data = market_prices.history(sids, start, end, window)
+            elif view == "summary":
+                data = market_prices.summary(sids, start, end)
+            else:
+                data = market_prices.compare(sids, start, end)
+    return {
+        "success": True,
+        "data": data,
+        "commodity": comm,
+        "view": view,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }
 
 # --- HELPER: SMART CROP ENGINE ---
 def get_smart_recommendations(soil_type, season, water_avail_mm):
@@ -661,130 +1120,183 @@ def get_smart_recommendations(soil_type, season, water_avail_mm):
     Central Logic for Crop Recommendation Engine.
     Returns sorted list of matching crops with environmental insights.
     """
-    effective_soil = "medium"
-    st = soil_type.lower()
-    if "black" in st or "clay" in st or "heavy" in st: effective_soil = "heavy"
-    elif "red" in st or "light" in st or "sandy" in st: effective_soil = "light"
-    
     # Determine abstract water status for scoring
     water_status = "Safe"
     if water_avail_mm < 300: water_status = "Critical"
     elif water_avail_mm < 600: water_status = "Moderate"
 
+    index = catalogue.current.index
+    soil_ok = index.soil_matches(soil_type)
+
+    # Candidates come pre-filtered by season and sorted by water need, so each
+    # status only looks at crops that can still reach the cut-off (score >= 50):
+    # Critical: < 400mm  -> 90 with soil match, 50 without
+    # Moderate: < 800mm  -> 70, soil match required
+    # Safe:     any      -> 60, soil match required
+    scored = []
+    if water_status == "Critical":
+        for i in index.season_crops_below(season, 400):
+            scored.append((90 if i in soil_ok else 50, i, "Drought Resistant 🌵"))
+    elif water_status == "Moderate":
+        for i in index.season_crops_below(season, 800):
+            if i in soil_ok: scored.append((70, i, "Good Water Fit 💧"))
+    else: # Safe
+        for i in index.season_crops_below(season):
+            if i in soil_ok: scored.append((60, i, "Ample Water ✅"))
+
+    # Sort by score desc (catalogue order breaks ties)
+    scored.sort(key=lambda x: (-x[0], x[1]))
+
     recommended = []
-    
-    # Ensure Global DB is accessible (it's defined at module level)
-    # We will ensure CROP_DATABASE is defined before usage or python handles it if global.
-    
-    for crop in CROP_DATABASE:
-        score = 0
-        reasons = []
-        
-        # 1. Season Check (Skip if mismatch)
-        if crop["season"] != "Annual" and season not in crop["season"]:
-            continue 
-            
-        # 2. Soil Match
-        soil_match = False
-        for s in crop["soil"]:
-            if effective_soil == "heavy" and s in ["Clay", "Black", "Heavy"]: soil_match = True
-            elif effective_soil == "light" and s in ["Sandy", "Light", "Red"]: soil_match = True
-            elif s.lower() in st: soil_match = True
-        
-        if soil_match:
-            score += 40
-            reasons.append("Great Soil Match")
-        else:
-            reasons.append("Soil Tolerable")
-            
-        # 3. Water Match
-        needed = crop["water_mm"]
-        if water_status == "Critical":
-            if needed < 400: 
-                score += 50; reasons.append("Drought Resistant 🌵")
-            else: 
-                score -= 50; reasons.append("Requires too much water ⚠️")
-        elif water_status == "Moderate":
-            if needed < 800: score += 30; reasons.append("Good Water Fit 💧")
-        else: # Safe
-            score += 20; reasons.append("Ample Water ✅")
-            
-        # 4. Filter Low Scores
-        if score >= 50:
-            # Get seed costs (with fallback)
-            costs = SEED_COSTS.get(crop["name"], {"seed_per_kg": 100, "input_per_acre": 15000})
-            recommended.append({
-                "name": crop["name"],
-                "score": score,
-                "type": crop["type"],
-                "water_req": f"{needed}mm",
-                "sunlight": crop.get("sunlight", "Full Sun"),
-                "temperature": crop.get("temperature", "20-30°C"),
-                "climate": crop.get("climate", "Varied"),
-                "reasons": reasons,
-                "seed_cost_per_kg": costs["seed_per_kg"],
-                "input_cost_per_acre": costs["input_per_acre"]
-            })
-            
-    # Sort by score desc
-    recommended.sort(key=lambda x: x["score"], reverse=True)
-    return recommended[:5]
+    for score, i, water_reason in scored[:5]:
+        crop = index.crops[i]
+        recommended.append({
+            "name": crop.name,
+            "score": score,
+            "type": crop.type,
+            "water_req": f"{crop.water_mm}mm",
+            "sunlight": crop.sunlight,
+            "temperature": crop.temperature,
+            "climate": crop.climate,
+            "reasons": ["Great Soil Match" if i in soil_ok else "Soil Tolerable", water_reason],
+            "seed_cost_per_kg": crop.seed_per_kg,
+            "input_cost_per_acre": crop.input_per_acre
+        })
+    return recommended
 
-@app.post("/api/water-balance")
-async def get_water_balance(request: WaterBalanceRequest):
+
+async def resolve_location(request: WaterBalanceRequest, batch: bool = False):
+    """
+    Coordinates, place name (if geocoded) and pincode for a water-balance
+    request; the pincode is the request's unless a local match supplies one.
+    Batch lookups try an exact match in the local place directory first and
+    queue for Nominatim instead of failing fast.
+    Raises HTTPException 422 if the request names no location, 404 if the
+    place is unknown, 503 if Nominatim is busy or failing.
+    """
     lat, lng = request.lat, request.lng
-    region_name = None
-    pincode_found = request.pincode
-    
-    # 1. Resolve Location
+    region_name, pincode = None, request.pincode
     if not (lat and lng):
         query = request.query or request.pincode
+        place = PLACE_INDEX.exact(query) if batch and query else None
+        if place:
+            return place["lat"], place["lng"], place["city"], place.get("pincode") or pincode
         if query:
-            loc_data = await get_coordinates(query)
+            try:
+                loc_data = await get_coordinates(query, batch)
+            except RateLimitExceeded:
+                raise HTTPException(status_code=503, detail="Location service busy, please retry")
+            except (CircuitOpen, httpx.HTTPError):
+                raise HTTPException(status_code=503, detail="Location service unavailable, please retry")
             if loc_data:
                 lat = loc_data['lat']
                 lng = loc_data['lng']
                 region_name = loc_data['display_name'].split(",")[0]
             else:
                 raise HTTPException(status_code=404, detail="Location not found")
+    if lat is None or lng is None:
+        raise HTTPException(status_code=422, detail="Give a query, pincode, or both lat and lng")
+    return lat, lng, region_name, pincode
+
+@app.post("/api/water-balance")
+async def get_water_balance(request: WaterBalanceRequest):
+    # 1. Resolve Location
+    with span("resolve_location"):
+        lat, lng, region_name, pincode_found = await resolve_location(request)
+    stale = track_stale()
     
+    # 2. Fan out: reverse geocode, 30-day rain and 7-day forecast are
+    # independent once we have coordinates, so fetch them concurrently
+    branches = {
+        "rain_30d": get_weather_real(lat, lng),
+        "forecast": get_weather_forecast(lat, lng),
+    }
     if not region_name and lat and lng:
-         r_name, r_pin = await reverse_geocode(lat, lng)
+        branches["reverse_geocode"] = reverse_geocode(lat, lng)
+    fallbacks = {"rain_30d": None, "forecast": [], "reverse_geocode": (None, None)}
+    with span("fanout"):
+        results, degraded = await gather_with_deadline(branches, fallbacks, config.WATER_BALANCE_DEADLINE)
+    if results["rain_30d"] is None and "rain_30d" not in degraded:
+        degraded.append("rain_30d")
+    if not results["forecast"] and "forecast" not in degraded:
+        degraded.append("forecast")
+
+    if "reverse_geocode" in results:
+         r_name, r_pin = results["reverse_geocode"]
          if r_name: region_name = r_name
          if r_pin: pincode_found = r_pin
-    
+
+    with span("report"):
+        data = build_water_report(
+            lat, lng, region_name, pincode_found, request.soil_type,
+            results["rain_30d"], results["forecast"], degraded, stale=sorted(stale),
+        )
+    return {"success": True, "data": data}
+
+def soil_retention(soil_type):
+    """Retention class of a catalogue soil, else guessed from its name."""
+    st = (soil_type or "").lower()
+    for soil in catalogue.current.soils:
+        if soil.name.lower() == st:
+            return soil.retention
+    return retention_from_text(soil_type)
+
+def soil_water_balance(daily_rain_series, soil_types):
+    """Run the daily soil bucket for many locations at once; one dict per location."""
+    retentions = [soil_retention(st) for st in soil_types]
+    out = run_bucket(rain_matrix(daily_rain_series), retentions)
+    return [
+        {
+            "retention": retention,
+            "soil_moisture_mm": round(float(out["soil_moisture"][i]), 1),
+            "recharge_mm": round(float(out["recharge"][i]), 1),
+            "runoff_mm": round(float(out["runoff"][i]), 1),
+            "et_mm": round(float(out["et"][i]), 1),
+        }
+        for i, retention in enumerate(retentions)
+    ]
+
+def build_water_report(lat, lng, region_name, pincode_found, soil_type, daily_rain, forecast, degraded,
+                       soil_water=None, stale=()):
+    """
+    Water balance, advice and recommendations from already-fetched data.
+    `daily_rain` is None when no rain data was available (reported as degraded).
+    """
     if not region_name: region_name = f"GPS ({lat:.2f}, {lng:.2f})"
 
-    # 2. Water Data
-    real_rain_30d = await get_weather_real(lat, lng)
+    # 3. Water Data: daily soil bucket over the last 30 days of rain
+    if soil_water is None:
+        with span("soil_bucket"):
+            soil_water = soil_water_balance([daily_rain or []], [soil_type])[0]
+    real_rain_30d = sum(daily_rain) if daily_rain is not None else None
     base_groundwater = 500 
-    evaporation_loss = 150
-    water_balance = max(0, base_groundwater + real_rain_30d - evaporation_loss)
+    groundwater_draw = 150 # Monthly pumping + baseflow; soil evaporation is in the bucket
+    water_balance = max(0, base_groundwater + soil_water["soil_moisture_mm"] + soil_water["recharge_mm"] - groundwater_draw)
     
-    # 3. Status
+    # 4. Status
     status = "Safe"
     if water_balance < 300: status = "Critical"
     elif water_balance < 600: status = "Moderate"
         
-    # 4. Soil Advice
+    # 5. Soil Advice
     soil_advice = "Standard irrigation."
-    if request.soil_type:
-        st = request.soil_type.lower()
+    if soil_type:
+        st = soil_type.lower()
         if "black" in st or "clay" in st: soil_advice = "Retains water well. Delay irrigation."
         elif "sandy" in st or "light" in st: soil_advice = "Drains fast. Frequent light irrigation."
 
-    # 5. Season
+    # 6. Season
     curr_month = datetime.datetime.now().month
     season = "Kharif" if 6 <= curr_month <= 10 else "Rabi" if (curr_month >= 11 or curr_month <= 2) else "Zaid"
 
-    # 6. SMART RECOMMENDATIONS (Using shared logic)
-    smart_recs = get_smart_recommendations(request.soil_type or "Medium", season, water_balance)
+    # 7. SMART RECOMMENDATIONS (Using shared logic)
+    with span("recommend"):
+        smart_recs = get_smart_recommendations(soil_type or "Medium", season, water_balance)
     
     # Legacy list for old UI support (names only)
     legacy_recs = [r["name"] for r in smart_recs]
 
-    # 7. Get 7-Day Forecast
-    forecast = await get_weather_forecast(lat, lng)
+    # 8. 7-Day Forecast summary
     rain_days = sum(1 for day in forecast if day.get('rain_mm', 0) > 5)
     total_rain = sum(day.get('rain_mm', 0) for day in forecast)
     
@@ -796,8 +1308,6 @@ async def get_water_balance(request: WaterBalanceRequest):
     final_advice = f"Water Balance: {water_balance:.0f}mm. {soil_advice}"
 
     return {
-        "success": True,
-        "data": {
             "pincode": pincode_found or "Unknown",
             "available_water_mm": int(water_balance),
             "status": status,
@@ -809,266 +1319,151 @@ async def get_water_balance(request: WaterBalanceRequest):
             "smart_recommendations": smart_recs,
             "lat": lat,
             "lng": lng,
+            "rain_30d_mm": round(real_rain_30d, 1) if real_rain_30d is not None else None,
+            "soil_water": soil_water,
             "forecast": forecast,
             "forecast_summary": {
                 "rain_days": rain_days,
                 "total_rain_mm": round(total_rain, 1),
                 "advice": forecast_advice
-            }
-        }
+            },
+            # Which upstream branches fell back to defaults (timeout/error)
+            "partial": bool(degraded),
+            "degraded": degraded,
+            # Which sources were served from the last known good value
+            "stale": bool(stale),
+            "stale_sources": list(stale)
     }
 
-# --- SEED COSTS & INPUT COSTS DATABASE ---
-SEED_COSTS = {
-    # Cereals (price per kg of seed, input cost per acre in INR)
-    "Rice (Paddy)": {"seed_per_kg": 80, "input_per_acre": 18000},
-    "Wheat": {"seed_per_kg": 45, "input_per_acre": 12000},
-    "Jowar (Sorghum)": {"seed_per_kg": 60, "input_per_acre": 8000},
-    "Bajra (Pearl Millet)": {"seed_per_kg": 50, "input_per_acre": 7000},
-    "Maize (Corn)": {"seed_per_kg": 350, "input_per_acre": 15000},
-    "Ragi (Finger Millet)": {"seed_per_kg": 70, "input_per_acre": 9000},
-    
-    # Pulses
-    "Tur (Arhar/Pigeon Pea)": {"seed_per_kg": 120, "input_per_acre": 10000},
-    "Gram (Chana/Chickpea)": {"seed_per_kg": 80, "input_per_acre": 9000},
-    "Moong (Green Gram)": {"seed_per_kg": 150, "input_per_acre": 8000},
-    "Urad (Black Gram)": {"seed_per_kg": 140, "input_per_acre": 8500},
-    
-    # Cash Crops
-    "Sugarcane": {"seed_per_kg": 5, "input_per_acre": 45000},  # per cutting
-    "Cotton": {"seed_per_kg": 800, "input_per_acre": 25000},
-    "Soybean": {"seed_per_kg": 90, "input_per_acre": 12000},
-    "Groundnut": {"seed_per_kg": 120, "input_per_acre": 15000},
-    "Sunflower": {"seed_per_kg": 200, "input_per_acre": 11000},
-    "Mustard": {"seed_per_kg": 100, "input_per_acre": 8000},
-    
-    # Vegetables
-    "Onion": {"seed_per_kg": 1500, "input_per_acre": 35000},
-    "Potato": {"seed_per_kg": 35, "input_per_acre": 40000},
-    "Tomato": {"seed_per_kg": 2500, "input_per_acre": 50000},
-    "Brinjal (Eggplant)": {"seed_per_kg": 3000, "input_per_acre": 45000},
-    "Okra (Bhindi)": {"seed_per_kg": 800, "input_per_acre": 25000},
-    "Cabbage": {"seed_per_kg": 2000, "input_per_acre": 35000},
-    
-    # Fruits (per saplings/plants)
-    "Mango": {"seed_per_kg": 150, "input_per_acre": 80000},
-    "Banana": {"seed_per_kg": 25, "input_per_acre": 60000},
-    "Grapes": {"seed_per_kg": 50, "input_per_acre": 150000},
-    "Pomegranate": {"seed_per_kg": 100, "input_per_acre": 100000},
-    "Orange": {"seed_per_kg": 80, "input_per_acre": 70000},
-}
+# --- BATCH WATER BALANCE (district dashboards) ---
+class WaterBalanceBatchRequest(BaseModel):
+    items: List[WaterBalanceRequest]
 
-# --- CUSTOM CROP DATABASE (Source of Truth) ---
-CROP_DATABASE = [
-    # Cereals & Millets
-    {
-        "name": "Rice (Paddy)", "water_mm": 1200, "season": "Kharif", "type": "Cereal", "soil": ["Clay", "Heavy"],
-        "sunlight": "Full Sun", "temperature": "20-35°C", "climate": "Humid & Tropical"
-    },
-    {
-        "name": "Wheat", "water_mm": 450, "season": "Rabi", "type": "Cereal", "soil": ["Medium", "Heavy"],
-        "sunlight": "Full Sun", "temperature": "10-25°C", "climate": "Cool & Dry"
-    },
-    {
-        "name": "Jowar (Sorghum)", "water_mm": 400, "season": "Kharif/Rabi", "type": "Millet", "soil": ["Medium", "Light", "Black"],
-        "sunlight": "Full Sun", "temperature": "25-35°C", "climate": "Hot & Dry"
-    },
-    {
-        "name": "Bajra (Pearl Millet)", "water_mm": 350, "season": "Kharif", "type": "Millet", "soil": ["Light", "Sandy"],
-        "sunlight": "Full Sun", "temperature": "25-35°C", "climate": "Hot & Arid"
-    },
-    {
-        "name": "Maize (Corn)", "water_mm": 500, "season": "Kharif/Rabi", "type": "Cereal", "soil": ["Medium", "Red"],
-        "sunlight": "Full Sun", "temperature": "18-27°C", "climate": "Warm"
-    },
-    {
-        "name": "Ragi (Finger Millet)", "water_mm": 350, "season": "Kharif", "type": "Millet", "soil": ["Red", "Light"],
-        "sunlight": "Full Sun", "temperature": "20-30°C", "climate": "Tropical/Subtropical"
-    },
-    
-    # Pulses (Dal)
-    {
-        "name": "Tur (Arhar/Pigeon Pea)", "water_mm": 500, "season": "Kharif", "type": "Pulse", "soil": ["Medium", "Black"],
-        "sunlight": "Full Sun", "temperature": "25-30°C", "climate": "Semi-Arid"
-    },
-    {
-        "name": "Gram (Chana/Chickpea)", "water_mm": 300, "season": "Rabi", "type": "Pulse", "soil": ["Medium", "Black"],
-        "sunlight": "Full Sun", "temperature": "15-25°C", "climate": "Cool & Dry"
-    },
-    {
-        "name": "Moong (Green Gram)", "water_mm": 300, "season": "Kharif/Zaid", "type": "Pulse", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "25-35°C", "climate": "Warm"
-    },
-    {
-        "name": "Urad (Black Gram)", "water_mm": 350, "season": "Kharif", "type": "Pulse", "soil": ["Medium", "Heavy"],
-        "sunlight": "Full Sun", "temperature": "25-35°C", "climate": "Warm & Humid"
-    },
-    
-    # Oilseeds & Cash Crops
-    {
-        "name": "Sugarcane", "water_mm": 1800, "season": "Annual", "type": "Cash Crop", "soil": ["Heavy", "Black"],
-        "sunlight": "Full Sun", "temperature": "20-35°C", "climate": "Tropical & Humid"
-    },
-    {
-        "name": "Cotton", "water_mm": 700, "season": "Kharif", "type": "Cash Crop", "soil": ["Black", "Medium"],
-        "sunlight": "Full Sun", "temperature": "21-30°C", "climate": "Warm & Semi-Arid"
-    },
-    {
-        "name": "Soybean", "water_mm": 500, "season": "Kharif", "type": "Oilseed", "soil": ["Medium", "Black"],
-        "sunlight": "Full Sun", "temperature": "20-30°C", "climate": "Warm & Moist"
-    },
-    {
-        "name": "Groundnut", "water_mm": 500, "season": "Kharif", "type": "Oilseed", "soil": ["Light", "Sandy"],
-        "sunlight": "Full Sun", "temperature": "25-30°C", "climate": "Tropics"
-    },
-    {
-        "name": "Sunflower", "water_mm": 450, "season": "Kharif/Rabi", "type": "Oilseed", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "20-25°C", "climate": "Adaptable"
-    },
-    {
-        "name": "Mustard", "water_mm": 300, "season": "Rabi", "type": "Oilseed", "soil": ["Medium", "Light"],
-        "sunlight": "Full Sun", "temperature": "10-25°C", "climate": "Cool"
-    },
-    
-    # Vegetables (Updated with specifics)
-    {
-        "name": "Onion", "water_mm": 500, "season": "Rabi/Kharif", "type": "Vegetable", "soil": ["Medium", "Light"],
-        "sunlight": "Full Sun", "temperature": "15-25°C", "climate": "Mild"
-    },
-    {
-        "name": "Potato", "water_mm": 500, "season": "Rabi", "type": "Vegetable", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "15-20°C", "climate": "Cool"
-    },
-    {
-        "name": "Tomato", "water_mm": 600, "season": "Annual", "type": "Vegetable", "soil": ["Medium", "Red"],
-        "sunlight": "Full Sun", "temperature": "20-30°C", "climate": "Warm"
-    },
-    {
-        "name": "Brinjal (Eggplant)", "water_mm": 600, "season": "Annual", "type": "Vegetable", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "25-30°C", "climate": "Warm"
-    },
-    {
-        "name": "Okra (Bhindi)", "water_mm": 400, "season": "Kharif/Zaid", "type": "Vegetable", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "22-35°C", "climate": "Warm"
-    },
-    {
-        "name": "Cabbage", "water_mm": 400, "season": "Rabi", "type": "Vegetable", "soil": ["Medium"],
-        "sunlight": "Part Sun", "temperature": "15-20°C", "climate": "Cool & Moist"
-    },
-    
-    # Fruits
-    {
-        "name": "Banana", "water_mm": 1500, "season": "Annual", "type": "Fruit", "soil": ["Medium", "Heavy"],
-        "sunlight": "Full Sun", "temperature": "25-30°C", "climate": "Tropical Humid"
-    },
-    {
-        "name": "Mango", "water_mm": 1000, "season": "Annual", "type": "Fruit", "soil": ["Medium", "Red"],
-        "sunlight": "Full Sun", "temperature": "24-30°C", "climate": "Tropical"
-    },
-    {
-        "name": "Grapes", "water_mm": 700, "season": "Annual", "type": "Fruit", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "15-35°C", "climate": "Dry/Mediterranean"
-    },
-    {
-        "name": "Pomegranate", "water_mm": 600, "season": "Annual", "type": "Fruit", "soil": ["Light", "Red"],
-        "sunlight": "Full Sun", "temperature": "25-35°C", "climate": "Semi-Arid"
-    },
-    {
-        "name": "Papaya", "water_mm": 1000, "season": "Annual", "type": "Fruit", "soil": ["Medium"],
-        "sunlight": "Full Sun", "temperature": "25-30°C", "climate": "Tropical"
-    }
-]
+@app.post("/api/water-balance/batch")
+async def get_water_balance_batch(request: WaterBalanceBatchRequest):
+    """
+    Water balance for many villages in one call.
+    Locations resolve with bounded concurrency, from the local directory
+    where possible; lookups that need Nominatim wait in line for its 1 req/s
+    budget, so each uncached place adds about a second. Weather for all
+    distinct grid cells is fetched with multi-location Open-Meteo requests.
+    Each result has the same shape as /api/water-balance, or an error for
+    that item only.
+    """
+    if len(request.items) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {config.BATCH_MAX_ITEMS} items per batch")
+    sem = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+
+    async def resolve(item):
+        async with sem:
+            try:
+                lat, lng, region_name, pincode = await resolve_location(item, batch=True)
+            except HTTPException as e:
+                return {"error": e.detail}
+            if not region_name and lat and lng:
+                r_name, r_pin = await reverse_geocode(lat, lng, batch=True)
+                region_name = r_name
+                pincode = r_pin or pincode
+            return {"lat": lat, "lng": lng, "region": region_name, "pincode": pincode}
 
-# --- CUSTOM SOIL DATABASE (Source of Truth) ---
-SOIL_DATABASE = [
-    {
-        "name": "Black Soil (Regur/Kali) - Heavy",
-        "type": "heavy", 
-        "retention": "high",
-        "desc": "High water retention. Good for Cotton, Sugarcane."
-    },
-    {
-        "name": "Red Soil (Lal) - Light",
-        "type": "light", 
-        "retention": "low",
-        "desc": "Porous, low retention. Good for Groundnut, Millets."
-    },
-    {
-        "name": "Medium Soil (Loam/Domat) - Balanced",
-        "type": "medium", 
-        "retention": "medium",
-        "desc": "Balanced moisture. Good for Vegetables, Wheat, Pulses."
-    },
-    {
-        "name": "Alluvial Soil (Zalod) - Fertile",
-        "type": "medium", 
-        "retention": "medium",
-        "desc": "Very fertile river soil. Great for Rice, Wheat."
-    },
-    {
-        "name": "Laterite Soil (Jambhi) - Acidic",
-        "type": "light", 
-        "retention": "low",
-        "desc": "Iron-rich, rocky. Good for Cashew, Mango."
-    },
-    {
-        "name": "Clay Soil (Chikani) - Very Heavy",
-        "type": "heavy", 
-        "retention": "very_high",
-        "desc": "Holds water too long. Risk of root rot if not drained."
-    },
-    {
-        "name": "Sandy Soil (Retili) - Very Light",
-        "type": "light", 
-        "retention": "very_low",
-        "desc": "Drains instantly. Needs frequent irrigation. Good for Melons."
+    # 1. Resolve all locations
+    resolved = await asyncio.gather(*[resolve(item) for item in request.items])
+
+    # 2. Weather for every distinct grid cell, in multi-location requests
+    cells = {
+        grid_cell(r["lat"], r["lng"], config.WEATHER_CACHE_GRID_DEG)
+        for r in resolved if "error" not in r
     }
-]
+    rain, forecasts, stale = await fetch_weather_many(cells, sem)
+
+    # 3. Soil bucket for every village in one vectorised run
+    ok = [(item, loc, grid_cell(loc["lat"], loc["lng"], config.WEATHER_CACHE_GRID_DEG))
+          for item, loc in zip(request.items, resolved) if "error" not in loc]
+    soil_water = iter(soil_water_balance(
+        [rain.get(cell) or [] for _, _, cell in ok], [item.soil_type for item, _, _ in ok]))
+
+    # 4. Per-village reports
+    results = []
+    for item, loc in zip(request.items, resolved):
+        if "error" in loc:
+            results.append({"success": False, "error": loc["error"]})
+            continue
+        cell = grid_cell(loc["lat"], loc["lng"], config.WEATHER_CACHE_GRID_DEG)
+        degraded = [name for name, got in (("rain_30d", rain), ("forecast", forecasts)) if cell not in got]
+        data = build_water_report(
+            loc["lat"], loc["lng"], loc["region"], loc["pincode"], item.soil_type,
+            rain.get(cell), forecasts.get(cell, []), degraded, next(soil_water), stale.get(cell, []),
+        )
+        results.append({"success": True, "data": data})
+    return {"success": True, "count": len(results), "results": results}
+
+# --- CROP / SOIL / MARKET CATALOGUE (data/catalogue.json) ---
+# Requests read catalogue.current once; a reload swaps in a complete new one
+catalogue = CatalogueStore(config.CATALOGUE_FILE, config.CATALOGUE_MAX_AGE)
+
+# Daily price history per commodity x market (optional CSV, see config)
+market_prices = MarketPriceStore.load_csv(config.MARKET_PRICES_FILE)
+
+@app.post("/api/admin/reload-catalogue")
+def reload_catalogue(request: Request):
+    """Reload data/catalogue.json now. In-flight requests finish on the old version."""
+    token = request.headers.get("x-admin-token", "")
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        catalogue.reload()
+    except CatalogueError as e:
+        raise HTTPException(status_code=422, detail=f"Catalogue not reloaded: {e}")
+    return {"success": True, **catalogue.stats()}
 
 @app.get("/api/crops")
-def get_all_crops():
+async def get_all_crops(request: Request):
     """Return the full list of supported crops."""
-    return {"success": True, "data": CROP_DATABASE}
+    return catalogue.current.crops_response.respond(request)
 
 @app.get("/api/soils")
-def get_all_soils():
+async def get_all_soils(request: Request):
     """Return the list of supported soil types."""
-    return {"success": True, "data": SOIL_DATABASE}
+    return catalogue.current.soils_response.respond(request)
 
 @app.post("/api/check-crop")
 async def check_crop_viability(request: CheckCropRequest):
     # Find Crop in Database
-    crop_data = next((c for c in CROP_DATABASE if c["name"] == request.crop_name), None)
+    with span("crop_lookup"):
+        crop_data = catalogue.current.crop(request.crop_name)
     
-    if not crop_data:
-        # Fallback for manually typed or unknown crops
-        needed = 500
-        crop_type = "Unknown"
-        ideal_soils = []
-        season_rec = "Annual"
-    else:
-        needed = crop_data["water_mm"]
-        crop_type = crop_data["type"]
-        ideal_soils = [s.lower() for s in crop_data.get("soil", [])]
-        season_rec = crop_data["season"]
+        if not crop_data:
+            # Fallback for manually typed or unknown crops
+            needed = 500
+            crop_type = "Unknown"
+            ideal_soils = []
+            season_rec = "Annual"
+        else:
+            needed = crop_data.water_mm
+            crop_type = crop_data.type
+            ideal_soils = [s.lower() for s in crop_data.soils.labels()]
+            season_rec = crop_data.season
 
     available = request.available_water_mm
     
     # Soil Check
-    soil_ok = True
-    soil_warning = ""
-    if request.soil_type:
-        user_soil = request.soil_type.lower()
+    with span("soil_check"):
+        soil_ok = True
+        soil_warning = ""
+        if request.soil_type:
+            user_soil = request.soil_type.lower()
         
-        # Simple Logic: If crop has specific soil needs, check against them
-        if ideal_soils:
-            # Check for strong mismatches
-            if "clay" in ideal_soils and ("sandy" in user_soil or "light" in user_soil):
-                soil_ok = False
-                soil_warning = f"{request.crop_name} needs Heavy/Clay soil, but you have Light soil."
-            elif "sandy" in ideal_soils and ("clay" in user_soil or "heavy" in user_soil):
-                soil_ok = False
-                soil_warning = f"{request.crop_name} needs Light/Sandy soil, avoiding waterlogging."
+            # Simple Logic: If crop has specific soil needs, check against them
+            if ideal_soils:
+                # Check for strong mismatches
+                if "clay" in ideal_soils and ("sandy" in user_soil or "light" in user_soil):
+                    soil_ok = False
+                    soil_warning = f"{request.crop_name} needs Heavy/Clay soil, but you have Light soil."
+                elif "sandy" in ideal_soils and ("clay" in user_soil or "heavy" in user_soil):
+                    soil_ok = False
+                    soil_warning = f"{request.crop_name} needs Light/Sandy soil, avoiding waterlogging."
 
     is_feasible = available >= needed and soil_ok
     shortfall = needed - available
@@ -1084,17 +1479,18 @@ async def check_crop_viability(request: CheckCropRequest):
         smart_advice.append(f"⚠️ {request.crop_name} is a {season_rec} crop, but currently it's {current_season}. Yield may be low.")
     
     # 2. Weather Check (if location provided)
-    if request.lat and request.lng:
-        forecast = await get_weather_forecast(request.lat, request.lng)
-        rain_days = sum(1 for day in forecast if day.get('rain_mm', 0) > 5)
-        total_rain = sum(day.get('rain_mm', 0) for day in forecast)
+    with span("weather_advice"):
+        if request.lat and request.lng:
+            forecast = await get_weather_forecast(request.lat, request.lng)
+            rain_days = sum(1 for day in forecast if day.get('rain_mm', 0) > 5)
+            total_rain = sum(day.get('rain_mm', 0) for day in forecast)
         
-        if rain_days >= 3:
-            smart_advice.append("🌧️ Heavy rain alert! Delay sowing/spraying.")
-        elif total_rain < 5 and available < needed:
-            smart_advice.append("☀️ Dry week ahead. Ensure irrigation is planned.")
-        elif total_rain > 20 and crop_type == "Pulse":
-             smart_advice.append("💧 Excess rain warning for Pulses. Ensure drainage.")
+            if rain_days >= 3:
+                smart_advice.append("🌧️ Heavy rain alert! Delay sowing/spraying.")
+            elif total_rain < 5 and available < needed:
+                smart_advice.append("☀️ Dry week ahead. Ensure irrigation is planned.")
+            elif total_rain > 20 and crop_type == "Pulse":
+                 smart_advice.append("💧 Excess rain warning for Pulses. Ensure drainage.")
 
     extra_msg = " ".join(smart_advice)
     
@@ -1119,6 +1515,30 @@ async def check_crop_viability(request: CheckCropRequest):
         "data": {
             "needed": needed,
             "available": available,
-            "crop_details": crop_data
+            "crop_details": crop_data.to_dict() if crop_data else None
         }
     }
+
+@app.post("/api/check-crop/stream")
+async def check_crop_stream(request: Request):
+    """
+    Screen an uploaded plot list (CSV with a header line, or NDJSON) with the
+    same logic as /api/check-crop. Results go out as NDJSON, one line per row
+    as soon as it is ready. The body is read only as fast as results are
+    sent, so a slow client throttles the upload instead of filling memory.
+    """
+    async def results():
+        row_no = 0
+        async for row in iter_rows(request.stream(), request.headers.get("content-type", "")):
+            row_no += 1
+            if "_error" in row:
+                result = {"success": False, "error": row["_error"]}
+            else:
+                try:
+                    result = await check_crop_viability(CheckCropRequest(**row))
+                except ValidationError as e:
+                    result = {"success": False, "error": "; ".join(
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())}
+            yield json_dumps({"row": row_no, **result}) + b"\n"
+
+    return BodyStreamingResponse(results(), media_type="application/x-ndjson")
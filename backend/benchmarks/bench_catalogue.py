@@ -0,0 +1,39 @@
+"""
+Memory per crop record and lookup cost: plain dicts (the old CROP_DATABASE
+shape) vs the catalogue's slotted Crop records.
+
+    cd backend && python -m benchmarks.bench_catalogue
+"""
+import json
+import sys
+import timeit
+
+from app import config
+from app.logic.catalogue import load_catalogue
+
+
+def record_bytes(record) -> int:
+    """Size of a record and the containers it owns. Strings, ints and flag
+    values are shared between records (interned/cached), so not counted."""
+    if isinstance(record, dict):
+        return sys.getsizeof(record) + sum(sys.getsizeof(v) for v in record.values() if isinstance(v, list))
+    return sys.getsizeof(record)
+
+
+if __name__ == "__main__":
+    catalogue = load_catalogue(config.CATALOGUE_FILE)
+    raw = json.loads(config.CATALOGUE_FILE.read_text(encoding="utf-8"))["crops"]
+    crops = catalogue.crops
+
+    as_dict = sum(map(record_bytes, raw)) / len(raw)
+    as_record = sum(map(record_bytes, crops)) / len(crops)
+    print(f"crop records: {len(crops)}")
+    print(f"dict + soil list   {as_dict:7.1f} bytes/record")
+    print(f"slotted Crop       {as_record:7.1f} bytes/record   ({as_record / as_dict:.0%} of dict)")
+
+    by_name = {c["name"]: c for c in raw}
+    names = [c["name"] for c in raw]
+    n = 200000
+    t_dict = timeit.timeit(lambda: [by_name[x]["water_mm"] for x in names], number=n // len(names))
+    t_rec = timeit.timeit(lambda: [catalogue.crops[catalogue.ids[x]].water_mm for x in names], number=n // len(names))
+    print(f"name -> water_mm   dict {t_dict / n * 1e9:6.1f} ns   id table + record {t_rec / n * 1e9:6.1f} ns")
@@ -0,0 +1,52 @@
+"""
+Per-response JSON encoding cost: FastAPI's default path (jsonable_encoder +
+JSONResponse) vs FastJSONResponse, on a realistic /api/water-balance payload
+and a 200-village batch.
+
+    cd backend && python -m benchmarks.bench_json
+"""
+import datetime
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.logic.fast_json import FastJSONResponse, orjson
+from app.main import WEATHER_CODES, build_water_report
+
+
+def water_balance_payload(i: int = 0) -> dict:
+    today = datetime.date.today()
+    forecast = [
+        {
+            "date": str(today + datetime.timedelta(days=d)),
+            "day": (today + datetime.timedelta(days=d)).strftime("%a"),
+            "icon": WEATHER_CODES[61][0],
+            "condition": WEATHER_CODES[61][1],
+            "temp_max": 31.4 + d * 0.1,
+            "temp_min": 21.2,
+            "rain_mm": 6.3 * (d % 3),
+            "wind_kmh": 12.5,
+        }
+        for d in range(7)
+    ]
+    daily_rain = [(d % 5) * 2.7 for d in range(31)]
+    data = build_water_report(18.52 + i * 0.01, 73.85, "पुणे (Pune)", "411001", "Black Soil",
+                              daily_rain, forecast, [])
+    return {"success": True, "data": data}
+
+
+def bench(name, payload, number):
+    default = timeit.timeit(lambda: JSONResponse(jsonable_encoder(payload)).body, number=number) / number
+    fast = timeit.timeit(lambda: FastJSONResponse(payload).body, number=number) / number
+    same = JSONResponse(jsonable_encoder(payload)).body == FastJSONResponse(payload).body
+    print(f"{name:<28} default {default * 1e6:9.1f} us   fast {fast * 1e6:8.1f} us   "
+          f"x{default / fast:5.1f}   identical bytes: {same}")
+
+
+if __name__ == "__main__":
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}")
+    single = water_balance_payload()
+    bench("water-balance (1 village)", single, 2000)
+    batch = {"success": True, "count": 200, "results": [water_balance_payload(i) for i in range(200)]}
+    bench("water-balance/batch (200)", batch, 20)
@@ -0,0 +1,93 @@
+"""
+Market price store query cost on a synthetic year of daily prices for every
+Maharashtra APMC (~300 markets) and the catalogue's commodities.
+
+    cd backend && python -m benchmarks.bench_market
+    python -m benchmarks.bench_market --write-csv data/market_prices.csv   # sample file for MARKET_PRICES_FILE
+"""
+import argparse
+import csv
+import datetime
+import time
+
+import numpy as np
+
+from app import config
+from app.logic.catalogue import load_catalogue
+from app.logic.market_store import MarketPriceStore, commodity_key
+
+MARKETS = 305
+DAYS = 365
+# Share of (market, day) pairs with a reported price; markets close on some
+# days and not every APMC trades every commodity daily
+REPORTED = 0.7
+
+
+def synthetic(commodities, markets=MARKETS, days=DAYS, end=datetime.date(2024, 2, 6), seed=0):
+    """Columns for MarketPriceStore.from_columns(): a random walk per series around a per-commodity base."""
+    rng = np.random.default_rng(seed)
+    c, m, d = (a.ravel() for a in np.meshgrid(np.arange(len(commodities)), np.arange(markets), np.arange(days),
+                                              indexing="ij"))
+    base = rng.uniform(2000, 8000, len(commodities))[c] * rng.uniform(0.9, 1.1, (len(commodities), markets))[c, m]
+    walk = np.cumsum(rng.normal(0, 0.01, (len(commodities), markets, days)), axis=2).ravel()
+    modal = np.round(base * np.exp(walk))
+    keep = rng.random(c.size) < REPORTED
+    c, m, d, modal = c[keep], m[keep], d[keep], modal[keep]
+    spread = np.round(modal * rng.uniform(0.03, 0.12, modal.size))
+    names = np.array([f"APMC {i:03d}" for i in range(markets)])
+    return (np.asarray(commodities)[c], names[m], np.full(c.size, "Maharashtra"),
+            end.toordinal() - days + 1 + d, modal - spread, modal + spread, modal)
+
+
+def write_csv(path, columns):
+    commodity, market, state, day, low, high, modal = columns
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["State", "Market", "Commodity", "Arrival_Date", "Min_Price", "Max_Price", "Modal_Price"])
+        for row in zip(state, market, commodity, day.tolist(), low.tolist(), high.tolist(), modal.tolist()):
+            writer.writerow([row[0], row[1], row[2], datetime.date.fromordinal(row[3]).strftime("%d/%m/%Y"),
+                             int(row[4]), int(row[5]), int(row[6])])
+
+
+def timed(fn, repeat=20) -> float:
+    """Best of `repeat` runs, in ms."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--write-csv", metavar="PATH", help="also write the synthetic data as an Agmarknet-style CSV")
+    args = parser.parse_args()
+
+    commodities = sorted({commodity_key(c.name) for c in load_catalogue(config.CATALOGUE_FILE).crops})
+    columns = synthetic(commodities)
+    t = time.perf_counter()
+    store = MarketPriceStore.from_columns(*columns)
+    print(f"build: {store.stats()} in {time.perf_counter() - t:.2f} s")
+    if args.write_csv:
+        write_csv(args.write_csv, columns)
+        t = time.perf_counter()
+        MarketPriceStore.load_csv(args.write_csv)
+        print(f"wrote {args.write_csv}; load_csv {time.perf_counter() - t:.2f} s")
+
+    end = datetime.date(2024, 2, 6)
+    year, month = end - datetime.timedelta(days=364), end - datetime.timedelta(days=29)
+    sids = store.series_for("Wheat")
+    few = store.series_for("Wheat", store.markets[:3])
+    cases = [
+        ("latest, all markets", lambda: store.latest(sids)),
+        ("history 30d, 3 markets, MA7", lambda: store.history(few, month, end, 7)),
+        ("history 1y, 3 markets, MA30", lambda: store.history(few, year, end, 30)),
+        ("history 1y, all markets", lambda: store.history(sids, year, end)),
+        ("summary 1y, all markets", lambda: store.summary(sids, year, end)),
+        ("compare 1y, all markets", lambda: store.compare(sids, year, end)),
+        ("compare 30d, all markets", lambda: store.compare(sids, month, end)),
+    ]
+    print(f"Wheat: {len(sids)} markets")
+    for name, fn in cases:
+        print(f"{name:30s} {timed(fn):8.2f} ms")
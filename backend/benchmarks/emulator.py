@@ -0,0 +1,118 @@
+"""
+Standalone Nominatim / Open-Meteo emulator for capacity tests.
+
+Serves the endpoints the backend calls (/search, /reverse, /v1/forecast with
+daily or hourly soil variables, /v1/archive) with the deterministic data from
+benchmarks.fake_upstreams, after a configurable delay.
+
+    cd backend && python -m benchmarks.emulator --port 8090 --workers 4 \\
+        --latency lognormal:80,0.5 --latency search=lognormal:400,0.6 --error-rate 0.01
+
+Point the backend at it (and lift the Nominatim usage-policy limiter):
+
+    NOMINATIM_URL=http://127.0.0.1:8090 OPEN_METEO_URL=http://127.0.0.1:8090 \\
+    OPEN_METEO_ARCHIVE_URL=http://127.0.0.1:8090 NOMINATIM_RATE_PER_S=100000 \\
+    NOMINATIM_BURST=100000 uvicorn app.main:app
+
+Latency specs are "fixed:MS", "uniform:LO-HI" or "lognormal:MEDIAN,SIGMA";
+prefix one with an endpoint name (search, reverse, forecast, soil, archive)
+to override the default for that endpoint only.
+"""
+import argparse
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI, Request, Response
+
+from app.logic.fast_json import FastJSONResponse
+from benchmarks import fake_upstreams
+from benchmarks.fake_upstreams import Latency
+
+ENDPOINTS = ("search", "reverse", "forecast", "soil", "archive")
+
+
+def parse_latencies(specs: str) -> dict:
+    """'lognormal:80,0.5;search=fixed:300' -> {endpoint: Latency}"""
+    default, overrides = Latency(), {}
+    for spec in filter(None, (s.strip() for s in specs.split(";"))):
+        name, sep, dist = spec.partition("=")
+        if not sep:
+            default = Latency.parse(spec)
+        elif name in ENDPOINTS:
+            overrides[name] = Latency.parse(dist)
+        else:
+            raise ValueError(f"unknown endpoint {name!r} in latency spec")
+    return {name: overrides.get(name, default) for name in ENDPOINTS}
+
+
+def create_app() -> FastAPI:
+    """App factory; settings come from EMULATOR_* variables so every worker sees them."""
+    latencies = parse_latencies(os.getenv("EMULATOR_LATENCY", "0"))
+    error_rate = float(os.getenv("EMULATOR_ERROR_RATE", 0))
+    rng = random.Random(int(os.getenv("EMULATOR_SEED", 0)) + os.getpid())
+
+    app = FastAPI(title="Upstream emulator", docs_url=None, redoc_url=None, openapi_url=None)
+
+    async def respond(endpoint: str, make_body):
+        delay = latencies[endpoint].sample(rng)
+        if delay:
+            await asyncio.sleep(delay)
+        if error_rate and rng.random() < error_rate:
+            return FastJSONResponse({"error": True, "reason": "injected failure"}, status_code=503)
+        return FastJSONResponse(make_body())
+
+    @app.get("/search")
+    async def search(q: str = "", limit: int = 10):
+        return await respond("search", lambda: fake_upstreams.search(q, min(limit, 50)))
+
+    @app.get("/reverse")
+    async def reverse(lat: float, lon: float):
+        return await respond("reverse", lambda: fake_upstreams.reverse(lat, lon))
+
+    @app.get("/v1/forecast")
+    async def forecast(request: Request):
+        params = request.query_params
+        if "latitude" not in params or "longitude" not in params:
+            return FastJSONResponse({"error": True, "reason": "latitude and longitude required"}, status_code=400)
+        endpoint = "soil" if "hourly" in params else "forecast"
+        return await respond(endpoint, lambda: fake_upstreams.open_meteo(request.url.path, params))
+
+    @app.get("/v1/archive")
+    async def archive(request: Request):
+        params = request.query_params
+        if not all(k in params for k in ("latitude", "longitude", "start_date", "end_date")):
+            return FastJSONResponse({"error": True, "reason": "latitude, longitude, start_date, end_date required"},
+                                    status_code=400)
+        return await respond("archive", lambda: fake_upstreams.open_meteo(request.url.path, params))
+
+    @app.get("/healthz")
+    def healthz():
+        return Response("ok")
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--latency", action="append", default=[],
+                        help="delay distribution, optionally ENDPOINT=SPEC (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ["EMULATOR_LATENCY"] = ";".join(args.latency) or "0"
+    os.environ["EMULATOR_ERROR_RATE"] = str(args.error_rate)
+    os.environ["EMULATOR_SEED"] = str(args.seed)
+    parse_latencies(os.environ["EMULATOR_LATENCY"])  # fail fast on a bad spec
+
+    import uvicorn
+    uvicorn.run("benchmarks.emulator:create_app", factory=True, host=args.host, port=args.port,
+                workers=args.workers, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
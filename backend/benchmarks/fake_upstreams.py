@@ -0,0 +1,217 @@
+"""
+Deterministic local stand-ins for Nominatim and Open-Meteo.
+
+Every response depends only on the request (query text, coordinates, dates),
+so a benchmark run sees the same data every time; rain for a given cell and
+day is the same whichever window it is requested in. Latency and error
+injection use a seeded RNG.
+
+    fakes = FakeUpstreams(Latency.parse("lognormal:80,0.5"), error_rate=0.01)
+    fakes.install()   # before the app lifespan opens its clients
+
+The same data functions back the standalone emulator (benchmarks.emulator).
+"""
+import asyncio
+import datetime
+import math
+import random
+import zlib
+
+import httpx
+
+# Rough share of rainy days per month in Maharashtra (Jan..Dec), and mean
+# rain on a rainy day in mm
+RAIN_CHANCE = (0.03, 0.02, 0.04, 0.06, 0.12, 0.55, 0.8, 0.8, 0.6, 0.25, 0.08, 0.03)
+RAIN_MEAN_MM = (4, 4, 5, 6, 9, 14, 18, 17, 14, 10, 6, 4)
+
+# Bounding box results are placed in (roughly Maharashtra)
+LAT_RANGE = (16.0, 22.0)
+LNG_RANGE = (73.0, 80.5)
+
+
+class Latency:
+    """
+    Response delay distribution, in ms. Specs: "0" (none), "fixed:50",
+    "uniform:20-120", "lognormal:80,0.5" (median, sigma).
+    """
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0):
+        self.kind, self.a, self.b = kind, a, b
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.strip().partition(":")
+        if not args:
+            return cls("fixed", float(kind))
+        if kind == "fixed":
+            return cls(kind, float(args))
+        if kind == "uniform":
+            lo, hi = args.split("-")
+            return cls(kind, float(lo), float(hi))
+        if kind == "lognormal":
+            median, sigma = args.split(",")
+            return cls(kind, float(median), float(sigma))
+        raise ValueError(f"unknown latency distribution {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Delay in seconds."""
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = self.a * math.exp(self.b * rng.gauss(0, 1))
+        else:
+            ms = self.a
+        return max(ms, 0.0) / 1000
+
+    def __repr__(self):
+        return f"Latency({self.kind!r}, {self.a}, {self.b})"
+
+
+def _unit(*parts) -> float:
+    """Deterministic pseudo-random number in [0, 1) from the given parts."""
+    return zlib.crc32(":".join(map(str, parts)).encode()) / 2 ** 32
+
+
+def _coord(value) -> str:
+    return f"{float(value):.4f}"
+
+
+def daily_rain(lat, lng, day: datetime.date) -> float:
+    month = day.month - 1
+    if _unit("wet", _coord(lat), _coord(lng), day.toordinal()) >= RAIN_CHANCE[month]:
+        return 0.0
+    u = _unit("mm", _coord(lat), _coord(lng), day.toordinal())
+    return round(-math.log(1.0 - u) * RAIN_MEAN_MM[month], 1)
+
+
+def search(q: str, limit: int = 1) -> list:
+    results = []
+    for i in range(limit):
+        lat = LAT_RANGE[0] + _unit("lat", q, i) * (LAT_RANGE[1] - LAT_RANGE[0])
+        lng = LNG_RANGE[0] + _unit("lng", q, i) * (LNG_RANGE[1] - LNG_RANGE[0])
+        name = q.strip().title() + (f" {i + 1}" if i else "")
+        postcode = str(400000 + int(_unit("pin", q, i) * 45000))
+        results.append({
+            "lat": f"{lat:.7f}",
+            "lon": f"{lng:.7f}",
+            "display_name": f"{name}, Maharashtra, {postcode}, India",
+            "type": "village",
+            "address": {"village": name, "state": "Maharashtra", "postcode": postcode, "country_code": "in"},
+        })
+    return results
+
+
+def reverse(lat, lng) -> dict:
+    village = f"Gaon {int(_unit('rev', _coord(lat), _coord(lng)) * 10000):04d}"
+    postcode = str(400000 + int(_unit("revpin", _coord(lat), _coord(lng)) * 45000))
+    return {
+        "lat": _coord(lat),
+        "lon": _coord(lng),
+        "display_name": f"{village}, Maharashtra, {postcode}, India",
+        "address": {"village": village, "state": "Maharashtra", "postcode": postcode, "country_code": "in"},
+    }
+
+
+def forecast(lat, lng, days: int = 7) -> dict:
+    today = datetime.date.today()
+    dates = [today + datetime.timedelta(days=d) for d in range(days)]
+    rain = [daily_rain(lat, lng, d) for d in dates]
+    base = 24 + 8 * _unit("temp", _coord(lat), _coord(lng))
+    return {
+        "latitude": float(lat),
+        "longitude": float(lng),
+        "daily": {
+            "time": [d.isoformat() for d in dates],
+            "weather_code": [63 if r > 10 else 61 if r > 0 else 1 for r in rain],
+            "temperature_2m_max": [round(base + 6 - (r > 0) * 3, 1) for r in rain],
+            "temperature_2m_min": [round(base - 6, 1) for _ in rain],
+            "precipitation_sum": rain,
+            "wind_speed_10m_max": [round(8 + 10 * _unit("wind", _coord(lat), _coord(lng), d), 1) for d in dates],
+        },
+    }
+
+
+def soil(lat, lng, hours: int = 24) -> dict:
+    now = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
+    moisture = 0.15 + 0.25 * _unit("moist", _coord(lat), _coord(lng), now.date().toordinal())
+    temp = 22 + 10 * _unit("soiltemp", _coord(lat), _coord(lng))
+    return {
+        "latitude": float(lat),
+        "longitude": float(lng),
+        "hourly": {
+            "time": [(now + datetime.timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)],
+            "soil_temperature_6cm": [round(temp + 3 * math.sin(h / 24 * 2 * math.pi), 1) for h in range(hours)],
+            "soil_moisture_3_to_9cm": [round(moisture, 3)] * hours,
+        },
+    }
+
+
+def archive(lat, lng, start_date, end_date) -> dict:
+    start = datetime.date.fromisoformat(str(start_date))
+    end = datetime.date.fromisoformat(str(end_date))
+    dates = [start + datetime.timedelta(days=d) for d in range((end - start).days + 1)]
+    return {
+        "latitude": float(lat),
+        "longitude": float(lng),
+        "daily": {
+            "time": [d.isoformat() for d in dates],
+            "precipitation_sum": [daily_rain(lat, lng, d) for d in dates],
+        },
+    }
+
+
+def open_meteo(path: str, params) -> object:
+    """Body for an Open-Meteo request; a list when several locations are asked for."""
+    lats = str(params["latitude"]).split(",")
+    lngs = str(params["longitude"]).split(",")
+    if path.endswith("/archive"):
+        bodies = [archive(la, ln, params["start_date"], params["end_date"]) for la, ln in zip(lats, lngs)]
+    elif "hourly" in params:
+        bodies = [soil(la, ln) for la, ln in zip(lats, lngs)]
+    else:
+        days = int(params.get("forecast_days", 7))
+        bodies = [forecast(la, ln, days) for la, ln in zip(lats, lngs)]
+    return bodies[0] if len(bodies) == 1 else bodies
+
+
+class FakeUpstreams:
+    """
+    httpx transport answering Nominatim, Open-Meteo and Supabase requests
+    locally, after a delay drawn from `latency`; `error_rate` of calls get
+    a 503.
+    """
+
+    def __init__(self, latency: Latency = None, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency or Latency()
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = {}
+
+    def respond(self, path: str, params) -> httpx.Response:
+        if path.endswith("/search"):
+            return httpx.Response(200, json=search(params.get("q", ""), int(params.get("limit", 1))))
+        if path.endswith("/reverse"):
+            return httpx.Response(200, json=reverse(params["lat"], params["lon"]))
+        if path.endswith("/user_locations"):
+            return httpx.Response(200, json=[])
+        if path.endswith(("/forecast", "/archive")):
+            return httpx.Response(200, json=open_meteo(path, params))
+        return httpx.Response(404, json={"error": True, "reason": f"unknown path {path}"})
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls[path] = self.calls.get(path, 0) + 1
+        delay = self.latency.sample(self.rng)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return httpx.Response(503, json={"error": True, "reason": "injected failure"})
+        return self.respond(path, request.url.params)
+
+    def install(self):
+        """Route the app's upstream clients here. Call before the lifespan starts."""
+        from app.logic import upstream
+
+        transport = httpx.MockTransport(self.handle)
+        for name in (upstream.NOMINATIM, upstream.OPEN_METEO, upstream.SUPABASE):
+            upstream._clients[name] = httpx.AsyncClient(transport=transport)
@@ -0,0 +1,252 @@
+"""
+In-process load test: drives the ASGI app against FakeUpstreams at fixed
+concurrency levels and reports throughput and p50/p95/p99 latency per
+endpoint. Results can be saved as a JSON baseline and later runs compared
+against it; any regression beyond the tolerance makes the exit status 1.
+
+    cd backend && python -m benchmarks.loadtest --save
+    cd backend && python -m benchmarks.loadtest --compare benchmarks/baseline.json
+
+Upstream latency/errors are injected with --upstream-latency-ms,
+--upstream-sigma and --upstream-error-rate. The Nominatim rate limit is
+lifted (the fakes have no usage policy) so the limiter doesn't dominate.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+SEASONS = ["Kharif", "Rabi", "Zaid"]
+WATER_LEVELS = ["Critical", "Moderate", "Safe"]
+# Share of recommend-crops requests drawn from inputs the catalogue has no
+# crops for, so the empty path is still exercised without dominating
+RECOMMEND_EMPTY_SHARE = 0.1
+SYLLABLES = ["wa", "di", "pur", "gaon", "ne", "ra", "ko", "li", "sh", "bad", "ta", "vi"]
+
+
+def _places(rng: random.Random, n: int) -> list:
+    """Fixed pool of coordinates and place-like query strings."""
+    return [
+        {
+            "lat": round(rng.uniform(16.0, 22.0), 4),
+            "lng": round(rng.uniform(73.0, 80.5), 4),
+            "query": "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))),
+        }
+        for _ in range(n)
+    ]
+
+
+async def recommend_inputs(soils: list) -> tuple:
+    """
+    Every soil x season x water level request body, split by whether the
+    live recommendation logic returns any crops for it.
+    """
+    from app.main import RecommendationRequest, recommend_crops
+
+    productive, empty = [], []
+    for soil in soils:
+        for season in SEASONS:
+            for water in WATER_LEVELS:
+                body = {"soil_type": soil, "season": season, "water_availability": water}
+                answer = await recommend_crops(RecommendationRequest(**body))
+                (productive if answer["recommendations"] else empty).append(body)
+    return productive, empty
+
+
+def scenarios(places: list, trajectories: int, crops: list, soils: list, recommend_mix: tuple) -> dict:
+    """
+    name -> (method, path, request builder(rng) -> (params, json), check).
+    `crops` and `soils` are catalogue names; `recommend_mix` is
+    recommend_inputs()'s (productive, empty) pair.
+    `check(body)` is False for a response that did no real work (e.g. an
+    empty recommendation list); None means any 2xx counts.
+    """
+    productive, empty = recommend_mix
+
+    def water_balance(rng):
+        p = rng.choice(places)
+        body = {"query": p["query"]} if rng.random() < 0.3 else {"lat": p["lat"], "lng": p["lng"]}
+        return None, {**body, "soil_type": rng.choice(soils)}
+
+    def suggestions(rng):
+        q = rng.choice(places)["query"]
+        return {"query": q[:rng.randint(3, len(q))]}, None
+
+    def check_crop(rng):
+        p = rng.choice(places)
+        return None, {"crop_name": rng.choice(crops), "available_water_mm": rng.randint(200, 1500),
+                      "soil_type": rng.choice(soils), "lat": p["lat"], "lng": p["lng"]}
+
+    def recommend(rng):
+        if empty and (not productive or rng.random() < RECOMMEND_EMPTY_SHARE):
+            return None, rng.choice(empty)
+        return None, rng.choice(productive)
+
+    def simulate(rng):
+        p = rng.choice(places)
+        return None, {"crop_name": rng.choice(crops), "water_balance": rng.randint(300, 900),
+                      "month_start": rng.randint(1, 12), "trajectories": trajectories,
+                      "seed": rng.randint(0, 2 ** 31), "lat": p["lat"], "lng": p["lng"]}
+
+    return {
+        "water-balance": ("POST", "/api/water-balance", water_balance, None),
+        "suggestions": ("GET", "/api/suggestions", suggestions, None),
+        "check-crop": ("POST", "/api/check-crop", check_crop, None),
+        "recommend-crops": ("POST", "/api/recommend-crops", recommend, lambda body: bool(body["recommendations"])),
+        "simulate-water": ("POST", "/api/simulate-water", simulate, None),
+    }
+
+
+async def run_level(client, method, path, build, check, rng, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests with `concurrency` workers; latency stats in ms."""
+    calls = [build(rng) for _ in range(requests)]
+    latencies, errors, empty = [], 0, 0
+    it = iter(calls)
+
+    async def worker():
+        nonlocal errors, empty
+        for params, body in it:
+            t = time.perf_counter()
+            resp = await client.request(method, path, params=params, json=body)
+            latencies.append((time.perf_counter() - t) * 1000)
+            if resp.status_code >= 400:
+                errors += 1
+            elif check is not None and not check(resp.json()):
+                empty += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": requests,
+        "errors": errors,
+        "empty": empty,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+async def run(args) -> dict:
+    # Imported here so the environment overrides in main() apply
+    import httpx
+    from app.main import app, catalogue
+    from benchmarks.fake_upstreams import FakeUpstreams, Latency
+
+    latency = Latency("lognormal", args.upstream_latency_ms, args.upstream_sigma)
+    fakes = FakeUpstreams(latency, args.upstream_error_rate, args.seed)
+    fakes.install()
+    rng = random.Random(args.seed)
+    current = catalogue.current
+    soils = [s.name for s in current.soils]
+    suite = scenarios(_places(rng, args.places), args.trajectories, [c.name for c in current.crops], soils,
+                      await recommend_inputs(soils))
+    selected = args.endpoints or list(suite)
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in selected:
+                method, path, build, check = suite[name]
+                if args.warmup:
+                    await run_level(client, method, path, build, check, rng, args.warmup, max(args.concurrency))
+                for concurrency in args.concurrency:
+                    stats = await run_level(client, method, path, build, check, rng, args.requests, concurrency)
+                    results[f"{name}@{concurrency}"] = stats
+                    print(f"{name:<16} c={concurrency:<4} {stats['rps']:>9.1f} req/s   "
+                          f"p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  "
+                          f"p99 {stats['p99_ms']:>8.2f} ms   errors {stats['errors']}   empty {stats['empty']}")
+                    if check is not None and stats["empty"] + stats["errors"] == stats["requests"]:
+                        raise SystemExit(f"{name}: no response did real work; the scenario is broken")
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "tolerance", "floor_ms")},
+            "upstream_calls": fakes.calls,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, floor_ms: float) -> list:
+    """Human-readable regressions of `current` against `baseline`."""
+    regressions = []
+    for key, base in baseline["results"].items():
+        cur = current["results"].get(key)
+        if cur is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            # Ignore sub-floor differences; they are scheduler noise
+            if cur[metric] > base[metric] * (1 + tolerance) and cur[metric] - base[metric] > floor_ms:
+                regressions.append(f"{key}: {metric} {base[metric]} -> {cur[metric]}")
+        if cur["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: rps {base['rps']} -> {cur['rps']}")
+        if cur["errors"] > base["errors"]:
+            regressions.append(f"{key}: errors {base['errors']} -> {cur['errors']}")
+        if cur.get("empty", 0) > base.get("empty", 0):
+            regressions.append(f"{key}: empty responses {base.get('empty', 0)} -> {cur['empty']}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=list(scenarios([], 0, [], [], ([], []))),
+                        help="scenarios to run (default: all)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per level")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--places", type=int, default=100, help="distinct locations requested")
+    parser.add_argument("--trajectories", type=int, default=2000, help="for /api/simulate-water")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-sigma", type=float, default=0.5, help="lognormal spread, 0 = fixed")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="ignore latency changes below this")
+    args = parser.parse_args(argv)
+
+    # Fresh on-disk caches, no background refresh, no Nominatim usage policy
+    os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="vwa-bench-"))
+    os.environ["PREFETCH_ENABLED"] = "0"
+    os.environ["NOMINATIM_RATE_PER_S"] = "100000"
+    os.environ["NOMINATIM_BURST"] = "100000"
+    os.environ["TRACE_SAMPLE_RATE"] = "0"
+    os.environ["TRACE_SLOW_MS"] = "0"
+
+    current = asyncio.run(run(args))
+    if args.save:
+        args.save.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"saved {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline["meta"]["settings"] != current["meta"]["settings"]:
+            print("warning: baseline was recorded with different settings")
+        regressions = compare(current, baseline, args.tolerance, args.floor_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
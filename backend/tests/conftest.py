@@ -0,0 +1,65 @@
+"""
+Shared fixtures. The app is configured through the environment at import
+time, so the overrides below must be in place before anything imports
+app.main: a throwaway cache directory, no background prefetch or catalogue
+watching, and no Nominatim rate limit (the fakes have no usage policy).
+"""
+import os
+import tempfile
+
+os.environ.update(
+    CACHE_DIR=tempfile.mkdtemp(prefix="vwa-tests-"),
+    PREFETCH_ENABLED="0",
+    CATALOGUE_WATCH_INTERVAL="0",
+    NOMINATIM_RATE_PER_S="100000",
+    NOMINATIM_BURST="100000",
+    TRACE_SAMPLE_RATE="0",
+)
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def fakes():
+    from benchmarks.fake_upstreams import FakeUpstreams
+
+    return FakeUpstreams()
+
+
+@pytest.fixture(scope="session")
+def client(fakes):
+    """TestClient for the whole app, with every upstream answered by `fakes`."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    fakes.install()
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def failing_upstreams(fakes):
+    """Every upstream call answers 503 for the duration of the test; circuits are closed again after."""
+    from app.logic import upstream
+
+    fakes.error_rate = 1.0
+    yield fakes
+    fakes.error_rate = 0.0
+    for breaker in upstream.breakers.values():
+        breaker.record_success()
+
+
+@pytest.fixture
+def write_catalogue(tmp_path):
+    """write_catalogue(crops, soils=None, version="test") -> path of a schema-1 catalogue file."""
+    import json
+
+    def write(crops, soils=None, version="test", path=None):
+        path = path or tmp_path / "catalogue.json"
+        soils = soils or [{"name": "Black Soil", "type": "heavy", "retention": "high", "desc": ""}]
+        path.write_text(json.dumps({"schema": 1, "version": version, "crops": crops, "soils": soils}),
+                        encoding="utf-8")
+        return path
+
+    return write
@@ -0,0 +1,34 @@
+def batch(client, items):
+    r = client.post("/api/water-balance/batch", json={"items": items})
+    assert r.status_code == 200
+    return r.json()["results"]
+
+
+def test_items_without_a_location_fail_alone(client):
+    results = batch(client, [{}, {"lat": 18.52}, {"lat": 18.52, "lng": 73.86}])
+    assert [r["success"] for r in results] == [False, False, True]
+    assert results[0]["error"] == results[1]["error"] == "Give a query, pincode, or both lat and lng"
+
+
+def test_local_places_resolve_without_nominatim_and_keep_their_pincode(client, fakes):
+    before = fakes.calls.get("/search", 0), fakes.calls.get("/reverse", 0)
+    results = batch(client, [{"query": "Nashik"}, {"pincode": "411001"}, {"query": "kolhapur"}])
+    assert all(r["success"] for r in results)
+    assert [(r["data"]["region"], r["data"]["pincode"]) for r in results] == [
+        ("Nashik", "422001"), ("Pune", "411001"), ("Kolhapur", "416001")]
+    assert (fakes.calls.get("/search", 0), fakes.calls.get("/reverse", 0)) == before
+
+
+def test_unknown_places_still_go_to_nominatim(client, fakes):
+    before = fakes.calls.get("/search", 0)
+    results = batch(client, [{"query": "Wadgaon Sheri Budruk"}])
+    assert results[0]["success"]
+    assert fakes.calls["/search"] - before == 1
+
+
+def test_batch_size_limit(client):
+    from app import config
+
+    r = client.post("/api/water-balance/batch",
+                    json={"items": [{"lat": 18.5, "lng": 73.8}] * (config.BATCH_MAX_ITEMS + 1)})
+    assert r.status_code == 422
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from app.logic.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("t", failure_threshold=3, reset_timeout=60)
+    fail(breaker, 2)
+    breaker.before_call()
+    breaker.record_success()  # a success resets the count
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    assert breaker.stats() == {"state": OPEN, "consecutive_failures": 3, "times_opened": 1, "short_circuited": 1}
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0.01)
+    fail(breaker, 1)
+    time.sleep(0.02)
+    breaker.before_call()  # the probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()  # everyone else waits for its verdict
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0.01)
+    fail(breaker, 1)
+    time.sleep(0.02)
+    fail(breaker, 1)
+    assert breaker.state == OPEN and breaker.times_opened == 2
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_released_probe_frees_the_slot():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0.01)
+    fail(breaker, 1)
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.release()  # e.g. the caller was cancelled
+    breaker.before_call()
+
+
+def test_failing_upstream_serves_last_known_forecast(client, fakes, monkeypatch):
+    from app import config
+    from app.logic import upstream
+
+    monkeypatch.setattr(config, "FORECAST_CACHE_TTL", -1)  # cached already expired
+    monkeypatch.setattr(config, "STALE_WHILE_REVALIDATE", -60)  # so every request refetches
+    fresh = client.get("/api/forecast", params={"lat": 21.0, "lng": 77.0}).json()
+    assert fresh["stale"] is False and fresh["forecast"]
+
+    monkeypatch.setattr(fakes, "error_rate", 1.0)
+    breaker = upstream.breakers[upstream.OPEN_METEO]
+    try:
+        for _ in range(config.BREAKER_FAILURE_THRESHOLD + 2):
+            stale = client.get("/api/forecast", params={"lat": 21.0, "lng": 77.0}).json()
+            assert stale["stale"] is True
+            assert stale["forecast"] == fresh["forecast"]
+        assert breaker.state == OPEN and breaker.short_circuited > 0
+    finally:
+        breaker.record_success()
@@ -0,0 +1,67 @@
+from app.logic.cache import TTLCache, grid_cell, mark_stale, track_stale
+
+
+def test_grid_cell_snaps_nearby_points_together():
+    assert grid_cell(18.5204, 73.8567, 0.05) == grid_cell(18.5101, 73.8449, 0.05) == (18.5, 73.85)
+    assert grid_cell(18.5204, 73.8567, 0.05) != grid_cell(18.58, 73.8567, 0.05)
+
+
+def test_grid_cell_has_no_float_noise():
+    lat, lng = grid_cell(19.9975, 73.7898, 0.05)
+    assert (lat, lng) == (20.0, 73.8)
+    assert repr(lng) == "73.8"
+
+
+def test_get_respects_ttl():
+    cache = TTLCache("t")
+    cache.set("fresh", 1, ttl=60)
+    cache.set("old", 2, ttl=-1)
+    assert cache.get("fresh") == 1
+    assert cache.get("old") is None
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_expired_entries_stay_available_as_stale():
+    cache = TTLCache("t")
+    cache.set("k", "last known", ttl=-5)
+    value, age = cache.get_stale("k")
+    assert value == "last known" and age >= 5
+    assert cache.get_stale("missing") == (None, None)
+
+
+def test_lru_eviction_by_entry_count():
+    cache = TTLCache("t", max_entries=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")  # a is now the most recently used
+    cache.set("c", 3, 60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_eviction_by_size():
+    cache = TTLCache("t", max_bytes=2000)
+    for i in range(10):
+        cache.set(i, "x" * 500, 60)
+    assert cache.stats()["approx_bytes"] <= 2000
+    assert 0 < len(cache) < 10
+    assert cache.get(9) is not None
+
+
+def test_stale_markers_are_per_request():
+    mark_stale("ignored")  # no request tracking yet: a no-op
+    sources = track_stale()
+    mark_stale("forecast")
+    assert sources == {"forecast"}
+    assert track_stale() == set()
+
+
+def test_nearby_forecast_requests_share_one_upstream_call(client, fakes):
+    before = fakes.calls.get("/v1/forecast", 0)
+    first = client.get("/api/forecast", params={"lat": 20.5012, "lng": 76.2011})
+    second = client.get("/api/forecast", params={"lat": 20.4991, "lng": 76.1989})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["forecast"] == second.json()["forecast"]
+    assert fakes.calls["/v1/forecast"] - before == 1
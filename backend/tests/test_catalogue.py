@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+import pytest
+
+from app import config
+from app.logic.catalogue import CatalogueError, CatalogueStore, load_catalogue
+
+WHEAT = {"name": "Wheat", "water_mm": 450, "season": "Rabi", "type": "Cereal", "soil": ["Medium"]}
+RICE = {"name": "Rice", "water_mm": 1200, "season": "Kharif", "type": "Cereal", "soil": ["Clay"]}
+
+
+def test_shipped_catalogue_loads():
+    catalogue = load_catalogue(config.CATALOGUE_FILE)
+    assert catalogue.crop("Wheat").water_mm > 0
+    assert catalogue.crop("Rice") is None  # listed as "Rice (Paddy)"
+    assert len(catalogue.index.crops) == len(catalogue.crops)
+
+
+def test_defaults_and_derived_fields(write_catalogue):
+    crop = load_catalogue(write_catalogue([WHEAT])).crop("Wheat")
+    assert crop.season == "Rabi" and crop.sunlight == "Full Sun"
+    assert crop.to_dict()["soil"] == ["Medium"]
+
+
+@pytest.mark.parametrize("crops, message", [
+    ([{**WHEAT, "season": "Monsoon"}], "unknown season"),
+    ([{**WHEAT, "soil": ["Peat"]}], "unknown soil"),
+    ([WHEAT, WHEAT], "duplicate crop names"),
+    ([{k: v for k, v in WHEAT.items() if k != "water_mm"}], "water_mm must be a non-negative number"),
+    ([{k: v for k, v in WHEAT.items() if k != "name"}], "name must be a string"),
+    ([], "at least one crop"),
+])
+def test_invalid_files_are_rejected(write_catalogue, crops, message):
+    with pytest.raises(CatalogueError, match=message):
+        load_catalogue(write_catalogue(crops))
+
+
+def test_reload_swaps_whole_catalogue_and_keeps_it_on_error(write_catalogue):
+    path = write_catalogue([WHEAT], version="1")
+    store = CatalogueStore(path)
+    old = store.current
+    write_catalogue([WHEAT, RICE], version="2")
+    assert store.reload().version == "2"
+    assert store.current.crop("Rice") is not None
+    assert old.crop("Rice") is None  # readers holding the old version are unaffected
+
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(CatalogueError):
+        store.reload()
+    assert store.current.version == "2"
+    assert store.stats()["reloads"] == 1 and store.stats()["failed_reloads"] == 1
+
+
+def test_watcher_picks_up_a_changed_file(write_catalogue):
+    path = write_catalogue([WHEAT], version="1")
+
+    async def main():
+        store = CatalogueStore(path)
+        store.start_watching(0.02)
+        write_catalogue([WHEAT, RICE], version="2")
+        os.utime(path, (store.current.mtime + 5, store.current.mtime + 5))
+        for _ in range(100):
+            if store.current.version == "2":
+                break
+            await asyncio.sleep(0.02)
+        await store.stop()
+        return store
+
+    store = asyncio.run(main())
+    assert store.current.version == "2" and store.reloads == 1
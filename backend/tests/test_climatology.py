@@ -0,0 +1,39 @@
+import time
+
+from app import config
+from benchmarks.fake_upstreams import Latency
+
+
+def simulate(client, lat, lng):
+    r = client.post("/api/simulate-water", json={
+        "crop_name": "Wheat", "water_balance": 500, "month_start": 11, "seed": 1, "lat": lat, "lng": lng})
+    assert r.status_code == 200
+    return r.json()["rainfall_source"]
+
+
+def history_calls(fakes):
+    return fakes.calls.get("/v1/archive", 0)
+
+
+def test_history_is_downloaded_once_and_used(client, fakes):
+    before = history_calls(fakes)
+    assert simulate(client, 17.2, 74.2) == "local_history"
+    assert simulate(client, 17.2, 74.2) == "local_history"
+    assert history_calls(fakes) - before == 1
+
+
+def test_failed_download_falls_back_and_is_not_retried_at_once(client, failing_upstreams):
+    before = history_calls(failing_upstreams)
+    assert simulate(client, 17.6, 76.4) == "regional_table"
+    assert simulate(client, 17.6, 76.4) == "regional_table"
+    assert history_calls(failing_upstreams) - before == 1
+
+
+def test_slow_download_is_cut_off_but_finishes_in_the_background(client, fakes, monkeypatch):
+    monkeypatch.setattr(config, "RAIN_HISTORY_WAIT", 0.1)
+    monkeypatch.setattr(fakes, "latency", Latency("fixed", 400))
+    start = time.perf_counter()
+    assert simulate(client, 20.8, 78.6) == "regional_table"
+    assert time.perf_counter() - start < 0.35
+    time.sleep(0.5)
+    assert simulate(client, 20.8, 78.6) == "local_history"
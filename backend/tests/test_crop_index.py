@@ -0,0 +1,72 @@
+import pytest
+
+from app.logic.catalogue import load_catalogue
+from app.logic.crop_index import Season, Soil, soil_class
+
+CROPS = [
+    {"name": "Rice", "water_mm": 1200, "season": "Kharif", "type": "Cereal", "soil": ["Heavy", "Clay"]},
+    {"name": "Wheat", "water_mm": 450, "season": "Rabi", "type": "Cereal", "soil": ["Medium", "Heavy"]},
+    {"name": "Jowar", "water_mm": 400, "season": "Kharif/Rabi", "type": "Millet", "soil": ["Medium", "Black", "Light"]},
+    {"name": "Bajra", "water_mm": 350, "season": "Kharif", "type": "Millet", "soil": ["Light", "Sandy"]},
+    {"name": "Banana", "water_mm": 1800, "season": "Annual", "type": "Fruit", "soil": ["Medium"]},
+    {"name": "Melon", "water_mm": 400, "season": "Zaid", "type": "Fruit", "soil": ["Sandy"]},
+]
+
+
+@pytest.fixture
+def index(write_catalogue):
+    return load_catalogue(write_catalogue(CROPS)).index
+
+
+def names(index, ids):
+    return [index.crops[i].name for i in ids]
+
+
+def test_labels_parse_and_round_trip():
+    assert Season.parse("Kharif/Rabi") == Season.KHARIF | Season.RABI
+    assert Soil.parse(["black", " Clay "]).labels() == ["Black", "Clay"]
+    with pytest.raises(ValueError):
+        Season.parse("Monsoon")
+
+
+def test_season_crops_are_water_sorted_and_include_annual(index):
+    waters, ids = index.season_crops("Kharif")
+    assert names(index, ids) == ["Bajra", "Jowar", "Rice", "Banana"]
+    assert waters == sorted(waters)
+
+
+def test_season_match_is_the_engines_substring_semantics(index):
+    # "Rabi" is in "Kharif/Rabi"; the empty string is in every label; case
+    # matters, so "rabi" only finds Annual crops (which match any season)
+    assert names(index, index.season_crops("Rabi")[1]) == ["Jowar", "Wheat", "Banana"]
+    assert len(index.season_crops("")[1]) == len(CROPS)
+    assert names(index, index.season_crops("rabi")[1]) == ["Banana"]
+
+
+def test_season_crops_below_is_strict(index):
+    assert names(index, index.season_crops_below("Kharif", 400)) == ["Bajra"]
+    assert names(index, index.season_crops_below("Kharif", 401)) == ["Bajra", "Jowar"]
+    assert names(index, index.season_crops_below("Kharif")) == ["Bajra", "Jowar", "Rice", "Banana"]
+
+
+def test_soil_class_and_matches(index):
+    assert soil_class("Black Soil (Regur/Kali) - Heavy") == "heavy"
+    assert soil_class("Red Soil (Lal) - Light") == "light"
+    assert soil_class("Alluvial") == "medium"
+    assert set(names(index, index.soil_matches("Black Soil"))) == {"Rice", "Wheat", "Jowar"}
+    assert set(names(index, index.soil_matches("Sandy Soil"))) == {"Jowar", "Bajra", "Melon"}
+    # medium soils match only by tag name in the text
+    assert set(names(index, index.soil_matches("Medium Soil (Loam)"))) == {"Wheat", "Jowar", "Banana"}
+    assert index.soil_matches("Alluvial") == frozenset()
+
+
+def test_recommend_endpoint_uses_season_soil_and_water(client):
+    r = client.post("/api/recommend-crops", json={
+        "soil_type": "Black Soil (Regur/Kali) - Heavy", "season": "Kharif", "water_availability": "Moderate"})
+    recs = r.json()["recommendations"]
+    assert recs
+    for rec in recs:
+        crop = rec["details"]
+        assert crop["water_mm"] < 800
+        assert "Kharif" in crop["season"] or "Annual" in crop["season"]
+        assert set(crop["soil"]) & {"Black", "Clay", "Heavy"}
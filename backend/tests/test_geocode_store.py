@@ -0,0 +1,41 @@
+from app.logic.geocode_store import GeocodeStore, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Pune,  Maharashtra ") == "pune maharashtra"
+    assert normalize_query("411 001") == "411001"
+
+
+def test_forward_round_trip_and_remembered_miss(tmp_path):
+    store = GeocodeStore(tmp_path / "geo.sqlite3")
+    assert store.get_forward("Pune") == (False, None)
+    store.put_forward("Pune", {"lat": 18.52, "lng": 73.86, "display_name": "Pune, Maharashtra"})
+    store.put_forward("Nowhere", None)
+    assert store.get_forward(" pune ") == (True, {"lat": 18.52, "lng": 73.86, "display_name": "Pune, Maharashtra"})
+    assert store.get_forward("nowhere") == (True, None)
+    store.close()
+
+
+def test_misses_expire_after_negative_ttl(tmp_path):
+    store = GeocodeStore(tmp_path / "geo.sqlite3", negative_ttl=0)
+    store.put_forward("Nowhere", None)
+    store.put_forward("Pune", {"lat": 18.52, "lng": 73.86, "display_name": "Pune"})
+    assert store.get_forward("Nowhere") == (False, None)
+    assert store.get_forward("Pune")[0] is True
+    store.close()
+
+
+def test_reverse_lookups_share_a_grid_cell(tmp_path):
+    store = GeocodeStore(tmp_path / "geo.sqlite3", grid_deg=0.01)
+    store.put_reverse(18.5204, 73.8567, "Pune", "411001")
+    assert store.get_reverse(18.5196, 73.8571) == ("Pune", "411001")
+    assert store.get_reverse(18.56, 73.8567) is None
+    store.close()
+
+
+def test_upstream_failure_is_503_and_not_cached(client, failing_upstreams):
+    r = client.post("/api/water-balance", json={"query": "Khandala Budruk"})
+    assert r.status_code == 503
+    failing_upstreams.error_rate = 0.0  # one failure is below the breaker threshold
+    r = client.post("/api/water-balance", json={"query": "Khandala Budruk"})
+    assert r.status_code == 200
@@ -0,0 +1,50 @@
+import asyncio
+import random
+
+import pytest
+
+from benchmarks.loadtest import RECOMMEND_EMPTY_SHARE, _places, recommend_inputs, scenarios
+
+
+@pytest.fixture(scope="module")
+def suite(client):
+    from app.main import catalogue
+
+    current = catalogue.current
+    soils = [s.name for s in current.soils]
+    mix = asyncio.run(recommend_inputs(soils))
+    return scenarios(_places(random.Random(0), 20), 200, [c.name for c in current.crops], soils, mix), mix
+
+
+def test_recommend_inputs_are_mostly_productive(suite):
+    _, (productive, empty) = suite
+    assert len(productive) > len(empty)
+
+
+def test_every_scenario_request_succeeds(client, suite):
+    scenarios_, _ = suite
+    rng = random.Random(1)
+    for name, (method, path, build, check) in scenarios_.items():
+        for _ in range(10):
+            params, body = build(rng)
+            r = client.request(method, path, params=params, json=body)
+            assert r.status_code == 200, (name, body, r.text)
+
+
+def test_crop_names_resolve_in_the_catalogue(client, suite):
+    from app.main import catalogue
+
+    scenarios_, _ = suite
+    _, _, build, _ = scenarios_["check-crop"]
+    rng = random.Random(2)
+    for _ in range(20):
+        _, body = build(rng)
+        assert catalogue.current.crop(body["crop_name"]) is not None
+
+
+def test_recommend_samples_are_rarely_empty(client, suite):
+    scenarios_, _ = suite
+    method, path, build, check = scenarios_["recommend-crops"]
+    rng = random.Random(3)
+    empty = sum(not check(client.request(method, path, json=build(rng)[1]).json()) for _ in range(200))
+    assert empty <= 200 * RECOMMEND_EMPTY_SHARE * 2
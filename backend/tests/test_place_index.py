@@ -0,0 +1,72 @@
+from app.logic.place_index import PlaceIndex, normalize
+
+PLACES = [
+    {"city": "Pune", "pincode": "411001", "lat": 18.52, "lng": 73.86},
+    {"city": "Satara", "pincode": "415001", "lat": 17.68, "lng": 74.02},
+    {"city": "Pimpri Chinchwad", "pincode": "411018", "lat": 18.63, "lng": 73.80},
+    {"city": "Punawale", "pincode": "411033", "lat": 18.63, "lng": 73.73},
+    {"city": "Khed Shivapur", "pincode": "412205", "lat": None, "lng": None},
+    {"city": "Shivapur", "pincode": "412205", "lat": 18.35, "lng": 73.86},
+]
+
+
+def cities(results):
+    return [p["city"] for p in results]
+
+
+def test_normalize():
+    assert normalize("  Pimpri-Chinchwad, ") == "pimpri chinchwad"
+
+
+def test_exact_name_ranks_before_prefix_matches():
+    index = PlaceIndex(PLACES)
+    assert cities(index.search("pune")) == ["Pune"]
+    assert cities(index.search("pun")) == ["Pune", "Punawale"]
+
+
+def test_pincode_prefix_in_pincode_order():
+    index = PlaceIndex(PLACES)
+    assert cities(index.search("4110")) == ["Pune", "Pimpri Chinchwad", "Punawale"]
+
+
+def test_later_word_prefix_and_infix():
+    index = PlaceIndex(PLACES)
+    assert cities(index.search("chinch")) == ["Pimpri Chinchwad"]
+    assert "Satara" in cities(index.search("tar"))
+
+
+def test_two_character_infix_matches():
+    # The old substring scan matched from 2 characters; the gram index must too
+    index = PlaceIndex(PLACES)
+    assert cities(index.search("wa")) == ["Punawale", "Pimpri Chinchwad"]
+    assert cities(index.search("ta")) == ["Satara"]
+
+
+def test_single_character_is_prefix_only():
+    index = PlaceIndex(PLACES)
+    assert set(cities(index.search("s"))) == {"Satara", "Shivapur", "Khed Shivapur"}
+    assert index.search("a") == []  # "a" is inside most names, but starts none
+
+
+def test_exact_skips_word_prefixes_and_places_without_coordinates():
+    index = PlaceIndex(PLACES)
+    assert index.exact("Satara")["pincode"] == "415001"
+    assert index.exact("411018")["city"] == "Pimpri Chinchwad"
+    assert index.exact("chinchwad") is None  # only a later word of the name
+    assert index.exact("412205")["city"] == "Shivapur"  # Khed Shivapur has no coordinates
+    assert index.exact("nowhere") is None
+
+
+def test_no_match():
+    index = PlaceIndex(PLACES)
+    assert index.search("zzq") == []
+    assert index.search("  ") == []
+
+
+def test_suggestions_endpoint_serves_local_matches(client, fakes):
+    before = fakes.calls.get("/search", 0)
+    r = client.get("/api/suggestions", params={"query": "Nas"})
+    assert r.status_code == 200
+    assert r.json()[0] == {"label": "Nashik - 422001", "value": "422001", "name": "Nashik",
+                           "lat": 19.9975, "lng": 73.7898}
+    assert fakes.calls.get("/search", 0) == before
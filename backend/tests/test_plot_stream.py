@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from app.logic.plot_stream import MAX_RECORD_CHARS, iter_rows
+
+
+def rows(body: bytes, content_type: str = "", chunk: int = 7) -> list:
+    async def chunks():
+        for i in range(0, len(body), chunk):
+            yield body[i:i + chunk]
+
+    async def collect():
+        return [row async for row in iter_rows(chunks(), content_type)]
+
+    return asyncio.run(collect())
+
+
+def test_csv_header_is_normalised_and_blank_values_are_none():
+    out = rows(b"Crop Name, Available Water MM,soil_type\r\nWheat,450,\r\n\r\nRice,1200,Black\r\n")
+    assert out == [
+        {"crop_name": "Wheat", "available_water_mm": "450", "soil_type": None},
+        {"crop_name": "Rice", "available_water_mm": "1200", "soil_type": "Black"},
+    ]
+
+
+def test_csv_quoted_fields_may_span_lines():
+    out = rows(b'crop_name,notes,available_water_mm\nRice,"wet\n\nfield, low",900\nCotton,"say ""hi""",600\n', chunk=3)
+    assert out == [
+        {"crop_name": "Rice", "notes": "wet\n\nfield, low", "available_water_mm": "900"},
+        {"crop_name": "Cotton", "notes": 'say "hi"', "available_water_mm": "600"},
+    ]
+
+
+def test_unterminated_quote_is_one_error_row():
+    assert rows(b'crop_name,notes\nRice,"open\nWheat,x\n') == [
+        {"_error": "Unterminated quoted field at end of upload"}]
+    long = b'crop_name,notes\nRice,"' + b"x" * MAX_RECORD_CHARS + b'\nWheat,ok\n'
+    out = rows(long, chunk=4096)
+    assert out[0]["_error"].startswith("Row longer than")
+    assert out[1:] == [{"crop_name": "Wheat", "notes": "ok"}]
+
+
+def test_invalid_utf8_rejects_only_that_row():
+    out = rows(b"\xef\xbb\xbfcrop_name,available_water_mm\nWheat,450\nR\xffce,900\nRice,1200\n")
+    assert out == [
+        {"crop_name": "Wheat", "available_water_mm": "450"},
+        {"_error": "Row is not valid UTF-8"},
+        {"crop_name": "Rice", "available_water_mm": "1200"},
+    ]
+
+
+def test_ndjson_by_content_type_or_sniffing():
+    body = b'{"crop_name": "Wheat"}\n\nnot json\n[1]\n\xff\n{"crop_name": "Rice"}'
+    expected_errors = ["Invalid JSON", "Expected a JSON object", "Row is not valid UTF-8"]
+    for content_type in ("application/x-ndjson", "text/plain"):
+        out = rows(body, content_type)
+        assert out[0] == {"crop_name": "Wheat"} and out[-1] == {"crop_name": "Rice"}
+        assert [r["_error"].split(":")[0] for r in out[1:-1]] == expected_errors
+
+
+def test_stream_endpoint_reports_every_row(client):
+    body = b'crop_name,available_water_mm,soil_type\nWheat,600,Black\nWheat,abc,\nR\xffce,1,\n'
+    r = client.post("/api/check-crop/stream", content=body, headers={"content-type": "text/csv"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    out = [json.loads(line) for line in r.text.splitlines()]
+    assert [(o["row"], o["success"]) for o in out] == [(1, True), (2, False), (3, False)]
+    assert out[0]["data"]["crop_details"]["name"] == "Wheat"
+    assert out[1]["error"].startswith("available_water_mm")
+    assert out[2]["error"] == "Row is not valid UTF-8"
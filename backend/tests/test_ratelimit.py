@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from app.logic.ratelimit import RateLimitExceeded, TokenBucket
+
+
+def test_burst_up_to_capacity_does_not_wait():
+    async def main():
+        bucket = TokenBucket(rate=10, capacity=3)
+        start = time.perf_counter()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.perf_counter() - start, bucket.waits
+
+    elapsed, waits = asyncio.run(main())
+    assert elapsed < 0.05 and waits == 0
+
+
+def test_excess_callers_are_queued_and_spaced_out():
+    async def main():
+        bucket = TokenBucket(rate=50)  # one slot every 20 ms
+        done = []
+
+        async def caller(i):
+            await bucket.acquire()
+            done.append((i, time.perf_counter()))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(caller(i) for i in range(5)))
+        return start, done
+
+    start, done = asyncio.run(main())
+    assert [i for i, _ in done] == [0, 1, 2, 3, 4]  # FIFO
+    assert done[-1][1] - start >= 0.075
+    gaps = [b - a for (_, a), (_, b) in zip(done, done[1:])]
+    assert min(gaps) >= 0.015
+
+
+def test_caller_over_max_wait_is_rejected_without_taking_a_slot():
+    async def main():
+        bucket = TokenBucket(rate=1)
+        await bucket.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire(max_wait=0.1)
+        next_free = bucket._next_free
+        with pytest.raises(RateLimitExceeded):
+            await bucket.acquire(max_wait=0.1)
+        return bucket, next_free
+
+    bucket, next_free = asyncio.run(main())
+    assert bucket._next_free == next_free
+    assert bucket.stats()["rejected"] == 2
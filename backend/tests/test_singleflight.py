@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.logic.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"rain": 12}
+
+    async def main():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do(("forecast", 18.5, 73.85), fetch) for _ in range(10)))
+        other = await flights.do(("forecast", 19.0, 73.85), fetch)
+        return flights, results, other
+
+    flights, results, other = asyncio.run(main())
+    assert len(calls) == 2
+    assert all(r is results[0] for r in results) and other == {"rain": 12}
+    assert flights.stats()["forecast"]["calls"] == 11
+    assert flights.stats()["forecast"]["upstream_calls"] == 2
+    assert len(flights) == 0
+
+
+def test_failure_reaches_every_waiter_and_is_not_remembered():
+    attempts = []
+
+    async def fetch():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def main():
+        flights = SingleFlight()
+        first = await asyncio.gather(*(flights.do(("geocode", "pune"), fetch) for _ in range(3)),
+                                     return_exceptions=True)
+        return first, await flights.do(("geocode", "pune"), fetch)
+
+    first, retry = asyncio.run(main())
+    assert all(isinstance(e, RuntimeError) for e in first)
+    assert retry == "ok" and len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        flights = SingleFlight()
+        impatient = asyncio.ensure_future(flights.do(("soil", 1), fetch))
+        patient = asyncio.ensure_future(flights.do(("soil", 1), fetch))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_spawn_runs_in_background_once():
+    calls = []
+
+    async def refresh():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def main():
+        flights = SingleFlight()
+        flights.spawn(("archive", 1), refresh)
+        flights.spawn(("archive", 1), refresh)
+        assert len(flights) == 1
+        await asyncio.sleep(0.03)
+        return flights
+
+    flights = asyncio.run(main())
+    assert len(calls) == 1 and len(flights) == 0
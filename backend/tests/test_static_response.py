@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from app.logic.static_response import accepts_gzip
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", False),
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("br, gzip; q=0.000", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("br, *;q=0.1", True),
+    ("identity", False),
+    ("X-GZIP", True),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_crops_gzip_and_plain_representations(client):
+    plain = client.get("/api/crops", headers={"accept-encoding": "identity"})
+    zipped = client.get("/api/crops", headers={"accept-encoding": "gzip"})
+    refused = client.get("/api/crops", headers={"accept-encoding": "gzip;q=0, br"})
+    assert "content-encoding" not in plain.headers and "content-encoding" not in refused.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert json.loads(plain.content) == zipped.json() == refused.json()
+    assert plain.headers["etag"] == refused.headers["etag"] != zipped.headers["etag"]
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_gives_304(client):
+    etag = client.get("/api/soils", headers={"accept-encoding": "identity"}).headers["etag"]
+    r = client.get("/api/soils", headers={"accept-encoding": "identity", "if-none-match": f'W/{etag}'})
+    assert r.status_code == 304 and r.content == b""
@@ -0,0 +1,59 @@
+from app.logic.suggest_cache import PrefixSuggestionCache
+
+SATARA = {"name": "Satara", "value": "Satara, Maharashtra"}
+SATANA = {"name": "Satana", "value": "Satana, Nashik, Maharashtra"}
+KORE_GAON = {"name": "Kore Gaon", "value": "Kore Gaon, Satara, Maharashtra"}
+
+
+def test_exact_hit():
+    cache = PrefixSuggestionCache(limit=5, ttl=60)
+    cache.put("satara", [SATARA])
+    assert cache.get("satara") == [SATARA]
+    assert cache.derived == 0
+
+
+def test_whole_word_match_is_derived_from_an_untruncated_prefix():
+    cache = PrefixSuggestionCache(limit=5, ttl=60)
+    cache.put("sat", [SATARA, SATANA])
+    assert cache.get("satara") == [SATARA]
+    assert cache.derived == 1
+    assert cache.get("satara") == [SATARA]  # now cached under its own key
+    assert cache.derived == 1
+
+
+def test_partial_words_are_not_derived():
+    # Nominatim matches whole words: "sata" may find places "sat" did not,
+    # and neither cached result is named "Sata"
+    cache = PrefixSuggestionCache(limit=5, ttl=60)
+    cache.put("sat", [SATARA, SATANA])
+    assert cache.get("sata") is None
+    assert cache.get("satar") is None
+
+
+def test_words_must_all_be_in_the_name():
+    cache = PrefixSuggestionCache(limit=5, ttl=60)
+    cache.put("kor", [KORE_GAON])
+    assert cache.get("kore gaon") == [KORE_GAON]
+    assert cache.get("kore satara") is None  # "satara" is only in the address
+
+
+def test_truncated_prefix_is_never_used():
+    cache = PrefixSuggestionCache(limit=2, ttl=60)
+    cache.put("sat", [SATARA, SATANA])
+    assert cache.get("satara") is None
+
+
+def test_short_queries_stay_local(client, fakes):
+    # Below SUGGESTIONS_REMOTE_MIN_CHARS only local and cached results are used
+    before = fakes.calls.get("/search", 0)
+    for query in ("zq", "zqx"):
+        assert client.get("/api/suggestions", params={"query": query}).json() == []
+    assert fakes.calls.get("/search", 0) == before
+
+
+def test_longer_queries_go_upstream_once(client, fakes):
+    before = fakes.calls.get("/search", 0)
+    first = client.get("/api/suggestions", params={"query": "Zqxw"}).json()
+    again = client.get("/api/suggestions", params={"query": "zqxw"}).json()
+    assert first and first == again
+    assert fakes.calls["/search"] - before == 1
@@ -0,0 +1,73 @@
+import asyncio
+
+from app.logic.tracing import MAX_SPANS, Trace, _current, span, traced
+
+
+def in_trace(fn):
+    trace = Trace()
+    token = _current.set(trace)
+    try:
+        fn()
+    finally:
+        _current.reset(token)
+    return trace
+
+
+def test_spans_and_server_timing_totals():
+    @traced("fetch")
+    async def fetch():
+        await asyncio.sleep(0.01)
+
+    def work():
+        with span("parse"):
+            pass
+        asyncio.run(fetch())
+        asyncio.run(fetch())
+
+    trace = in_trace(work)
+    assert [s[0] for s in trace.spans] == ["parse", "fetch", "fetch"]
+    timing = dict(part.split(";dur=") for part in trace.server_timing().split(", "))
+    assert list(timing) == ["parse", "fetch", "total"]
+    assert float(timing["fetch"]) >= 20
+
+
+def test_errors_are_recorded():
+    def work():
+        try:
+            with span("lookup"):
+                raise KeyError("x")
+        except KeyError:
+            pass
+
+    assert in_trace(work).record()["spans"][0]["error"] == "KeyError"
+
+
+def test_span_list_is_capped_but_totals_are_not():
+    def work():
+        for _ in range(MAX_SPANS + 50):
+            with span("row"):
+                pass
+
+    trace = in_trace(work)
+    assert len(trace.spans) == MAX_SPANS and trace.dropped == 50
+    assert trace.record()["dropped_spans"] == 50
+    assert trace.server_timing().startswith("row;dur=")
+
+
+def test_spans_outside_a_request_do_nothing():
+    with span("background"):
+        pass
+    assert _current.get() is None
+
+
+def test_server_timing_header(client):
+    r = client.post("/api/check-crop", json={"crop_name": "Wheat", "available_water_mm": 500})
+    names = [part.split(";")[0] for part in r.headers["server-timing"].split(", ")]
+    assert "crop_lookup" in names and names[-1] == "total"
+
+
+def test_streaming_route_is_not_traced(client):
+    body = "crop_name,available_water_mm\n" + "Wheat,500\n" * 100
+    r = client.post("/api/check-crop/stream", content=body, headers={"content-type": "text/csv"})
+    assert len(r.text.splitlines()) == 100
+    assert "server-timing" not in r.headers
@@ -471,6 +471,8 @@ function App() {
 
   const [suggestions, setSuggestions] = useState([]);
   const [activeSearch, setActiveSearch] = useState(null); // 'name' or 'pincode'
+  const suggestTimer = useRef(null);
+  const suggestSeq = useRef(0);
 
   // Manual Check State
   const [selectedCrop, setSelectedCrop] = useState('');
@@ -608,9 +610,15 @@ function App() {
 
     setActiveSearch(type);
 
+    // Wait for a pause in typing, and drop replies to queries that have
+    // since been superseded so a slow answer can't overwrite a newer one
+    clearTimeout(suggestTimer.current);
+    const seq = ++suggestSeq.current;
     if (val.length > 1) {
-      const results = await fetchSuggestions(val);
-      setSuggestions(results);
+      suggestTimer.current = setTimeout(async () => {
+        const results = await fetchSuggestions(val);
+        if (seq === suggestSeq.current) setSuggestions(results);
+      }, 250);
     } else {
       setSuggestions([]);
     }